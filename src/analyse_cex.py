@@ -7,10 +7,15 @@ import sys
 import typing
 from enum import Enum
 
-from src import custom_args, marking, util, weaken
+from src import custom_args, lazy_marking, marking, util, weaken
 from src.logic import ctx, mtl, parser
 from src.trace_analysis import nuxmv_xml_trace, spin_trace
 
+try:
+    from src import batch_marking
+except ImportError:
+    batch_marking = None  # type: ignore[assignment]
+
 if typing.TYPE_CHECKING:
     from pathlib import Path
 
@@ -23,6 +28,8 @@ class Namespace(argparse.Namespace):
     trace_file: Path | None
     model_checker: custom_args.ModelChecker
     show_markings: bool
+    lazy_markings: bool
+    evict_markings: bool
 
 
 def parse_args(argv: list[str]) -> Namespace:
@@ -38,7 +45,14 @@ def parse_args(argv: list[str]) -> Namespace:
     custom_args.add_trace_file_argument(arg_parser)
     custom_args.add_model_checker_argument(arg_parser)
     custom_args.add_show_markings_argument(arg_parser)
-    return arg_parser.parse_args(argv, namespace=Namespace())
+    custom_args.add_lazy_markings_argument(arg_parser)
+    custom_args.add_evict_markings_argument(arg_parser)
+    args = arg_parser.parse_args(argv, namespace=Namespace())
+    if args.lazy_markings and args.evict_markings:
+        arg_parser.error(
+            "--lazy-markings and --evict-markings cannot be combined",
+        )
+    return args
 
 
 def read_trace_input(trace_file: Path | None) -> list[str]:
@@ -51,16 +65,80 @@ def read_trace_input(trace_file: Path | None) -> list[str]:
 def get_cex_trace(
     model_checker: custom_args.ModelChecker,
     lines: list[str],
+    variables: typing.Collection[str] | None = None,
 ) -> marking.Trace:
-    """Parse raw trace lines using the selected model-checker format."""
+    """Parse raw trace lines using the selected model-checker format,
+    keeping only the given variables if any."""
     if model_checker == custom_args.ModelChecker.NUXMV:
-        return nuxmv_xml_trace.parse("".join(lines))
+        return nuxmv_xml_trace.parse("".join(lines), variables)
     if model_checker == custom_args.ModelChecker.SPIN:
-        return spin_trace.parse("\n".join(lines))
+        return spin_trace.parse("\n".join(lines), variables)
     msg = f"Unknown model checker: {model_checker}"
     raise ValueError(msg)
 
 
+def split_weakened_subformula(
+    formula: mtl.Mtl,
+    de_bruijn: list[int],
+) -> tuple[ctx.Ctx, mtl.Temporal]:
+    """Split out the subformula to weaken, in partial negation normal form."""
+    context, subformula = ctx.split_formula(formula, de_bruijn)
+    return ctx.partial_nnf(
+        context,
+        typing.cast("mtl.Temporal", subformula),
+    )
+
+
+def batch_markings(
+    traces: list[marking.Trace],
+    formula: mtl.Mtl,
+) -> list[marking.Marking]:
+    """Evaluate a formula over every trace, in one batch if NumPy is
+    installed and one trace at a time otherwise."""
+    if batch_marking is None:
+        return [marking.Marking(trace, formula) for trace in traces]
+    batch = batch_marking.BatchMarking(traces, formula)
+    return [batch.marking(t) for t in range(len(traces))]
+
+
+class TraceSession:
+    """A parsed counterexample trace with one marking cache that grows with
+    every analysis run against it.
+
+    Each formula only computes the markings of the subformulae that no
+    earlier analysis of the trace has, and the distances to the next
+    witness of each subformula are shared too, so exploring several
+    subformulae or candidate formulae over one trace reads and parses it
+    once and evaluates each subformula once.
+    """
+
+    def __init__(self, trace: marking.Trace) -> None:
+        """Start a session over a trace, before any formula is marked."""
+        self.trace = trace
+        self.markings = marking.Marking(trace)
+
+    @classmethod
+    def from_file(
+        cls,
+        trace_file: Path | None,
+        model_checker: custom_args.ModelChecker,
+        variables: typing.Collection[str] | None = None,
+    ) -> TraceSession:
+        """Start a session over the trace in a file, or standard input,
+        keeping only the given variables if any."""
+        lines = read_trace_input(trace_file)
+        return cls(get_cex_trace(model_checker, lines, variables))
+
+    def weaken(
+        self,
+        context: ctx.Ctx,
+        subformula: mtl.Mtl,
+        engine: type[weaken.Weaken] = weaken.Weaken,
+    ) -> weaken.Weaken:
+        """Build a weakening analysis that reads the session's markings."""
+        return engine(context, subformula, self.trace, self.markings)
+
+
 class WeakeningType(Enum):
     """Direction of interval weakening for a temporal operator."""
 
@@ -77,16 +155,58 @@ class AnalyseCex:
         de_bruijn: list[int],
         trace_file: Path | None,
         model_checker: custom_args.ModelChecker,
+        *,
+        lazy: bool = False,
+        evict: bool = False,
     ) -> None:
-        """Build analysis state for weakening one temporal subformula."""
+        """Build analysis state for weakening one temporal subformula.
+
+        With `lazy`, markings are only computed at the positions that the
+        weakening reads rather than across the whole trace. With `evict`,
+        only the markings that the weakening reads are kept in memory. The
+        two cannot be combined, as lazy markings hold no whole markings to
+        free.
+        """
+        if lazy and evict:
+            msg = "Lazy markings cannot be evicted"
+            raise ValueError(msg)
         lines = read_trace_input(trace_file)
-        cex_trace = get_cex_trace(model_checker, lines)
-        context, subformula = ctx.split_formula(formula, de_bruijn)
-        context, subformula = ctx.partial_nnf(
-            context,
-            typing.cast("mtl.Temporal", subformula),
+        context, subformula = split_weakened_subformula(formula, de_bruijn)
+        full_formula = ctx.substitute(context, subformula)
+        cex_trace = get_cex_trace(
+            model_checker,
+            lines,
+            mtl.props(full_formula),
         )
-        self.w = weaken.Weaken(context, subformula, cex_trace)
+        markings: marking.Marking | None = None
+        if lazy:
+            markings = lazy_marking.LazyMarking(cex_trace, full_formula)
+        elif evict:
+            markings = marking.Marking(
+                cex_trace,
+                full_formula,
+                pinned=weaken.queried_formulas(context, subformula),
+            )
+        self.w = weaken.Weaken(context, subformula, cex_trace, markings)
+
+    @classmethod
+    def from_weaken(cls, w: weaken.Weaken) -> AnalyseCex:
+        """Wrap an already-built weakening analysis."""
+        analysis = cls.__new__(cls)
+        analysis.w = w
+        return analysis
+
+    @classmethod
+    def from_session(
+        cls,
+        session: TraceSession,
+        formula: mtl.Mtl,
+        de_bruijn: list[int],
+    ) -> AnalyseCex:
+        """Analyse one temporal subformula over the trace of a session,
+        reusing the markings of every earlier analysis of it."""
+        context, subformula = split_weakened_subformula(formula, de_bruijn)
+        return cls.from_weaken(session.weaken(context, subformula))
 
     def get_markings(self) -> marking.Marking:
         """Return the computed truth markings for the analyzed formula."""
@@ -96,6 +216,11 @@ class AnalyseCex:
         """Compute the best interval weakening for the selected subformula."""
         return self.w.weaken()
 
+    def holds_with(self, interval: mtl.Interval) -> bool:
+        """Check whether the formula holds on the trace with the analysed
+        subformula's interval replaced."""
+        return self.w.holds_with(interval)
+
     def does_formula_hold(self, formula: mtl.Mtl) -> bool:
         """Check whether a formula holds at the initial trace position."""
         bl = self.w.markings[formula]
@@ -133,6 +258,35 @@ class AnalyseCex:
         raise TypeError(msg)
 
 
+def analyse_batch(
+    formula: mtl.Mtl,
+    de_bruijn: list[int],
+    trace_files: list[Path],
+    model_checker: custom_args.ModelChecker,
+) -> list[AnalyseCex]:
+    """Analyse several counterexample traces for the same formula, splitting
+    it once and evaluating its markings over all traces together."""
+    if not trace_files:
+        return []
+    context, subformula = split_weakened_subformula(formula, de_bruijn)
+    full_formula = ctx.substitute(context, subformula)
+    traces = [
+        get_cex_trace(
+            model_checker,
+            read_trace_input(trace_file),
+            mtl.props(full_formula),
+        )
+        for trace_file in trace_files
+    ]
+    markings = batch_markings(traces, full_formula)
+    return [
+        AnalyseCex.from_weaken(
+            weaken.Weaken(context, subformula, trace, trace_markings),
+        )
+        for trace, trace_markings in zip(traces, markings, strict=True)
+    ]
+
+
 def main(args: Namespace) -> None:
     """Run CLI analysis and print either a weakened interval or failure text."""
     mtl_formula = parser.parse_mtl(args.mtl)
@@ -141,10 +295,14 @@ def main(args: Namespace) -> None:
         args.de_bruijn,
         args.trace_file,
         args.model_checker,
+        lazy=args.lazy_markings,
+        evict=args.evict_markings,
     )
-    if args.show_markings:
+    if args.show_markings and not args.lazy_markings:
         print(analysis.get_markings())
     interval = analysis.get_weakened_interval()
+    if args.show_markings and args.lazy_markings:
+        print(analysis.get_markings())
     if interval is None:
         print(util.NO_WEAKENING_EXISTS_STR)
     else:
@@ -0,0 +1,257 @@
+"""Markings of one formula over a batch of traces, evaluated together.
+
+Row t of each marking array holds the markings of trace t, padded to the
+length of the longest trace in the batch, so every operator is evaluated
+once for the whole batch with two-dimensional NumPy operations. Each
+trace's loop start is kept alongside to unroll its row.
+
+NumPy is an optional dependency, as for :mod:`src.numpy_marking`.
+"""
+
+from __future__ import annotations
+
+import typing
+
+import numpy as np
+
+from src import marking, numpy_marking
+from src.logic import mtl as m
+from src.numpy_marking import NEVER, ArrayMarkings
+
+if typing.TYPE_CHECKING:
+    import numpy.typing as npt
+
+    Array = npt.NDArray[typing.Any]
+
+
+class BatchMarking:
+    """Cached evaluator of MTL truth markings over a batch of traces."""
+
+    def __init__(self, traces: list[marking.Trace], formula: m.Mtl) -> None:
+        """Initialize cached markings for one formula over every trace."""
+        self.traces = traces
+        self.formula = formula
+        self.lengths = np.array([len(t) for t in traces], dtype=np.int64)
+        self.width = int(self.lengths.max())
+        self.loop_starts = np.array(
+            [-1 if t.loop_start is None else t.loop_start for t in traces],
+            dtype=np.int64,
+        )
+        self.index_tables: dict[tuple[int, int], Array] = {}
+        self.arrays = self._proposition_arrays()
+        self[formula]  # pylint: disable=pointless-statement
+
+    def _proposition_arrays(self) -> dict[m.Mtl, Array]:
+        """Pack each proposition shared by all traces into a padded array,
+        of int64 if any trace gives it an integer value."""
+        columns = [t.to_var_markings() for t in self.traces]
+        arrays: dict[m.Mtl, Array] = {}
+        for f in columns[0]:
+            if not all(f in c for c in columns):
+                continue
+            rows = [list(c[f]) for c in columns]
+            is_bool = all(isinstance(v, bool) for row in rows for v in row)
+            array: Array = np.ones(
+                (len(self.traces), self.width),
+                dtype=np.bool_ if is_bool else np.int64,
+            )
+            for t, row in enumerate(rows):
+                array[t, : len(row)] = row
+            arrays[f] = array
+        return arrays
+
+    def _indices(self, offset: int, length: int) -> Array:
+        """Concrete index in each trace of logical positions offset, ...,
+        offset + length - 1, with positions past the end of a finite trace
+        mapped to the padding column `self.width`."""
+        key = (offset, length)
+        if key not in self.index_tables:
+            rows = []
+            for t in self.traces:
+                ks = np.frombuffer(
+                    t.indices(offset, offset + length),
+                    dtype=np.int64,
+                )
+                rows.append(np.where(ks >= len(t), self.width, ks))
+            self.index_tables[key] = np.stack(rows)
+        return self.index_tables[key]
+
+    def _truth(self, f: m.Mtl) -> Array:
+        """Return the markings of f as a bool array."""
+        return self[f].astype(np.bool_, copy=False)
+
+    def _gather(self, values: Array, indices: Array) -> Array:
+        """Read each row of values at the given indices, where the padding
+        column `self.width` reads as true."""
+        padding = np.ones((len(self.traces), 1), dtype=values.dtype)
+        padded = np.concatenate((values, padding), axis=1)
+        return np.take_along_axis(padded, indices, axis=1)
+
+    def _get_next(self, operand: m.Mtl, steps: int = 1) -> Array:
+        """Shift operand markings forward by `steps` logical steps."""
+        return self._gather(self[operand], self._indices(steps, self.width))
+
+    def _window_counts(
+        self,
+        operand: m.Mtl,
+        interval: m.Interval,
+    ) -> tuple[Array, Array, Array]:
+        """Count true markings in each position's window.
+
+        Returns the counts, the window sizes, and a mask of the positions
+        whose window lies entirely beyond the end of a finite trace.
+        """
+        a, b = interval
+        widths = (
+            self.lengths if b is None else np.minimum(b - a, self.lengths)
+        )[:, np.newaxis]
+        unrolled = self._gather(
+            self._truth(operand),
+            self._indices(0, 2 * self.width),
+        )
+        prefix = np.concatenate(
+            (
+                np.zeros((len(self.traces), 1), dtype=np.int64),
+                np.cumsum(unrolled, axis=1, dtype=np.int64),
+            ),
+            axis=1,
+        )
+        starts = self._indices(a, self.width)
+        beyond = starts == self.width
+        starts = np.where(beyond, 0, starts)
+        counts = np.take_along_axis(
+            prefix,
+            starts + widths + 1,
+            axis=1,
+        ) - np.take_along_axis(prefix, starts, axis=1)
+        return counts, np.broadcast_to(widths + 1, counts.shape), beyond
+
+    def _next_distances(self, truth: Array, value: bool) -> Array:
+        """Distance from each position to the next one marked `value`,
+        or :data:`NEVER` if it never recurs, row by row."""
+        columns = np.arange(self.width, dtype=np.int64)
+        hits = (truth if value else ~truth) & (
+            columns < self.lengths[:, np.newaxis]
+        )
+        positions = np.where(hits, columns, NEVER)
+        following = np.minimum.accumulate(positions[:, ::-1], axis=1)[:, ::-1]
+        in_loop = hits & (columns >= self.loop_starts[:, np.newaxis])
+        first = np.where(in_loop, columns, NEVER).min(axis=1)
+        after = np.where(
+            first == NEVER,
+            NEVER,
+            self.lengths + first - self.loop_starts,
+        )
+        if value:
+            after = np.where(self.loop_starts < 0, self.lengths, after)
+        else:
+            after = np.where(self.loop_starts < 0, NEVER, after)
+        following = np.where(
+            following == NEVER,
+            after[:, np.newaxis],
+            following,
+        )
+        return np.where(following == NEVER, NEVER, following - columns)
+
+    def _first_witness(
+        self,
+        witness: Array,
+        blocker: Array,
+        interval: m.Interval,
+        strict: bool,
+    ) -> Array:
+        """Mark positions whose window sees `witness` in time and before
+        `blocker` (or at the same step, unless `strict`)."""
+        a, b = interval
+        starts = self._indices(a, self.width)
+        beyond = starts == self.width
+        starts = np.where(beyond, 0, starts)
+        d_witness = np.take_along_axis(witness, starts, axis=1)
+        d_blocker = np.take_along_axis(blocker, starts, axis=1)
+        in_time = d_witness != NEVER
+        if b is not None:
+            in_time &= d_witness <= b - a
+        in_order = d_witness < d_blocker if strict else d_witness <= d_blocker
+        marked: Array = beyond | (in_time & in_order)
+        return marked
+
+    def __getitem__(self, f: m.Mtl) -> Array:
+        """Return cached or computed markings for formula f, one row per
+        trace, evaluating its uncached subformulae in the order of its
+        plan, so that each operand is cached before it is read."""
+        if f in self.arrays:
+            return self.arrays[f]
+        shape = (len(self.traces), self.width)
+        if isinstance(f, m.TrueBool):
+            return np.ones(shape, dtype=np.bool_)
+        if isinstance(f, m.FalseBool):
+            return np.zeros(shape, dtype=np.bool_)
+        if isinstance(f, m.Prop):
+            msg = f"Proposition '{f}' not found in markings. "
+            raise TypeError(msg)
+        for g, _, _ in marking.compile_plan(f).steps:
+            if g not in self.arrays:
+                self.arrays[g] = self._compute(g)
+        return self.arrays[f]
+
+    def _compute(self, f: m.Mtl) -> Array:
+        """Evaluate compound formula f over the batch, from the cached
+        markings of its operands."""
+        array: Array
+        if isinstance(f, m.Not):
+            array = np.logical_not(self[f.operand])
+        elif isinstance(f, m.And):
+            array = np.logical_and(self[f.left], self[f.right])
+        elif isinstance(f, m.Or):
+            array = np.logical_or(self[f.left], self[f.right])
+        elif isinstance(f, m.Implies):
+            array = np.logical_or(np.logical_not(self[f.left]), self[f.right])
+        elif isinstance(f, m.Eventually):
+            counts, _, beyond = self._window_counts(f.operand, f.interval)
+            array = beyond | (counts > 0)
+        elif isinstance(f, m.Always):
+            counts, sizes, beyond = self._window_counts(f.operand, f.interval)
+            array = beyond | (counts == sizes)
+        elif isinstance(f, m.Until):
+            array = self._first_witness(
+                self._next_distances(self._truth(f.right), value=True),
+                self._next_distances(self._truth(f.left), value=False),
+                f.interval,
+                strict=False,
+            )
+        elif isinstance(f, m.Release):
+            array = self._first_witness(
+                self._next_distances(self._truth(f.left), value=True),
+                self._next_distances(self._truth(f.right), value=False),
+                f.interval,
+                strict=True,
+            )
+        elif isinstance(f, m.Next):
+            array = self._get_next(*m.next_chain(f))
+        else:
+            msg = f"Unsupported MTL construct: {f}"
+            raise TypeError(msg)
+        return array
+
+    def marking(self, t: int) -> marking.Marking:
+        """Return the markings of trace t as a single-trace marking."""
+        return RowMarking(self, t)
+
+
+class RowMarking(numpy_marking.NumpyMarking):
+    """The markings of one trace of a batch, seeded with its rows of every
+    batch marking and evaluating anything else on its own."""
+
+    def __init__(self, batch: BatchMarking, row: int) -> None:
+        """Create the markings of trace `row` of a batch."""
+        self.batch = batch
+        self.row = row
+        super().__init__(batch.traces[row], batch.formula)
+
+    def _proposition_markings(self) -> dict[m.Mtl, marking.VarMarkings]:
+        """Slice this trace's row out of every batch marking."""
+        n = len(self.trace)
+        return {
+            f: ArrayMarkings(array[self.row, :n])
+            for f, array in self.batch.arrays.items()
+        }
@@ -0,0 +1,242 @@
+"""Trace markings packed into arbitrary-precision integer bitsets.
+
+Bit i of a bitset holds the marking at trace position i, so Boolean
+operators become single integer operations and Next and bounded F/G become
+shift-and-or ladders over the whole trace at once.
+"""
+
+from __future__ import annotations
+
+import sys
+import typing
+
+from src import marking
+
+if typing.TYPE_CHECKING:
+    from src.logic import mtl as m
+
+
+class BitsetMarkings(marking.VarMarkings):
+    """
+    Boolean markings for a formula over a trace, packed into an integer.
+    Indexes beyond the length of the trace return True.
+    """
+
+    def __init__(  # pylint: disable=super-init-not-called
+        self,
+        bits: int,
+        length: int,
+    ) -> None:
+        """Create a marking wrapper over `length` packed bits."""
+        self.bits = bits
+        self.length = length
+
+    @classmethod
+    def from_values(cls, values: typing.Iterable[bool | int]) -> BitsetMarkings:
+        """Pack the truth of each value into a bitset."""
+        bits = 0
+        length = 0
+        for i, v in enumerate(values):
+            if v:
+                bits |= 1 << i
+            length = i + 1
+        return cls(bits, length)
+
+    def __getitem__(self, i: int) -> bool:
+        """Return the marking at index i, defaulting to True out of range."""
+        if i >= self.length:
+            return True
+        return bool(self.bits >> i & 1)
+
+    def __len__(self) -> int:
+        """Return the finite number of stored markings."""
+        return self.length
+
+    def __iter__(self) -> typing.Iterator[bool]:
+        """Iterate over stored marking values in order."""
+        return (bool(self.bits >> i & 1) for i in range(self.length))
+
+    def append(self, value: bool | int) -> None:
+        """Append one marking value at the end of the sequence."""
+        if value:
+            self.bits |= 1 << self.length
+        self.length += 1
+
+    def memory_usage(self) -> int:
+        """Return the number of bytes held by the packed bits."""
+        return sys.getsizeof(self.bits)
+
+
+def _mask(length: int) -> int:
+    """Return a bitset with the lowest `length` bits set."""
+    return (1 << length) - 1
+
+
+def _repeat(pattern: int, period: int, length: int) -> int:
+    """Repeat a `period`-bit pattern until it covers `length` bits."""
+    covered = period
+    while covered < length:
+        pattern |= pattern << covered
+        covered *= 2
+    return pattern & _mask(length)
+
+
+def _any_window(bits: int, width: int) -> int:
+    """Set bit j when any of bits j, ..., j + width - 1 is set.
+
+    Combines doubling ladders of shifted ors, so this takes O(log width)
+    integer operations.
+    """
+    result = 0
+    covered = 0
+    ladder = bits
+    step = 1
+    while width:
+        if width & 1:
+            result |= ladder >> covered
+            covered += step
+        width >>= 1
+        if width:
+            ladder |= ladder >> step
+            step *= 2
+    return result
+
+
+class BitsetMarking(marking.Marking):
+    """Cached evaluator of MTL truth markings over integer bitsets.
+
+    Integer-valued propositions keep their list markings so they render
+    with their values; they are packed by truth when used as operands.
+    """
+
+    def _proposition_markings(self) -> dict[m.Mtl, marking.VarMarkings]:
+        """Pack each Boolean proposition column into a bitset."""
+        markings = self.trace.to_var_markings()
+        for f, vs in markings.items():
+            if all(isinstance(v, bool) for v in vs):
+                markings[f] = BitsetMarkings.from_values(vs)
+        return markings
+
+    def _bits(self, f: m.Mtl) -> int:
+        """Return the markings of f as a bitset."""
+        vs = self[f]
+        if isinstance(vs, BitsetMarkings):
+            return vs.bits
+        return BitsetMarkings.from_values(vs).bits
+
+    def _wrap(self, bits: int) -> BitsetMarkings:
+        """Wrap a bitset over the positions of the trace."""
+        return BitsetMarkings(bits, len(self.trace))
+
+    def _unrolled(self, bits: int, length: int) -> int:
+        """Extend a bitset over the first `length` logical positions, following
+        the lasso loop or padding a finite trace with true states."""
+        n = len(self.trace)
+        loop_start = self.trace.loop_start
+        if length <= n:
+            return bits & _mask(length)
+        if loop_start is None:
+            return bits | _mask(length - n) << n
+        period = n - loop_start
+        loop = bits >> loop_start & _mask(period)
+        return bits | _repeat(loop, period, length - n) << n
+
+    def _get_not(self, operand: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise negation markings for a subformula."""
+        return self._wrap(~self._bits(operand) & _mask(len(self.trace)))
+
+    def _get_and(self, left: m.Mtl, right: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise conjunction markings for two subformulae."""
+        return self._wrap(self._bits(left) & self._bits(right))
+
+    def _get_or(self, left: m.Mtl, right: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise disjunction markings for two subformulae."""
+        return self._wrap(self._bits(left) | self._bits(right))
+
+    def _get_implies(self, left: m.Mtl, right: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise implication markings for two subformulae."""
+        n = len(self.trace)
+        return self._wrap((~self._bits(left) | self._bits(right)) & _mask(n))
+
+    def _get_next(
+        self,
+        operand: m.Mtl,
+        steps: int = 1,
+    ) -> marking.VarMarkings:
+        """Shift operand markings forward by `steps` logical steps, folding
+        shifts past the end of a lasso back into the loop."""
+        n = len(self.trace)
+        loop_start = self.trace.loop_start
+        if steps >= n:
+            if loop_start is None:
+                return self._wrap(_mask(n))
+            steps = loop_start + (steps - loop_start) % (n - loop_start)
+        unrolled = self._unrolled(self._bits(operand), n + steps)
+        return self._wrap(unrolled >> steps)
+
+    def _window(
+        self,
+        bits: int,
+        interval: m.Interval,
+        conjunctive: bool,
+    ) -> int:
+        """Set bit i when any (or, if `conjunctive`, every) bit in the window
+        of logical position i is set.
+
+        Windows wider than the trace are clamped, and lower bounds past the
+        end of a lasso are folded back into the loop.
+        """
+        n = len(self.trace)
+        loop_start = self.trace.loop_start
+        a, b = interval
+        width = n if b is None else min(b - a, n)
+        if a >= n:
+            if loop_start is None:
+                return _mask(n)
+            a = loop_start + (a - loop_start) % (n - loop_start)
+        length = n + a + width
+        unrolled = self._unrolled(bits, length)
+        if conjunctive:
+            falses = _any_window(~unrolled & _mask(length), width + 1)
+            return ~falses >> a & _mask(n)
+        return _any_window(unrolled, width + 1) >> a & _mask(n)
+
+    def _get_eventually(
+        self,
+        operand: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded eventuality markings over the given interval."""
+        bits = self._bits(operand)
+        return self._wrap(self._window(bits, interval, conjunctive=False))
+
+    def _get_always(
+        self,
+        operand: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded invariance markings over the given interval."""
+        bits = self._bits(operand)
+        return self._wrap(self._window(bits, interval, conjunctive=True))
+
+    def _get_until(
+        self,
+        left: m.Mtl,
+        right: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded-until markings for left and right operands."""
+        return BitsetMarkings.from_values(
+            super()._get_until(left, right, interval),
+        )
+
+    def _get_release(
+        self,
+        left: m.Mtl,
+        right: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded-release markings for left and right operands."""
+        return BitsetMarkings.from_values(
+            super()._get_release(left, right, interval),
+        )
@@ -0,0 +1,248 @@
+"""Weakening at every trace position at once, from the hole up to the root.
+
+:class:`src.weaken.Weaken` recurses from the root of the context at the
+first position. This engine instead computes the weakening of each context
+node at every concrete position, starting with the hole and folding in one
+layer of the context at a time. A temporal layer reads a window of its
+child's weakenings at each position, and as both ends of the windows move
+forward with the position, the best weakening of each window is kept in a
+monotone deque rather than found by rescanning the window.
+"""
+
+from __future__ import annotations
+
+import collections
+import itertools
+import typing
+
+from src import weaken
+from src.logic import ctx, mtl
+
+Intervals = list[mtl.Interval | None]
+Window = tuple[int, int]
+
+_TEMPORAL = (
+    ctx.Eventually,
+    ctx.Always,
+    ctx.UntilLeft,
+    ctx.UntilRight,
+    ctx.ReleaseLeft,
+    ctx.ReleaseRight,
+)
+
+
+def _sliding(
+    values: Intervals,
+    keys: list[int],
+    windows: typing.Iterable[Window],
+    *,
+    largest: bool,
+) -> Intervals:
+    """Return the first value of least key, or greatest if `largest`, in
+    each window [start, stop) of values, skipping None, or None if there is
+    no value in the window.
+
+    Window starts and stops must not decrease. Positions of the deque are
+    only dropped for a strictly better key, so ties go to the earliest
+    value, as with :func:`min` and :func:`max`.
+    """
+    queue: collections.deque[int] = collections.deque()
+    pushed = 0
+    best: Intervals = []
+    for start, stop in windows:
+        for j in range(pushed, stop):
+            if values[j] is None:
+                continue
+            while queue and (
+                keys[j] > keys[queue[-1]]
+                if largest
+                else keys[j] < keys[queue[-1]]
+            ):
+                queue.pop()
+            queue.append(j)
+        pushed = max(pushed, stop)
+        while queue and queue[0] < start:
+            queue.popleft()
+        best.append(values[queue[0]] if queue else None)
+    return best
+
+
+class BottomUpWeaken(weaken.Weaken):
+    """Compute trace-guided interval weakenings for temporal subformulas,
+    one context layer at a time over all positions.
+
+    The weakenings of every layer are also stored in the memo of
+    :class:`src.weaken.Weaken`, so the top-down methods read them as is.
+    """
+
+    def _slots(self) -> int:
+        """Return the number of concrete positions, including the padding
+        position past the end of a finite trace."""
+        return self.trace_len + (self.trace.loop_start is None)
+
+    def _remember(self, c: ctx.Ctx, layer: Intervals) -> None:
+        """Store the weakenings of a context node in the memo."""
+        self.memo.update(((c, k), v) for k, v in enumerate(layer))
+
+    def _bounds(self, c: ctx.Ctx) -> tuple[int, int] | None:
+        """Return the offset of the window start of a temporal layer, folded
+        into the loop, and the window width, or None if it has no window."""
+        assert isinstance(c, _TEMPORAL)
+        a, b = c.interval
+        right_idx = weaken.min_option(self.trace.right_idx(a), b)
+        if right_idx < a:
+            return None
+        n = self.trace_len
+        loop_start = self.trace.loop_start
+        offset = a
+        if loop_start is not None and a >= n:
+            offset = loop_start + (a - loop_start) % (n - loop_start)
+        return offset, right_idx - a
+
+    def _total(self, c: ctx.Ctx) -> bool:
+        """Check whether the top-down weakening of a context node is defined
+        at every position, so it is safe to compute everywhere.
+
+        It is not for the hole of an unbounded F or U, which cannot be
+        weakened, for G and for R on the right with an empty window, and
+        for nodes that the top-down method does not support.
+        """
+        if isinstance(c, ctx.Hole):
+            return not (
+                isinstance(self.subformula, (mtl.Eventually, mtl.Until))
+                and self.subformula.interval[1] is None
+            )
+        if isinstance(c, (ctx.Always, ctx.ReleaseRight)):
+            return self._bounds(c) is not None
+        return isinstance(
+            c,
+            (ctx.AndLeft, ctx.AndRight, ctx.OrLeft, ctx.OrRight, *_TEMPORAL),
+        )
+
+    def _reduce(
+        self,
+        child: Intervals,
+        windows: list[Window],
+        *,
+        largest: bool,
+        total: bool,
+    ) -> Intervals:
+        """Reduce the child's weakenings over each window of logical
+        positions, to None if `total` and any of them is None."""
+        length = max((stop for _, stop in windows), default=0)
+        values = [child[k] for k in self.trace.indices(0, length)]
+        keys = [0 if v is None else self._interval_abs_diff(v) for v in values]
+        best = _sliding(values, keys, windows, largest=largest)
+        if not total:
+            return best
+        nones = list(
+            itertools.accumulate((v is None for v in values), initial=0),
+        )
+        return [
+            None if nones[stop] > nones[start] else v
+            for (start, stop), v in zip(windows, best, strict=True)
+        ]
+
+    def _stop(self, f: mtl.Mtl, s: int, limit: int, *, value: bool) -> int:
+        """Return the number of steps from logical position s to the next
+        one at which f is marked `value`, capped at `limit`."""
+        d = self.markings.distance(f, s, value=value)
+        return limit if d is None else min(d, limit)
+
+    def _temporal_layer(
+        self,
+        c: ctx.Ctx,
+        child: Intervals,
+        offset: int,
+        width: int,
+    ) -> Intervals:
+        """Fold a temporal context node over windows of its child."""
+        starts = range(offset, offset + self._slots())
+        if isinstance(c, (ctx.Eventually, ctx.Always)):
+            return self._reduce(
+                child,
+                [(s, s + width + 1) for s in starts],
+                largest=isinstance(c, ctx.Always),
+                total=isinstance(c, ctx.Always),
+            )
+        if isinstance(c, ctx.UntilLeft):
+            ds = [self._stop(c.right, s, width + 1, value=True) for s in starts]
+            best = self._reduce(
+                child,
+                [(s, s + d) for s, d in zip(starts, ds, strict=True)],
+                largest=True,
+                total=True,
+            )
+            return [
+                None if d > width else self.original_interval if d == 0 else v
+                for d, v in zip(ds, best, strict=True)
+            ]
+        if isinstance(c, ctx.UntilRight):
+            windows = [
+                (s, s + 1 + self._stop(c.left, s, width, value=False))
+                for s in starts
+            ]
+            return self._reduce(child, windows, largest=False, total=False)
+        if isinstance(c, ctx.ReleaseLeft):
+            windows = [
+                (s, s + self._stop(c.right, s, width + 1, value=False))
+                for s in starts
+            ]
+            return self._reduce(child, windows, largest=False, total=False)
+        assert isinstance(c, ctx.ReleaseRight)
+        windows = [
+            (s, s + 1 + self._stop(c.left, s + offset, width, value=True))
+            for s in starts
+        ]
+        return self._reduce(child, windows, largest=True, total=True)
+
+    def _layer(self, c: ctx.Ctx, child: Intervals) -> Intervals:
+        """Fold a context node over the weakenings of its child."""
+        if isinstance(c, (ctx.AndLeft, ctx.OrLeft, ctx.AndRight, ctx.OrRight)):
+            side = (
+                c.right if isinstance(c, (ctx.AndLeft, ctx.OrLeft)) else c.left
+            )
+            marks = self.markings[side]
+            if isinstance(c, (ctx.AndLeft, ctx.AndRight)):
+                return [v if marks[k] else None for k, v in enumerate(child)]
+            return [
+                self.original_interval if marks[k] else v
+                for k, v in enumerate(child)
+            ]
+        bounds = self._bounds(c)
+        if bounds is None:
+            return [None] * len(child)
+        return self._temporal_layer(c, child, *bounds)
+
+    def _fill(self) -> Intervals | None:
+        """Compute the weakenings of each context node from the hole up, as
+        far as they are defined everywhere, into the memo, and return those
+        of the root if it is reached."""
+        layer: Intervals = []
+        for c in reversed(ctx.hole_path(self.context)):
+            if not self._total(c):
+                return None
+            if isinstance(c, ctx.Hole):
+                layer = [self._weaken_direct(k) for k in range(self._slots())]
+            else:
+                layer = self._layer(c, layer)
+            self._remember(c, layer)
+        return layer
+
+    def intervals(self) -> Intervals:
+        """Return the best weakening at every concrete trace position.
+
+        Above a node whose weakening is not defined everywhere, the nodes
+        are weakened top-down, only at the positions that need them.
+        """
+        layer = self._fill()
+        if layer is None:
+            return [self._aux(self.context, k) for k in range(self._slots())]
+        return layer
+
+    def weaken(self) -> mtl.Interval | None:
+        """Return the best weakening for the configured context and trace."""
+        layer = self._fill()
+        if layer is None:
+            return self._aux(self.context, 0)
+        return layer[0]
@@ -24,8 +24,24 @@ def add_mtl_argument(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--mtl", type=str, help="MTL specification")
 
 
-def add_de_bruijn_argument(parser: argparse.ArgumentParser) -> None:
-    """Register the De Bruijn selector argument on a CLI parser."""
+def add_de_bruijn_argument(
+    parser: argparse.ArgumentParser,
+    *,
+    repeated: bool = False,
+) -> None:
+    """Register the De Bruijn selector argument on a CLI parser, given once
+    per subformula if `repeated`."""
+    if repeated:
+        parser.add_argument(
+            "--de-bruijn",
+            type=_list_of_ints,
+            action="append",
+            help=(
+                "De Bruijn index of a subformula as a list of integers; "
+                "repeat to weaken several subformulae"
+            ),
+        )
+        return
     parser.add_argument(
         "--de-bruijn",
         type=_list_of_ints,
@@ -84,3 +100,62 @@ def add_show_markings_argument(
         action="store_true",
         help="Show the markings computed during analysis.",
     )
+
+
+def add_lazy_markings_argument(
+    parser: argparse.ArgumentParser,
+) -> None:
+    """Register a flag that computes markings only where they are read."""
+    parser.add_argument(
+        "--lazy-markings",
+        action="store_true",
+        help="Only compute the markings read during weakening.",
+    )
+
+
+def add_evict_markings_argument(
+    parser: argparse.ArgumentParser,
+) -> None:
+    """Register a flag that frees intermediate markings once used."""
+    parser.add_argument(
+        "--evict-markings",
+        action="store_true",
+        help="Free intermediate markings that weakening does not read.",
+    )
+
+
+class Tradeoff(Enum):
+    """Order in which the subformulae of a multi-hole weakening are
+    preferred for each trace."""
+
+    PRIORITY = "priority"
+    CLOSEST = "closest"
+
+    def __str__(self) -> str:
+        """Return the enum name for CLI-facing display."""
+        return self.name
+
+    @staticmethod
+    def from_string(s: str) -> "Tradeoff":
+        """Convert a string token into a known trade-off enum value."""
+        try:
+            return Tradeoff[s]
+        except KeyError as err:
+            raise ValueError from err
+
+
+def add_tradeoff_argument(
+    parser: argparse.ArgumentParser,
+) -> None:
+    """Register the multi-hole weakening trade-off argument on a CLI parser."""
+    parser.add_argument(
+        "--tradeoff",
+        type=Tradeoff.from_string,
+        choices=list(Tradeoff),
+        default=Tradeoff.PRIORITY,
+        help=(
+            "How to choose the subformula to weaken for each trace: the "
+            "first given (PRIORITY) or the least changed (CLOSEST) "
+            "(default: PRIORITY)"
+        ),
+    )
@@ -7,7 +7,7 @@ import tempfile
 import time
 from pathlib import Path
 
-from src import custom_args, util
+from src import analyse_cex, custom_args, multi_weaken, util
 from src.logic import ctx, mtl, parser
 from src.trace_analysis import exceptions, nuxmv, spin
 
@@ -18,8 +18,9 @@ class Namespace(argparse.Namespace):
     model_checker: custom_args.ModelChecker
     model: Path
     mtl: str
-    de_bruijn: list[int]
+    de_bruijn: list[list[int]]
     show_markings: bool
+    tradeoff: custom_args.Tradeoff
 
 
 def parse_args(argv: list[str]) -> Namespace:
@@ -30,8 +31,9 @@ def parse_args(argv: list[str]) -> Namespace:
     custom_args.add_model_checker_argument(arg_parser)
     custom_args.add_model_argument(arg_parser)
     custom_args.add_mtl_argument(arg_parser)
-    custom_args.add_de_bruijn_argument(arg_parser)
+    custom_args.add_de_bruijn_argument(arg_parser, repeated=True)
     custom_args.add_show_markings_argument(arg_parser)
+    custom_args.add_tradeoff_argument(arg_parser)
     return arg_parser.parse_args(argv, namespace=Namespace())
 
 
@@ -49,33 +51,27 @@ def get_context_and_subformula(
     )
 
 
-def substitute_interval(
-    formula: mtl.Temporal,
-    interval: mtl.Interval,
-) -> mtl.Temporal:
-    """Return a temporal formula with the same shape and a new interval."""
-    if isinstance(formula, mtl.Always):
-        return mtl.Always(formula.operand, interval)
-    if isinstance(formula, mtl.Eventually):
-        return mtl.Eventually(formula.operand, interval)
-    if isinstance(formula, mtl.Until):
-        return mtl.Until(formula.left, formula.right, interval)
-    if isinstance(formula, mtl.Release):
-        return mtl.Release(formula.left, formula.right, interval)
-    msg = f"Formula '{formula}' must be temporal"
-    raise ValueError(msg)
-
-
 BOUND_MIN = 20
 
 
 def get_initial_bound(
-    interval: mtl.Interval,
+    context: ctx.Ctx,
+    subformula: mtl.Temporal,
 ) -> int:
-    """Choose a starting BMC bound from the current interval."""
-    if interval[1] is None:
+    """Choose a BMC bound that covers the horizon of the formula, with the
+    interval of the subformula extended by half again to leave room for a
+    weakening. Unbounded operators in the context or the subformula's
+    operands add nothing, as no finite bound covers them."""
+    b = subformula.interval[1]
+    if b is None:
         return BOUND_MIN
-    return max(BOUND_MIN, int(interval[1] * 1.5))
+    operands = [mtl.horizon(f) for f in mtl.operands(subformula)]
+    horizons = [
+        ctx.horizon(context),
+        int(b * 1.5),
+        max((h for h in operands if h is not None), default=0),
+    ]
+    return max(BOUND_MIN, sum(h for h in horizons if h is not None))
 
 
 def main_nuxmv(
@@ -87,7 +83,7 @@ def main_nuxmv(
     """Run iterative weakening with NuXmv as the backend checker."""
     context, subformula = get_context_and_subformula(mtl_str, de_bruijn)
     de_bruijn = ctx.get_de_bruijn(context)
-    bound = get_initial_bound(subformula.interval)
+    bound = get_initial_bound(context, subformula)
     n_iterations = 0
     total_elapsed = 0.0
     while True:
@@ -125,8 +121,8 @@ def main_nuxmv(
         print(
             f"{util.interval_to_str(interval)} in {elapsed:.2f} seconds",
         )
-        subformula = substitute_interval(subformula, interval)
-        bound = max(BOUND_MIN, int(interval[1] * 1.5))
+        subformula = mtl.substitute_interval(subformula, interval)
+        bound = get_initial_bound(context, subformula)
         n_iterations += 1
     print(f"Total time: {total_elapsed:.2f} seconds")
     print(f"Iterations: {n_iterations}")
@@ -172,14 +168,115 @@ def main_spin(
         print(
             f"{util.interval_to_str(interval)} in {elapsed:.2f} seconds",
         )
-        subformula = substitute_interval(subformula, interval)
+        subformula = mtl.substitute_interval(subformula, interval)
+    print(f"Total time: {total_elapsed:.2f} seconds")
+    print(f"Iterations: {n_iterations}")
+
+
+def get_holes_bound(formula: mtl.Mtl, de_bruijns: list[list[int]]) -> int:
+    """Choose a BMC bound that covers the weakening of every subformula."""
+    return max(
+        get_initial_bound(
+            *analyse_cex.split_weakened_subformula(formula, de_bruijn),
+        )
+        for de_bruijn in de_bruijns
+    )
+
+
+def intervals_to_str(formula: mtl.Mtl, de_bruijns: list[list[int]]) -> str:
+    """Format the intervals of the subformulae at the given paths."""
+    intervals = []
+    for de_bruijn in de_bruijns:
+        _, subformula = ctx.split_formula(formula, de_bruijn)
+        assert isinstance(subformula, mtl.Temporal)
+        intervals.append(util.interval_to_str(subformula.interval))
+    return ", ".join(intervals)
+
+
+def main_holes(
+    model_checker: custom_args.ModelChecker,
+    model_file: Path,
+    mtl_str: str,
+    de_bruijns: list[list[int]],
+    show_markings: bool,
+    tradeoff: custom_args.Tradeoff,
+) -> None:
+    """Run iterative weakening of several subformulae at once, weakening
+    one of them for each counterexample of a round."""
+    formula = parser.parse_mtl(mtl_str)
+    multi_weaken.check_paths(de_bruijns)
+    n_iterations = 0
+    total_elapsed = 0.0
+    while True:
+        start_time = time.perf_counter()
+        bound = get_holes_bound(formula, de_bruijns)
+        if model_checker == custom_args.ModelChecker.NUXMV:
+            print(f"Bound {bound}: ", end="")
+        print(f"{intervals_to_str(formula, de_bruijns)} → ", end="")
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                if model_checker == custom_args.ModelChecker.NUXMV:
+                    intervals = nuxmv.analyse_holes(
+                        Path(tmpdir),
+                        model_file,
+                        formula,
+                        de_bruijns,
+                        bound,
+                        show_markings,
+                        tradeoff,
+                    )
+                else:
+                    intervals = spin.analyse_holes(
+                        Path(tmpdir),
+                        model_file,
+                        formula,
+                        de_bruijns,
+                        show_markings,
+                        tradeoff,
+                    )
+        except exceptions.PropertyValidError:
+            elapsed = time.perf_counter() - start_time
+            total_elapsed += elapsed
+            print(f"Final intervals in {elapsed:.2f} seconds")
+            break
+        except exceptions.NoWeakeningError:
+            elapsed = time.perf_counter() - start_time
+            total_elapsed += elapsed
+            print(f"{util.NO_WEAKENING_EXISTS_STR}")
+            break
+        formula = multi_weaken.substitute_intervals(
+            formula,
+            de_bruijns,
+            intervals,
+        )
+        elapsed = time.perf_counter() - start_time
+        total_elapsed += elapsed
+        print(
+            f"{intervals_to_str(formula, de_bruijns)} "
+            f"in {elapsed:.2f} seconds",
+        )
+        n_iterations += 1
     print(f"Total time: {total_elapsed:.2f} seconds")
     print(f"Iterations: {n_iterations}")
 
 
 if __name__ == "__main__":
     args = parse_args(sys.argv[1:])
-    if args.model_checker == custom_args.ModelChecker.NUXMV:
-        main_nuxmv(args.model, args.mtl, args.de_bruijn, args.show_markings)
+    if len(args.de_bruijn) > 1:
+        main_holes(
+            args.model_checker,
+            args.model,
+            args.mtl,
+            args.de_bruijn,
+            args.show_markings,
+            args.tradeoff,
+        )
+    elif args.model_checker == custom_args.ModelChecker.NUXMV:
+        main_nuxmv(
+            args.model,
+            args.mtl,
+            args.de_bruijn[0],
+            args.show_markings,
+        )
     else:
-        main_spin(args.model, args.mtl, args.de_bruijn, args.show_markings)
+        main_spin(args.model, args.mtl, args.de_bruijn[0], args.show_markings)
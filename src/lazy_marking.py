@@ -0,0 +1,217 @@
+"""Demand-driven trace markings, computed one cell at a time.
+
+Weakening only reads the positions reachable from the start of the trace
+through the context's intervals, and often stops at the first failure, so
+rather than evaluating every subformula at every position up front each
+(formula, position) cell is computed when first read and then memoised.
+"""
+
+from __future__ import annotations
+
+import typing
+from collections.abc import Generator
+
+from src import marking
+from src.logic import mtl as m
+
+Reads = Generator[tuple[m.Mtl, int], bool | int, bool | int]
+
+
+class LazyVarMarkings(marking.VarMarkings):
+    """
+    A view of one formula's markings that evaluates positions on demand.
+    Indexes beyond the length of the trace return True.
+    """
+
+    def __init__(  # pylint: disable=super-init-not-called
+        self,
+        markings: LazyMarking,
+        formula: m.Mtl,
+    ) -> None:
+        """Create a view of `formula` over a lazy marking."""
+        self.markings = markings
+        self.formula = formula
+
+    def __getitem__(self, i: int) -> bool | int:
+        """Return the marking at index i, defaulting to True out of range."""
+        if i >= len(self):
+            return True
+        return self.markings.get(self.formula, i)
+
+    def __len__(self) -> int:
+        """Return the finite number of trace positions."""
+        return len(self.markings.trace)
+
+    def __iter__(self) -> typing.Iterator[bool | int]:
+        """Iterate over marking values in order, evaluating each one."""
+        return (self[i] for i in range(len(self)))
+
+    def append(self, value: bool | int) -> None:  # noqa: ARG002
+        """Reject appends, as the values are derived from the trace."""
+        msg = "Cannot append to a lazy marking view"
+        raise TypeError(msg)
+
+    def memory_usage(self) -> int:
+        """Return zero, as evaluated cells are held by the lazy marking."""
+        return 0
+
+
+class LazyMarking(marking.Marking):
+    """Marking evaluator that only computes the cells that are read.
+
+    Each cell costs at most one scan of its operand's interval window, and
+    every cell it reads is memoised, so reading a handful of positions of a
+    long trace only evaluates the positions those windows reach.
+    """
+
+    def __init__(  # pylint: disable=super-init-not-called
+        self,
+        trace: marking.Trace,
+        _formula: m.Mtl,
+    ) -> None:
+        """Create an empty lazy marking of a formula over a trace."""
+        self.trace = trace
+        self.markings = {}
+        self.distance_index = {}
+        self.witness_index = {}
+        self.cells: dict[tuple[m.Mtl, int], bool | int] = {}
+
+    def get(self, f: m.Mtl, i: int) -> bool | int:
+        """Get the value of formula f at logical position i.
+
+        Each cell is evaluated by a generator that yields the subformula
+        and position of each cell it reads and is sent its value back. The
+        generators of the cells being evaluated are kept on an explicit
+        stack, so the depth of the formula is not bounded by the recursion
+        limit.
+        """
+        n = len(self.trace)
+        cells = self.cells
+        stack: list[tuple[tuple[m.Mtl, int], Reads]] = []
+        request = (f, i)
+        value: bool | int = True
+        while True:
+            g, k = request[0], self.trace.idx(request[1])
+            started = False
+            if k >= n:
+                value = True
+            elif (g, k) in cells:
+                value = cells[g, k]
+            elif isinstance(g, (m.Prop, m.TrueBool, m.FalseBool)):
+                value = cells[g, k] = self._atom(g, k)
+            else:
+                stack.append(((g, k), self._cell(g, k)))
+                started = True
+            while True:
+                if not stack:
+                    return value
+                key, reads = stack[-1]
+                try:
+                    request = next(reads) if started else reads.send(value)
+                except StopIteration as stop:
+                    stack.pop()
+                    value = cells[key] = stop.value
+                    started = False
+                else:
+                    break
+
+    def distance(self, f: m.Mtl, i: int, value: bool) -> int | None:
+        """Get the number of steps from logical position i to the next
+        position at which f is marked `value`, or None if there is none."""
+        j = self.trace.idx(i)
+        n = len(self.trace)
+        if j >= n:
+            return 0 if value else None
+        for d, k in enumerate(self.trace.indices(j, j + n + 1)):
+            if bool(self.get(f, k)) == value:
+                return d
+        return None
+
+    def with_interval(
+        self,
+        f: m.Temporal,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Return an on-demand view of the markings of f with its interval
+        replaced, rather than deriving them at every position from a
+        witness profile."""
+        return self[m.substitute_interval(f, interval)]
+
+    def _window(self, k: int, interval: m.Interval) -> typing.Iterable[int]:
+        """Concrete positions of the interval window starting from k,
+        clamped as in :meth:`marking.Marking._window_bounds`."""
+        n = len(self.trace)
+        a, b = interval
+        width = n if b is None else min(b - a, n)
+        return self.trace.indices(k + a, k + a + width + 1)
+
+    def _atom(self, f: m.Mtl, k: int) -> bool | int:
+        """Evaluate a proposition or boolean literal at concrete position k."""
+        if isinstance(f, m.TrueBool):
+            return True
+        if isinstance(f, m.FalseBool):
+            return False
+        assert isinstance(f, m.Prop)
+        column = self.trace.columns.get(f.name)
+        value = None if column is None else column[k]
+        if not isinstance(value, (bool, int)):
+            msg = f"Proposition '{f}' not found in markings. "
+            raise TypeError(msg)
+        return value
+
+    def _cell(self, f: m.Mtl, k: int) -> Reads:
+        """Evaluate compound formula f at concrete position k, yielding
+        each cell it reads."""
+        if isinstance(f, m.Not):
+            return not (yield f.operand, k)
+        if isinstance(f, m.And):
+            left = yield f.left, k
+            return left and (yield f.right, k)
+        if isinstance(f, m.Or):
+            left = yield f.left, k
+            return left or (yield f.right, k)
+        if isinstance(f, m.Implies):
+            left = yield f.left, k
+            return (not left) or (yield f.right, k)
+        if isinstance(f, m.Next):
+            operand, steps = m.next_chain(f)
+            return (yield operand, k + steps)
+        if isinstance(f, m.Eventually):
+            for j in self._window(k, f.interval):
+                if (yield f.operand, j):
+                    return True
+            return False
+        if isinstance(f, m.Always):
+            for j in self._window(k, f.interval):
+                if not (yield f.operand, j):
+                    return False
+            return True
+        if isinstance(f, m.Until):
+            for j in self._window(k, f.interval):
+                if (yield f.right, j):
+                    return True
+                if not (yield f.left, j):
+                    return False
+            return False
+        if isinstance(f, m.Release):
+            for j in self._window(k, f.interval):
+                if not (yield f.right, j):
+                    return False
+                if (yield f.left, j):
+                    return True
+            return False
+        msg = f"Unsupported MTL construct: {f}"
+        raise TypeError(msg)
+
+    def __getitem__(self, f: m.Mtl) -> marking.VarMarkings:
+        """Return an on-demand view of the markings of formula f."""
+        if f not in self.markings:
+            self.markings[f] = LazyVarMarkings(self, f)
+        return self.markings[f]
+
+    def __str__(self) -> str:
+        """Render every formula evaluated so far as a table, computing the
+        remaining positions of each."""
+        formulas = dict.fromkeys(f for f, _ in self.cells)
+        list_markings = {f: list(self[f]) for f in formulas}
+        return marking.markings_to_str(list_markings, self.trace.loop_start)
@@ -4,12 +4,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from src.logic import mtl
+from src.logic import hashcons, mtl
 
 
-class Ctx:
+class Ctx(hashcons.Node):
     """Base class for MTL contexts with a single substitution hole."""
 
+    __slots__ = ()
+
     def __str__(self) -> str:
         """Return the canonical textual form of this context."""
         return to_string(self)
@@ -19,19 +21,22 @@ class Ctx:
         return to_string(self)
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Hole(Ctx):
     """The distinguished hole position in a context."""
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Not(Ctx):
     """Context under logical negation."""
 
     operand: Ctx
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class AndLeft(Ctx):
     """Context in the left operand of conjunction."""
 
@@ -39,7 +44,8 @@ class AndLeft(Ctx):
     right: mtl.Mtl
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class AndRight(Ctx):
     """Context in the right operand of conjunction."""
 
@@ -47,7 +53,8 @@ class AndRight(Ctx):
     right: Ctx
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class OrLeft(Ctx):
     """Context in the left operand of disjunction."""
 
@@ -55,7 +62,8 @@ class OrLeft(Ctx):
     right: mtl.Mtl
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class OrRight(Ctx):
     """Context in the right operand of disjunction."""
 
@@ -63,7 +71,8 @@ class OrRight(Ctx):
     right: Ctx
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class ImpliesLeft(Ctx):
     """Context in the antecedent of implication."""
 
@@ -71,7 +80,8 @@ class ImpliesLeft(Ctx):
     right: mtl.Mtl
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class ImpliesRight(Ctx):
     """Context in the consequent of implication."""
 
@@ -79,14 +89,16 @@ class ImpliesRight(Ctx):
     right: Ctx
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Next(Ctx):
     """Context under next-time temporal operator."""
 
     operand: Ctx
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Eventually(Ctx):
     """Context under eventually temporal operator."""
 
@@ -94,7 +106,8 @@ class Eventually(Ctx):
     interval: mtl.Interval = (0, None)
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Always(Ctx):
     """Context under always temporal operator."""
 
@@ -102,7 +115,8 @@ class Always(Ctx):
     interval: mtl.Interval = (0, None)
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class UntilLeft(Ctx):
     """Context in the left operand of until."""
 
@@ -111,7 +125,8 @@ class UntilLeft(Ctx):
     interval: mtl.Interval = (0, None)
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class UntilRight(Ctx):
     """Context in the right operand of until."""
 
@@ -120,7 +135,8 @@ class UntilRight(Ctx):
     interval: mtl.Interval = (0, None)
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class ReleaseLeft(Ctx):
     """Context in the left operand of release."""
 
@@ -129,7 +145,8 @@ class ReleaseLeft(Ctx):
     interval: mtl.Interval = (0, None)
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class ReleaseRight(Ctx):
     """Context in the right operand of release."""
 
@@ -138,272 +155,258 @@ class ReleaseRight(Ctx):
     interval: mtl.Interval = (0, None)
 
 
-def substitute(c: Ctx, f: mtl.Mtl) -> mtl.Mtl:
-    """Fill the context hole with formula f and return the full formula."""
-    if isinstance(c, Hole):
-        return f
+def _child(c: Ctx) -> Ctx:
+    """Return the context under the outermost node of c, towards the hole."""
+    if isinstance(c, (Not, Next, Eventually, Always)):
+        return c.operand
+    if isinstance(c, (AndLeft, OrLeft, ImpliesLeft, UntilLeft, ReleaseLeft)):
+        return c.left
+    if isinstance(
+        c,
+        (AndRight, OrRight, ImpliesRight, UntilRight, ReleaseRight),
+    ):
+        return c.right
+    msg = f"Unsupported MTL context construct: {type(c).__name__}"
+    raise TypeError(msg)
+
+
+def hole_path(c: Ctx) -> list[Ctx]:
+    """Return the nodes on the path from the root of a context down to its
+    hole, outermost first and ending with the hole."""
+    path = [c]
+    while not isinstance(c, Hole):
+        c = _child(c)
+        path.append(c)
+    return path
+
+
+def _plug(c: Ctx, f: mtl.Mtl) -> mtl.Mtl:
+    """Return the formula of the outermost node of c with f in place of the
+    context under it."""
     if isinstance(c, Not):
-        return mtl.Not(substitute(c.operand, f))
+        return mtl.Not(f)
     if isinstance(c, AndLeft):
-        return mtl.And(substitute(c.left, f), c.right)
+        return mtl.And(f, c.right)
     if isinstance(c, AndRight):
-        return mtl.And(c.left, substitute(c.right, f))
+        return mtl.And(c.left, f)
     if isinstance(c, OrLeft):
-        return mtl.Or(substitute(c.left, f), c.right)
+        return mtl.Or(f, c.right)
     if isinstance(c, OrRight):
-        return mtl.Or(c.left, substitute(c.right, f))
+        return mtl.Or(c.left, f)
     if isinstance(c, ImpliesLeft):
-        return mtl.Implies(substitute(c.left, f), c.right)
+        return mtl.Implies(f, c.right)
     if isinstance(c, ImpliesRight):
-        return mtl.Implies(c.left, substitute(c.right, f))
+        return mtl.Implies(c.left, f)
     if isinstance(c, Next):
-        return mtl.Next(substitute(c.operand, f))
+        return mtl.Next(f)
     if isinstance(c, Eventually):
-        return mtl.Eventually(substitute(c.operand, f), c.interval)
+        return mtl.Eventually(f, c.interval)
     if isinstance(c, Always):
-        return mtl.Always(substitute(c.operand, f), c.interval)
+        return mtl.Always(f, c.interval)
     if isinstance(c, UntilLeft):
-        return mtl.Until(substitute(c.left, f), c.right, c.interval)
+        return mtl.Until(f, c.right, c.interval)
     if isinstance(c, UntilRight):
-        return mtl.Until(c.left, substitute(c.right, f), c.interval)
+        return mtl.Until(c.left, f, c.interval)
     if isinstance(c, ReleaseLeft):
-        return mtl.Release(substitute(c.left, f), c.right, c.interval)
+        return mtl.Release(f, c.right, c.interval)
     if isinstance(c, ReleaseRight):
-        return mtl.Release(c.left, substitute(c.right, f), c.interval)
-    msg = f"Unsupported MTL context construct: {c}"
+        return mtl.Release(c.left, f, c.interval)
+    msg = f"Unsupported MTL context construct: {type(c).__name__}"
     raise ValueError(msg)
 
 
-def to_string(c: Ctx) -> str:
-    """Render a context as textual MTL with an explicit hole marker."""
+def substitute(c: Ctx, f: mtl.Mtl) -> mtl.Mtl:
+    """Fill the context hole with formula f and return the full formula,
+    rebuilt from the hole up along the path to it."""
+    for node in reversed(hole_path(c)[:-1]):
+        f = _plug(node, f)
+    return f
+
+
+def side_formulas(c: Ctx) -> list[mtl.Mtl]:
+    """Return the formulae beside the path from the root of a context down
+    to its hole, outermost first."""
+    formulas: list[mtl.Mtl] = []
+    for node in hole_path(c):
+        if isinstance(
+            node,
+            (AndLeft, OrLeft, ImpliesLeft, UntilLeft, ReleaseLeft),
+        ):
+            formulas.append(node.right)
+        elif isinstance(
+            node,
+            (AndRight, OrRight, ImpliesRight, UntilRight, ReleaseRight),
+        ):
+            formulas.append(node.left)
+    return formulas
+
+
+def _layout(c: Ctx) -> tuple[str | Ctx | mtl.Mtl, ...]:
+    """Return the text of the outermost node of a context, interleaved with
+    its operands."""
     if isinstance(c, Hole):
-        return "[-]"
+        return ("[-]",)
     if isinstance(c, Not):
-        return f"!({to_string(c.operand)})"
-    if isinstance(c, AndLeft):
-        return f"({to_string(c.left)} & {mtl.to_string(c.right)})"
-    if isinstance(c, AndRight):
-        return f"({mtl.to_string(c.left)} & {to_string(c.right)})"
-    if isinstance(c, OrLeft):
-        return f"({to_string(c.left)} | {mtl.to_string(c.right)})"
-    if isinstance(c, OrRight):
-        return f"({mtl.to_string(c.left)} | {to_string(c.right)})"
-    if isinstance(c, ImpliesLeft):
-        return f"({to_string(c.left)} -> {mtl.to_string(c.right)})"
-    if isinstance(c, ImpliesRight):
-        return f"({mtl.to_string(c.left)} -> {to_string(c.right)})"
+        return "!(", c.operand, ")"
+    if isinstance(c, (AndLeft, AndRight)):
+        return "(", c.left, " & ", c.right, ")"
+    if isinstance(c, (OrLeft, OrRight)):
+        return "(", c.left, " | ", c.right, ")"
+    if isinstance(c, (ImpliesLeft, ImpliesRight)):
+        return "(", c.left, " -> ", c.right, ")"
     if isinstance(c, Eventually):
-        return f"F{mtl.fmt_interval(c.interval)} ({to_string(c.operand)})"
+        return f"F{mtl.fmt_interval(c.interval)} (", c.operand, ")"
     if isinstance(c, Always):
-        return f"G{mtl.fmt_interval(c.interval)} ({to_string(c.operand)})"
-    if isinstance(c, UntilLeft):
-        return (
-            f"({to_string(c.left)} "
-            f"U{mtl.fmt_interval(c.interval)} "
-            f"{mtl.to_string(c.right)})"
-        )
-    if isinstance(c, UntilRight):
-        return (
-            f"({mtl.to_string(c.left)} "
-            f"U{mtl.fmt_interval(c.interval)} "
-            f"{to_string(c.right)})"
-        )
-    if isinstance(c, ReleaseLeft):
-        return (
-            f"({to_string(c.left)} "
-            f"R{mtl.fmt_interval(c.interval)} "
-            f"{mtl.to_string(c.right)})"
-        )
-    if isinstance(c, ReleaseRight):
-        return (
-            f"({mtl.to_string(c.left)} "
-            f"R{mtl.fmt_interval(c.interval)} "
-            f"{to_string(c.right)})"
-        )
+        return f"G{mtl.fmt_interval(c.interval)} (", c.operand, ")"
+    if isinstance(c, (UntilLeft, UntilRight)):
+        return "(", c.left, f" U{mtl.fmt_interval(c.interval)} ", c.right, ")"
+    if isinstance(c, (ReleaseLeft, ReleaseRight)):
+        return "(", c.left, f" R{mtl.fmt_interval(c.interval)} ", c.right, ")"
     if isinstance(c, Next):
-        return f"X ({to_string(c.operand)})"
-    msg = f"Unsupported MTL context construct: {c}"
+        return "X (", c.operand, ")"
+    msg = f"Unsupported MTL context construct: {type(c).__name__}"
     raise ValueError(msg)
 
 
-def _split_formula_aux(
-    f: mtl.Mtl,
-    indices: list[int],
-    formula_idx: int,
-) -> tuple[Ctx, mtl.Mtl]:
-    """Split the formula `f` at the given De Bruijn indices into a
-    context and a formula. The context is the part of the formula
-    that is not affected by the weakening.
-    """
-    if formula_idx == len(indices):
-        return Hole(), f
+def to_string(c: Ctx) -> str:
+    """Render a context as textual MTL with an explicit hole marker, left to
+    right with an explicit stack of the text and nodes still to render."""
+    pieces: list[str] = []
+    stack: list[str | Ctx | mtl.Mtl] = [c]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+        elif isinstance(item, mtl.Mtl):
+            pieces.append(mtl.to_string(item))
+        else:
+            stack.extend(reversed(_layout(item)))
+    return "".join(pieces)
+
+
+def _select(f: mtl.Mtl, indices: list[int], formula_idx: int) -> mtl.Mtl:
+    """Return the operand of f that the De Bruijn index at `formula_idx`
+    selects."""
+    index = indices[formula_idx]
     if isinstance(f, mtl.Prop):
         raise mtl.DeBruijnIndexError(indices, formula_idx, f)
-    if isinstance(f, mtl.Not):
-        if indices[formula_idx] == 0:
-            ctx, subf = _split_formula_aux(f.operand, indices, formula_idx + 1)
-            return Not(ctx), subf
-        raise mtl.DeBruijnIndexError(indices, formula_idx, f)
-    if isinstance(f, mtl.And):
-        if indices[formula_idx] == 0:
-            ctx, subf = _split_formula_aux(f.left, indices, formula_idx + 1)
-            return AndLeft(ctx, f.right), subf
-        if indices[formula_idx] == 1:
-            ctx, subf = _split_formula_aux(f.right, indices, formula_idx + 1)
-            return AndRight(f.left, ctx), subf
+    if isinstance(f, (mtl.Not, mtl.Eventually, mtl.Always)):
+        if index == 0:
+            return f.operand
         raise mtl.DeBruijnIndexError(indices, formula_idx, f)
-    if isinstance(f, mtl.Or):
-        if indices[formula_idx] == 0:
-            ctx, subf = _split_formula_aux(f.left, indices, formula_idx + 1)
-            return OrLeft(ctx, f.right), subf
-        if indices[formula_idx] == 1:
-            ctx, subf = _split_formula_aux(f.right, indices, formula_idx + 1)
-            return OrRight(f.left, ctx), subf
-        raise mtl.DeBruijnIndexError(indices, formula_idx, f)
-    if isinstance(f, mtl.Implies):
-        if indices[formula_idx] == 0:
-            ctx, subf = _split_formula_aux(f.left, indices, formula_idx + 1)
-            return ImpliesLeft(ctx, f.right), subf
-        if indices[formula_idx] == 1:
-            ctx, subf = _split_formula_aux(f.right, indices, formula_idx + 1)
-            return ImpliesRight(f.left, ctx), subf
-        raise mtl.DeBruijnIndexError(indices, formula_idx, f)
-    if isinstance(f, mtl.Eventually):
-        if indices[formula_idx] == 0:
-            ctx, subf = _split_formula_aux(f.operand, indices, formula_idx + 1)
-            return Eventually(ctx, f.interval), subf
-        raise mtl.DeBruijnIndexError(indices, formula_idx, f)
-    if isinstance(f, mtl.Always):
-        if indices[formula_idx] == 0:
-            ctx, subf = _split_formula_aux(f.operand, indices, formula_idx + 1)
-            return Always(ctx, f.interval), subf
-        raise mtl.DeBruijnIndexError(indices, formula_idx, f)
-    if isinstance(f, mtl.Until):
-        if indices[formula_idx] == 0:
-            ctx, subf = _split_formula_aux(f.left, indices, formula_idx + 1)
-            return UntilLeft(ctx, f.right, f.interval), subf
-        if indices[formula_idx] == 1:
-            ctx, subf = _split_formula_aux(f.right, indices, formula_idx + 1)
-            return UntilRight(f.left, ctx, f.interval), subf
-        raise mtl.DeBruijnIndexError(indices, formula_idx, f)
-    if isinstance(f, mtl.Release):
-        if indices[formula_idx] == 0:
-            ctx, subf = _split_formula_aux(f.left, indices, formula_idx + 1)
-            return ReleaseLeft(ctx, f.right, f.interval), subf
-        if indices[formula_idx] == 1:
-            ctx, subf = _split_formula_aux(f.right, indices, formula_idx + 1)
-            return ReleaseRight(f.left, ctx, f.interval), subf
+    if isinstance(f, (mtl.And, mtl.Or, mtl.Implies, mtl.Until, mtl.Release)):
+        if index == 0:
+            return f.left
+        if index == 1:
+            return f.right
         raise mtl.DeBruijnIndexError(indices, formula_idx, f)
     msg = f"Unsupported MTL construct: {f}"
     raise ValueError(msg)
 
 
-def split_formula(formula: mtl.Mtl, indices: list[int]) -> tuple[Ctx, mtl.Mtl]:
-    """Split a formula into context and selected subformula by index path."""
-    return _split_formula_aux(formula, indices, 0)
+def _wrap(f: mtl.Mtl, index: int, c: Ctx) -> Ctx:
+    """Return the context node of f with c in place of the operand that
+    index selects."""
+    if isinstance(f, mtl.Not):
+        return Not(c)
+    if isinstance(f, mtl.Eventually):
+        return Eventually(c, f.interval)
+    if isinstance(f, mtl.Always):
+        return Always(c, f.interval)
+    if isinstance(f, mtl.And):
+        return AndLeft(c, f.right) if index == 0 else AndRight(f.left, c)
+    if isinstance(f, mtl.Or):
+        return OrLeft(c, f.right) if index == 0 else OrRight(f.left, c)
+    if isinstance(f, mtl.Implies):
+        return (
+            ImpliesLeft(c, f.right) if index == 0 else ImpliesRight(f.left, c)
+        )
+    if isinstance(f, mtl.Until):
+        if index == 0:
+            return UntilLeft(c, f.right, f.interval)
+        return UntilRight(f.left, c, f.interval)
+    assert isinstance(f, mtl.Release)
+    if index == 0:
+        return ReleaseLeft(c, f.right, f.interval)
+    return ReleaseRight(f.left, c, f.interval)
 
 
-def _partial_nnf_ctx_neg(c: Ctx) -> tuple[Ctx, bool]:
-    """Convert the negation of the context `c` to
-    partial negation normal form (PNNF)."""
+def split_formula(formula: mtl.Mtl, indices: list[int]) -> tuple[Ctx, mtl.Mtl]:
+    """Split a formula into context and selected subformula by index path.
 
-    if isinstance(c, Hole):
-        return c, False
+    The context is the part of the formula that is not affected by the
+    weakening. It is rebuilt from the hole up after walking down the path.
+    """
+    parents: list[mtl.Mtl] = []
+    f = formula
+    for formula_idx in range(len(indices)):
+        parents.append(f)
+        f = _select(f, indices, formula_idx)
+    c: Ctx = Hole()
+    for parent, index in zip(reversed(parents), reversed(indices), strict=True):
+        c = _wrap(parent, index, c)
+    return c, f
+
+
+def _partial_nnf_node(c: Ctx, child: Ctx, *, positive: bool) -> Ctx:
+    """Return the partial negation normal form of the outermost node of c,
+    under an even number of negations if `positive`, given that of the
+    context under it."""
     if isinstance(c, Not):
-        operand, polarity = partial_nnf_ctx(c.operand)
-        return operand, polarity
-    if isinstance(c, AndLeft):
-        left, polarity = _partial_nnf_ctx_neg(c.left)
-        return OrLeft(left, mtl.Not(c.right)), polarity
-    if isinstance(c, OrLeft):
-        left, polarity = _partial_nnf_ctx_neg(c.left)
-        return AndLeft(left, mtl.Not(c.right)), polarity
+        return child
+    if isinstance(c, Next):
+        return Next(child)
+    if isinstance(c, (Eventually, Always)):
+        dual = isinstance(c, Eventually) != positive
+        return (Always if dual else Eventually)(child, c.interval)
+    if isinstance(c, (AndLeft, OrLeft)):
+        conjunction = isinstance(c, AndLeft) == positive
+        right = c.right if positive else mtl.Not(c.right)
+        return (AndLeft if conjunction else OrLeft)(child, right)
+    if isinstance(c, (AndRight, OrRight)):
+        conjunction = isinstance(c, AndRight) == positive
+        left = c.left if positive else mtl.Not(c.left)
+        return (AndRight if conjunction else OrRight)(left, child)
     if isinstance(c, ImpliesLeft):
-        left, polarity = partial_nnf_ctx(c.left)
-        return AndLeft(left, mtl.Not(c.right)), polarity
-    if isinstance(c, UntilLeft):
-        left, polarity = _partial_nnf_ctx_neg(c.left)
-        return ReleaseLeft(left, mtl.Not(c.right), c.interval), polarity
-    if isinstance(c, ReleaseLeft):
-        left, polarity = _partial_nnf_ctx_neg(c.left)
-        return UntilLeft(left, mtl.Not(c.right), c.interval), polarity
-    if isinstance(c, AndRight):
-        right, polarity = _partial_nnf_ctx_neg(c.right)
-        return OrRight(mtl.Not(c.left), right), polarity
-    if isinstance(c, OrRight):
-        right, polarity = _partial_nnf_ctx_neg(c.right)
-        return AndRight(mtl.Not(c.left), right), polarity
+        if positive:
+            return OrLeft(child, c.right)
+        return AndLeft(child, mtl.Not(c.right))
     if isinstance(c, ImpliesRight):
-        right, polarity = _partial_nnf_ctx_neg(c.right)
-        return AndRight(c.left, right), polarity
-    if isinstance(c, UntilRight):
-        right, polarity = _partial_nnf_ctx_neg(c.right)
-        return ReleaseRight(mtl.Not(c.left), right, c.interval), polarity
-    if isinstance(c, ReleaseRight):
-        right, polarity = _partial_nnf_ctx_neg(c.right)
-        return UntilRight(mtl.Not(c.left), right, c.interval), polarity
-    if isinstance(c, Next):
-        operand, polarity = _partial_nnf_ctx_neg(c.operand)
-        return Next(operand), polarity
-    if isinstance(c, Eventually):
-        operand, polarity = _partial_nnf_ctx_neg(c.operand)
-        return Always(operand, c.interval), polarity
-    if isinstance(c, Always):
-        operand, polarity = _partial_nnf_ctx_neg(c.operand)
-        return Eventually(operand, c.interval), polarity
-    msg = f"Unsupported MTL context construct: {c}"
+        if positive:
+            return OrRight(mtl.Not(c.left), child)
+        return AndRight(c.left, child)
+    if isinstance(c, (UntilLeft, ReleaseLeft)):
+        until = isinstance(c, UntilLeft) == positive
+        right = c.right if positive else mtl.Not(c.right)
+        return (UntilLeft if until else ReleaseLeft)(child, right, c.interval)
+    if isinstance(c, (UntilRight, ReleaseRight)):
+        until = isinstance(c, UntilRight) == positive
+        left = c.left if positive else mtl.Not(c.left)
+        return (UntilRight if until else ReleaseRight)(left, child, c.interval)
+    msg = f"Unsupported MTL context construct: {type(c).__name__}"
     raise ValueError(msg)
 
 
 def partial_nnf_ctx(c: Ctx) -> tuple[Ctx, bool]:
-    """Convert context c to partial negation normal form."""
+    """Convert context c to partial negation normal form.
 
-    if isinstance(c, Hole):
-        return c, True
-    if isinstance(c, Not):
-        operand, polarity = _partial_nnf_ctx_neg(c.operand)
-        return operand, polarity
-    if isinstance(c, AndLeft):
-        left, polarity = partial_nnf_ctx(c.left)
-        return AndLeft(left, c.right), polarity
-    if isinstance(c, OrLeft):
-        left, polarity = partial_nnf_ctx(c.left)
-        return OrLeft(left, c.right), polarity
-    if isinstance(c, ImpliesLeft):
-        left, polarity = _partial_nnf_ctx_neg(c.left)
-        return OrLeft(left, c.right), polarity
-    if isinstance(c, UntilLeft):
-        left, polarity = partial_nnf_ctx(c.left)
-        return UntilLeft(left, c.right, c.interval), polarity
-    if isinstance(c, ReleaseLeft):
-        left, polarity = partial_nnf_ctx(c.left)
-        return ReleaseLeft(left, c.right, c.interval), polarity
-    if isinstance(c, AndRight):
-        right, polarity = partial_nnf_ctx(c.right)
-        return AndRight(c.left, right), polarity
-    if isinstance(c, OrRight):
-        right, polarity = partial_nnf_ctx(c.right)
-        return OrRight(c.left, right), polarity
-    if isinstance(c, ImpliesRight):
-        right, polarity = partial_nnf_ctx(c.right)
-        return OrRight(mtl.Not(c.left), right), polarity
-    if isinstance(c, UntilRight):
-        right, polarity = partial_nnf_ctx(c.right)
-        return UntilRight(c.left, right, c.interval), polarity
-    if isinstance(c, ReleaseRight):
-        right, polarity = partial_nnf_ctx(c.right)
-        return ReleaseRight(c.left, right, c.interval), polarity
-    if isinstance(c, Next):
-        operand, polarity = partial_nnf_ctx(c.operand)
-        return Next(operand), polarity
-    if isinstance(c, Eventually):
-        operand, polarity = partial_nnf_ctx(c.operand)
-        return Eventually(operand, c.interval), polarity
-    if isinstance(c, Always):
-        operand, polarity = partial_nnf_ctx(c.operand)
-        return Always(operand, c.interval), polarity
-    msg = f"Unsupported MTL context construct: {c}"
-    raise ValueError(msg)
+    The polarity of each node is found on the way down to the hole, where
+    negations and antecedents flip it, and the context is rebuilt on the
+    way back up. The returned polarity is that of the hole.
+    """
+    path = hole_path(c)
+    polarities = [True]
+    for node in path[:-1]:
+        flips = isinstance(node, (Not, ImpliesLeft))
+        polarities.append(polarities[-1] != flips)
+    result: Ctx = Hole()
+    for node, positive in zip(
+        reversed(path[:-1]),
+        reversed(polarities[:-1]),
+        strict=True,
+    ):
+        result = _partial_nnf_node(node, result, positive=positive)
+    return result, polarities[-1]
 
 
 def partial_nnf(
@@ -432,18 +435,38 @@ def partial_nnf(
     )
 
 
+def horizon(c: Ctx) -> int | None:
+    """Return how many steps past a position the formula in the hole of c
+    can be evaluated from there, or None if there is no bound."""
+    total = 0
+    for node in hole_path(c):
+        if isinstance(node, Next):
+            total += 1
+        elif isinstance(
+            node,
+            (
+                Eventually,
+                Always,
+                UntilLeft,
+                UntilRight,
+                ReleaseLeft,
+                ReleaseRight,
+            ),
+        ):
+            if node.interval[1] is None:
+                return None
+            total += node.interval[1]
+    return total
+
+
 def get_de_bruijn(c: Ctx) -> list[int]:
     """Recover the index path that reaches the hole in context c."""
-    if isinstance(c, Hole):
-        return []
-    if isinstance(c, (Not, Next, Eventually, Always)):
-        return [0, *get_de_bruijn(c.operand)]
-    if isinstance(c, (AndLeft, OrLeft, ImpliesLeft, UntilLeft, ReleaseLeft)):
-        return [0, *get_de_bruijn(c.left)]
-    if isinstance(
-        c,
-        (AndRight, OrRight, ImpliesRight, UntilRight, ReleaseRight),
-    ):
-        return [1, *get_de_bruijn(c.right)]
-    msg = f"Unsupported MTL context construct: {c}"
-    raise ValueError(msg)
+    return [
+        int(
+            isinstance(
+                node,
+                (AndRight, OrRight, ImpliesRight, UntilRight, ReleaseRight),
+            ),
+        )
+        for node in hole_path(c)[:-1]
+    ]
@@ -0,0 +1,107 @@
+"""Hash-consing of immutable formula AST nodes.
+
+Structurally equal nodes are interned as a single object, so equality is
+an identity check, hashing is a cached lookup, and identical subtrees are
+shared in memory rather than duplicated.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import typing
+import weakref
+
+NodeT = typing.TypeVar("NodeT", bound="Node")
+
+_FIELD_NAMES: dict[type[Node], tuple[str, ...]] = {}
+
+
+class Node:
+    """Base class of hash-consed AST nodes with a cached hash and size."""
+
+    __slots__ = ("__weakref__", "_hash", "_size")
+
+    _hash: int
+    _size: int
+
+    @property
+    def size(self) -> int:
+        """Return the number of nodes in the tree rooted at this node."""
+        return self._size
+
+    def __hash__(self) -> int:
+        """Return the hash cached when the node was interned."""
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        """Compare nodes, by identity unless one escaped interning."""
+        if self is other:
+            return True
+        if type(self) is not type(other):
+            return NotImplemented
+        assert isinstance(other, Node)
+        return self._hash == other._hash and _fields(self) == _fields(other)
+
+    def __reduce__(self) -> tuple[type[Node], tuple[object, ...]]:
+        """Rebuild the node through its constructor, so that copies and
+        unpickled nodes are interned too."""
+        return type(self), _fields(self)
+
+
+def _fields(node: Node) -> tuple[object, ...]:
+    """Return the dataclass field values of a node in declaration order."""
+    return tuple(getattr(node, name) for name in _FIELD_NAMES[type(node)])
+
+
+def _forget(
+    table: dict[tuple[object, ...], weakref.ref[NodeT]],
+    key: tuple[object, ...],
+    ref: weakref.ref[NodeT],
+) -> None:
+    """Drop a dead node from its intern table, unless since replaced."""
+    if table.get(key) is ref:
+        del table[key]
+
+
+def hash_consed(cls: type[NodeT]) -> type[NodeT]:
+    """Intern every instance of a frozen dataclass node class.
+
+    Must be applied above `@dataclass`. Construction looks the node's field
+    values up in a table of weak references to live nodes and returns the
+    existing node when there is one, only building a new node otherwise.
+    """
+    table: dict[tuple[object, ...], weakref.ref[NodeT]] = {}
+    assert dataclasses.is_dataclass(cls)
+    init = cls.__init__
+    fields = dataclasses.fields(cls)
+    _FIELD_NAMES[cls] = tuple(f.name for f in fields)
+    defaults = tuple(f.default for f in fields)
+    required = sum(f.default is dataclasses.MISSING for f in fields)
+
+    def new(klass: type[NodeT], *args: object, **kwargs: object) -> NodeT:
+        if kwargs or len(args) < required:
+            node = object.__new__(klass)
+            init(node, *args, **kwargs)
+            key = _fields(node)
+        else:
+            key = args + defaults[len(args) :]
+        ref = table.get(key)
+        existing = None if ref is None else ref()
+        if existing is not None:
+            return existing
+        node = object.__new__(klass)
+        init(node, *key)
+        size = 1 + sum(v.size for v in key if isinstance(v, Node))
+        object.__setattr__(node, "_hash", hash((klass.__name__, key)))
+        object.__setattr__(node, "_size", size)
+        table[key] = weakref.ref(node, lambda r: _forget(table, key, r))
+        return node
+
+    def initialised(_self: NodeT, *_args: object, **_kwargs: object) -> None:
+        """Skip `__init__`, which already ran before interning."""
+
+    cls.__new__ = staticmethod(new)
+    cls.__init__ = initialised
+    cls.__hash__ = Node.__hash__
+    cls.__eq__ = Node.__eq__
+    return cls
@@ -2,58 +2,68 @@
 
 from dataclasses import dataclass
 
+from src.logic import hashcons
 
-@dataclass(frozen=True, order=True)
-class Ltl:
+
+@dataclass(frozen=True, order=True, slots=True)
+class Ltl(hashcons.Node):
     """Base class for all LTL abstract syntax tree nodes."""
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class TrueBool(Ltl):
     """LTL boolean literal true."""
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class FalseBool(Ltl):
     """LTL boolean literal false."""
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class Prop(Ltl):
     """Atomic proposition node."""
 
     name: str
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class Not(Ltl):
     """Unary logical negation node."""
 
     operand: Ltl
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class Next(Ltl):
     """Next-time temporal operator node."""
 
     operand: Ltl
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class Eventually(Ltl):
     """Eventually temporal operator node."""
 
     operand: Ltl
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class Always(Ltl):
     """Always temporal operator node."""
 
     operand: Ltl
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class And(Ltl):
     """Binary logical conjunction node."""
 
@@ -61,7 +71,8 @@ class And(Ltl):
     right: Ltl
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class Or(Ltl):
     """Binary logical disjunction node."""
 
@@ -69,7 +80,8 @@ class Or(Ltl):
     right: Ltl
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class Implies(Ltl):
     """Binary logical implication node."""
 
@@ -77,7 +89,8 @@ class Implies(Ltl):
     right: Ltl
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class Until(Ltl):
     """Until temporal operator node."""
 
@@ -85,7 +98,8 @@ class Until(Ltl):
     right: Ltl
 
 
-@dataclass(frozen=True)
+@hashcons.hash_consed
+@dataclass(frozen=True, slots=True)
 class Release(Ltl):
     """Release temporal operator node."""
 
@@ -93,64 +107,78 @@ class Release(Ltl):
     right: Ltl
 
 
-def to_nuxmv(formula: Ltl) -> str:
-    """Render an LTL AST in NuXmv syntax."""
-    if isinstance(formula, TrueBool):
-        return "TRUE"
-    if isinstance(formula, FalseBool):
-        return "FALSE"
+_NUXMV = {
+    TrueBool: "TRUE",
+    FalseBool: "FALSE",
+    Not: "!",
+    Next: "X",
+    Eventually: "F",
+    Always: "G",
+    And: "&",
+    Or: "|",
+    Implies: "->",
+    Until: "U",
+    Release: "R",
+}
+
+_SPIN = {
+    TrueBool: "true",
+    FalseBool: "false",
+    Not: "!",
+    Next: "X",
+    Eventually: "<>",
+    Always: "[]",
+    And: "&&",
+    Or: "||",
+    Implies: "->",
+    Until: "U",
+    Release: "V",
+}
+
+
+def _layout(
+    formula: Ltl,
+    symbols: dict[type[Ltl], str],
+) -> tuple[str | Ltl, ...]:
+    """Return the text of one LTL node, interleaved with its operands."""
     if isinstance(formula, Prop):
-        return formula.name
+        return (formula.name,)
+    if type(formula) not in symbols:
+        msg = f"Unsupported LTL construct: {formula}"
+        raise ValueError(msg)
+    symbol = symbols[type(formula)]
+    if isinstance(formula, (TrueBool, FalseBool)):
+        return (symbol,)
     if isinstance(formula, Not):
-        return f"!({to_nuxmv(formula.operand)})"
-    if isinstance(formula, Next):
-        return f"X ({to_nuxmv(formula.operand)})"
-    if isinstance(formula, Eventually):
-        return f"F ({to_nuxmv(formula.operand)})"
-    if isinstance(formula, Always):
-        return f"G ({to_nuxmv(formula.operand)})"
-    if isinstance(formula, And):
-        return f"({to_nuxmv(formula.left)} & {to_nuxmv(formula.right)})"
-    if isinstance(formula, Or):
-        return f"({to_nuxmv(formula.left)} | {to_nuxmv(formula.right)})"
-    if isinstance(formula, Implies):
-        return f"({to_nuxmv(formula.left)} -> {to_nuxmv(formula.right)})"
-    if isinstance(formula, Until):
-        return f"({to_nuxmv(formula.left)} U {to_nuxmv(formula.right)})"
-    if isinstance(formula, Release):
-        return f"({to_nuxmv(formula.left)} R {to_nuxmv(formula.right)})"
-    msg = f"Unsupported LTL construct: {formula}"
-    raise ValueError(msg)
+        return f"{symbol}(", formula.operand, ")"
+    if isinstance(formula, (Next, Eventually, Always)):
+        return f"{symbol} (", formula.operand, ")"
+    assert isinstance(formula, (And, Or, Implies, Until, Release))
+    return "(", formula.left, f" {symbol} ", formula.right, ")"
+
+
+def _render(formula: Ltl, symbols: dict[type[Ltl], str]) -> str:
+    """Render an LTL AST with the given operator symbols, left to right with
+    an explicit stack of the text and subformulae still to render."""
+    pieces: list[str] = []
+    stack: list[str | Ltl] = [formula]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+        else:
+            stack.extend(reversed(_layout(item, symbols)))
+    return "".join(pieces)
+
+
+def to_nuxmv(formula: Ltl) -> str:
+    """Render an LTL AST in NuXmv syntax."""
+    return _render(formula, _NUXMV)
 
 
 def to_spin(formula: Ltl) -> str:
     """Render an LTL AST in SPIN/Promela syntax."""
-    if isinstance(formula, TrueBool):
-        return "true"
-    if isinstance(formula, FalseBool):
-        return "false"
-    if isinstance(formula, Prop):
-        return formula.name
-    if isinstance(formula, Not):
-        return f"!({to_spin(formula.operand)})"
-    if isinstance(formula, Next):
-        return f"X ({to_spin(formula.operand)})"
-    if isinstance(formula, Eventually):
-        return f"<> ({to_spin(formula.operand)})"
-    if isinstance(formula, Always):
-        return f"[] ({to_spin(formula.operand)})"
-    if isinstance(formula, And):
-        return f"({to_spin(formula.left)} && {to_spin(formula.right)})"
-    if isinstance(formula, Or):
-        return f"({to_spin(formula.left)} || {to_spin(formula.right)})"
-    if isinstance(formula, Implies):
-        return f"({to_spin(formula.left)} -> {to_spin(formula.right)})"
-    if isinstance(formula, Until):
-        return f"({to_spin(formula.left)} U {to_spin(formula.right)})"
-    if isinstance(formula, Release):
-        return f"({to_spin(formula.left)} V {to_spin(formula.right)})"
-    msg = f"Unsupported LTL construct: {formula}"
-    raise ValueError(msg)
+    return _render(formula, _SPIN)
 
 
 def to_string(formula: Ltl) -> str:
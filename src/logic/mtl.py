@@ -2,13 +2,21 @@
 
 from dataclasses import dataclass
 
-from src.logic import ltl
+from src.logic import hashcons, ltl
 
 Interval = tuple[int, int | None]
 
 
-class Mtl:
-    """Base class for all MTL abstract syntax tree nodes."""
+class Mtl(hashcons.Node):
+    """Base class for all MTL abstract syntax tree nodes.
+
+    The evaluation plan of a node is stored on it in `plan` once compiled,
+    so that it lives exactly as long as the node.
+    """
+
+    __slots__ = ("plan",)
+
+    plan: object
 
     def __str__(self) -> str:
         """Return the canonical textual form of this MTL formula."""
@@ -19,31 +27,36 @@ class Mtl:
         return to_string(self)
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class TrueBool(Mtl):
     """MTL boolean literal true."""
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class FalseBool(Mtl):
     """MTL boolean literal false."""
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Prop(Mtl):
     """Atomic proposition node."""
 
     name: str
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Not(Mtl):
     """Unary logical negation node."""
 
     operand: Mtl
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class And(Mtl):
     """Binary logical conjunction node."""
 
@@ -51,7 +64,8 @@ class And(Mtl):
     right: Mtl
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Or(Mtl):
     """Binary logical disjunction node."""
 
@@ -59,7 +73,8 @@ class Or(Mtl):
     right: Mtl
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Implies(Mtl):
     """Binary logical implication node."""
 
@@ -67,14 +82,16 @@ class Implies(Mtl):
     right: Mtl
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Next(Mtl):
     """Next-time temporal operator node."""
 
     operand: Mtl
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Eventually(Mtl):
     """Bounded or unbounded eventually temporal operator node."""
 
@@ -82,7 +99,8 @@ class Eventually(Mtl):
     interval: Interval = (0, None)
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Always(Mtl):
     """Bounded or unbounded always temporal operator node."""
 
@@ -90,7 +108,8 @@ class Always(Mtl):
     interval: Interval = (0, None)
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Until(Mtl):
     """Bounded or unbounded until temporal operator node."""
 
@@ -99,7 +118,8 @@ class Until(Mtl):
     interval: Interval = (0, None)
 
 
-@dataclass(frozen=True, order=True, repr=False)
+@hashcons.hash_consed
+@dataclass(frozen=True, order=True, repr=False, slots=True)
 class Release(Mtl):
     """Bounded or unbounded release temporal operator node."""
 
@@ -111,10 +131,112 @@ class Release(Mtl):
 Temporal = Eventually | Always | Until | Release
 
 
-def _mtl_to_ltl_eventually(formula: Eventually) -> ltl.Ltl:
-    """Translate a bounded/unbounded eventually node into equivalent LTL."""
+def substitute_interval(
+    formula: Temporal,
+    interval: Interval,
+) -> Temporal:
+    """Return a temporal formula with the same shape and a new interval."""
+    if isinstance(formula, Always):
+        return Always(formula.operand, interval)
+    if isinstance(formula, Eventually):
+        return Eventually(formula.operand, interval)
+    if isinstance(formula, Until):
+        return Until(formula.left, formula.right, interval)
+    if isinstance(formula, Release):
+        return Release(formula.left, formula.right, interval)
+    msg = f"Formula '{formula}' must be temporal"
+    raise ValueError(msg)
+
+
+def operands(formula: Mtl) -> tuple[Mtl, ...]:
+    """Return the direct subformulae of formula."""
+    if isinstance(formula, (Not, Next, Eventually, Always)):
+        return (formula.operand,)
+    if isinstance(formula, (And, Or, Implies, Until, Release)):
+        return (formula.left, formula.right)
+    return ()
+
+
+def post_order(formula: Mtl) -> list[Mtl]:
+    """Return the distinct subformulae of formula, children first, found
+    with an explicit stack rather than recursion."""
+    order: dict[Mtl, None] = {}
+    stack: list[tuple[Mtl, bool]] = [(formula, False)]
+    while stack:
+        f, expanded = stack.pop()
+        if f in order:
+            continue
+        if expanded:
+            order[f] = None
+            continue
+        stack.append((f, True))
+        stack.extend((g, False) for g in reversed(operands(f)))
+    return list(order)
+
+
+def next_chain(formula: Next) -> tuple[Mtl, int]:
+    """Split a chain of k nested Next operators into the formula they
+    apply to and k."""
+    operand: Mtl = formula
+    steps = 0
+    while isinstance(operand, Next):
+        operand = operand.operand
+        steps += 1
+    return operand, steps
+
+
+def reach(formula: Mtl) -> int | None:
+    """Return how many steps past a position formula reads its operands,
+    or None if its interval is unbounded."""
+    if isinstance(formula, Next):
+        return 1
+    if isinstance(formula, (Eventually, Always, Until, Release)):
+        return formula.interval[1]
+    return 0
+
+
+def horizons(formula: Mtl) -> dict[Mtl, int | None]:
+    """Return the horizon of each distinct subformula of formula: how many
+    steps past a position its truth there depends on, or None if it
+    depends on arbitrarily distant states."""
+    result: dict[Mtl, int | None] = {}
+    for f in post_order(formula):
+        own = reach(f)
+        inner = [result[g] for g in operands(f)]
+        result[f] = (
+            None
+            if own is None or None in inner
+            else own + max((h for h in inner if h is not None), default=0)
+        )
+    return result
+
+
+def props(formula: Mtl) -> frozenset[str]:
+    """Return the names of the propositions that formula mentions."""
+    names: set[str] = set()
+    seen: set[Mtl] = set()
+    stack = [formula]
+    while stack:
+        f = stack.pop()
+        if f in seen:
+            continue
+        seen.add(f)
+        if isinstance(f, Prop):
+            names.add(f.name)
+        stack.extend(operands(f))
+    return frozenset(names)
+
+
+def horizon(formula: Mtl) -> int | None:
+    """Return how many steps past a position the truth of formula there
+    depends on, or None if it depends on arbitrarily distant states."""
+    return horizons(formula)[formula]
+
+
+def _mtl_to_ltl_eventually(formula: Eventually, subf: ltl.Ltl) -> ltl.Ltl:
+    """Translate a bounded/unbounded eventually node into equivalent LTL,
+    given the translation of its operand."""
     a, b = formula.interval
-    subf = mtl_to_ltl(formula.operand)
     out = subf
     if b is None:
         out = ltl.Eventually(subf)
@@ -126,10 +248,10 @@ def _mtl_to_ltl_eventually(formula: Eventually) -> ltl.Ltl:
     return out
 
 
-def _mtl_to_ltl_always(formula: Always) -> ltl.Ltl:
-    """Translate a bounded/unbounded always node into equivalent LTL."""
+def _mtl_to_ltl_always(formula: Always, subf: ltl.Ltl) -> ltl.Ltl:
+    """Translate a bounded/unbounded always node into equivalent LTL,
+    given the translation of its operand."""
     a, b = formula.interval
-    subf = mtl_to_ltl(formula.operand)
     out = subf
     if b is None:
         out = ltl.Always(subf)
@@ -141,11 +263,14 @@ def _mtl_to_ltl_always(formula: Always) -> ltl.Ltl:
     return out
 
 
-def _mtl_to_ltl_until(formula: Until) -> ltl.Ltl:
-    """Translate a bounded/unbounded until node into equivalent LTL."""
+def _mtl_to_ltl_until(
+    formula: Until,
+    left: ltl.Ltl,
+    right: ltl.Ltl,
+) -> ltl.Ltl:
+    """Translate a bounded/unbounded until node into equivalent LTL, given
+    the translations of its operands."""
     a, b = formula.interval
-    left = mtl_to_ltl(formula.left)
-    right = mtl_to_ltl(formula.right)
     if b is None:
         return apply_next_k(ltl.Until(left, right), a)
     terms = []
@@ -157,11 +282,14 @@ def _mtl_to_ltl_until(formula: Until) -> ltl.Ltl:
     return apply_next_k(make_disjunction(terms), a)
 
 
-def _mtl_to_ltl_release(formula: Release) -> ltl.Ltl:
-    """Translate a bounded/unbounded release node into equivalent LTL."""
+def _mtl_to_ltl_release(
+    formula: Release,
+    left: ltl.Ltl,
+    right: ltl.Ltl,
+) -> ltl.Ltl:
+    """Translate a bounded/unbounded release node into equivalent LTL,
+    given the translations of its operands."""
     a, b = formula.interval
-    left = mtl_to_ltl(formula.left)
-    right = mtl_to_ltl(formula.right)
     if b is None:
         return apply_next_k(ltl.Release(left, right), a)
     out = right
@@ -176,8 +304,9 @@ def _mtl_to_ltl_release(formula: Release) -> ltl.Ltl:
     return apply_next_k(make_disjunction(terms), a)
 
 
-def mtl_to_ltl(formula: Mtl) -> ltl.Ltl:
-    """Translate an MTL AST into an equivalent LTL AST."""
+def _mtl_to_ltl_node(formula: Mtl, args: tuple[ltl.Ltl, ...]) -> ltl.Ltl:
+    """Translate one MTL node into LTL, given the translations of its
+    operands."""
     if isinstance(formula, TrueBool):
         return ltl.TrueBool()
     if isinstance(formula, FalseBool):
@@ -185,27 +314,37 @@ def mtl_to_ltl(formula: Mtl) -> ltl.Ltl:
     if isinstance(formula, Prop):
         return ltl.Prop(formula.name)
     if isinstance(formula, Not):
-        return ltl.Not(mtl_to_ltl(formula.operand))
+        return ltl.Not(*args)
     if isinstance(formula, And):
-        return ltl.And(mtl_to_ltl(formula.left), mtl_to_ltl(formula.right))
+        return ltl.And(*args)
     if isinstance(formula, Or):
-        return ltl.Or(mtl_to_ltl(formula.left), mtl_to_ltl(formula.right))
+        return ltl.Or(*args)
     if isinstance(formula, Implies):
-        return ltl.Implies(mtl_to_ltl(formula.left), mtl_to_ltl(formula.right))
+        return ltl.Implies(*args)
     if isinstance(formula, Eventually):
-        return _mtl_to_ltl_eventually(formula)
+        return _mtl_to_ltl_eventually(formula, *args)
     if isinstance(formula, Always):
-        return _mtl_to_ltl_always(formula)
+        return _mtl_to_ltl_always(formula, *args)
     if isinstance(formula, Until):
-        return _mtl_to_ltl_until(formula)
+        return _mtl_to_ltl_until(formula, *args)
     if isinstance(formula, Release):
-        return _mtl_to_ltl_release(formula)
+        return _mtl_to_ltl_release(formula, *args)
     if isinstance(formula, Next):
-        return ltl.Next(mtl_to_ltl(formula.operand))
+        return ltl.Next(*args)
     msg = "Unsupported MTL construct"
     raise TypeError(msg)
 
 
+def mtl_to_ltl(formula: Mtl) -> ltl.Ltl:
+    """Translate an MTL AST into an equivalent LTL AST, children first, so
+    that each distinct subformula is translated once and the depth of the
+    formula is not bounded by the recursion limit."""
+    result: dict[Mtl, ltl.Ltl] = {}
+    for f in post_order(formula):
+        result[f] = _mtl_to_ltl_node(f, tuple(result[g] for g in operands(f)))
+    return result[formula]
+
+
 def apply_next_k(formula: ltl.Ltl, k: int) -> ltl.Ltl:
     """Prefix an LTL formula with k nested next operators."""
     for _ in range(k):
@@ -250,43 +389,47 @@ def fmt_interval(interval: Interval) -> str:
     return f"[{low}, {high}]"
 
 
-def to_string(formula: Mtl) -> str:
-    """Render an MTL AST as canonical textual syntax."""
+def _layout(formula: Mtl) -> tuple[str | Mtl, ...]:
+    """Return the text of one MTL node, interleaved with its operands."""
     if isinstance(formula, TrueBool):
-        return "TRUE"
+        return ("TRUE",)
     if isinstance(formula, FalseBool):
-        return "FALSE"
+        return ("FALSE",)
     if isinstance(formula, Prop):
-        return formula.name
+        return (formula.name,)
     if isinstance(formula, Not):
-        return f"!({to_string(formula.operand)})"
+        return "!(", formula.operand, ")"
     if isinstance(formula, And):
-        return f"({to_string(formula.left)} & {to_string(formula.right)})"
+        return "(", formula.left, " & ", formula.right, ")"
     if isinstance(formula, Or):
-        return f"({to_string(formula.left)} | {to_string(formula.right)})"
+        return "(", formula.left, " | ", formula.right, ")"
     if isinstance(formula, Implies):
-        return f"({to_string(formula.left)} -> {to_string(formula.right)})"
+        return "(", formula.left, " -> ", formula.right, ")"
     if isinstance(formula, Eventually):
-        return (
-            f"F{fmt_interval(formula.interval)} ({to_string(formula.operand)})"
-        )
+        return f"F{fmt_interval(formula.interval)} (", formula.operand, ")"
     if isinstance(formula, Always):
-        return (
-            f"G{fmt_interval(formula.interval)} ({to_string(formula.operand)})"
-        )
+        return f"G{fmt_interval(formula.interval)} (", formula.operand, ")"
     if isinstance(formula, Until):
-        return (
-            f"({to_string(formula.left)} "
-            f"U{fmt_interval(formula.interval)} "
-            f"{to_string(formula.right)})"
-        )
+        op = f" U{fmt_interval(formula.interval)} "
+        return "(", formula.left, op, formula.right, ")"
     if isinstance(formula, Release):
-        return (
-            f"({to_string(formula.left)} "
-            f"R{fmt_interval(formula.interval)} "
-            f"{to_string(formula.right)})"
-        )
+        op = f" R{fmt_interval(formula.interval)} "
+        return "(", formula.left, op, formula.right, ")"
     if isinstance(formula, Next):
-        return f"X ({to_string(formula.operand)})"
-    msg = f"Unsupported MTL construct: {formula}"
+        return "X (", formula.operand, ")"
+    msg = f"Unsupported MTL construct: {type(formula).__name__}"
     raise TypeError(msg)
+
+
+def to_string(formula: Mtl) -> str:
+    """Render an MTL AST as canonical textual syntax, left to right with an
+    explicit stack of the text and subformulae still to render."""
+    pieces: list[str] = []
+    stack: list[str | Mtl] = [formula]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+        else:
+            stack.extend(reversed(_layout(item)))
+    return "".join(pieces)
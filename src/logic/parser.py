@@ -136,15 +136,23 @@ class MTLTransformer(lark.Transformer[lark.Token, mtl.Mtl]):
 
 with (Path(__file__).parent / "mtl.lark").open(encoding="utf-8") as f:
     grammar = f.read()
-MTL_PARSER = lark.Lark(grammar, start="start", parser="lalr")
+# The transformer builds the AST during the LALR parse, rather than walking a
+# parse tree afterwards, which would recurse once per level of nesting.
+MTL_PARSER = lark.Lark(
+    grammar,
+    start="start",
+    parser="lalr",
+    transformer=MTLTransformer(),
+)
 
 
 def parse_mtl(text: str) -> mtl.Mtl:
     """
     Parse MTL text into a validated abstract syntax tree.
     """
-    tree = MTL_PARSER.parse(text)
-    return MTLTransformer().transform(tree)
+    formula = MTL_PARSER.parse(text)
+    assert isinstance(formula, mtl.Mtl)
+    return formula
 
 
 @lark.v_args(inline=True)
@@ -227,25 +235,37 @@ class LTLTransformer(lark.Transformer[lark.Token, ltl.Ltl]):
 
 with (Path(__file__).parent / "ltl_nuxmv.lark").open(encoding="utf-8") as f:
     grammar = f.read()
-NUXMV_LTL_PARSER = lark.Lark(grammar, start="start", parser="lalr")
+NUXMV_LTL_PARSER = lark.Lark(
+    grammar,
+    start="start",
+    parser="lalr",
+    transformer=LTLTransformer(),
+)
 
 
 def parse_nuxmv_ltl(text: str) -> ltl.Ltl:
     """
     Parse NuXmv-style LTL text into a validated abstract syntax tree.
     """
-    tree = NUXMV_LTL_PARSER.parse(text)
-    return LTLTransformer().transform(tree)
+    formula = NUXMV_LTL_PARSER.parse(text)
+    assert isinstance(formula, ltl.Ltl)
+    return formula
 
 
 with (Path(__file__).parent / "ltl_spin.lark").open(encoding="utf-8") as f:
     grammar = f.read()
-SPIN_LTL_PARSER = lark.Lark(grammar, start="start", parser="lalr")
+SPIN_LTL_PARSER = lark.Lark(
+    grammar,
+    start="start",
+    parser="lalr",
+    transformer=LTLTransformer(),
+)
 
 
 def parse_spin_ltl(text: str) -> ltl.Ltl:
     """
     Parse SPIN/Promela-style LTL text into a validated abstract syntax tree.
     """
-    tree = SPIN_LTL_PARSER.parse(text)
-    return LTLTransformer().transform(tree)
+    formula = SPIN_LTL_PARSER.parse(text)
+    assert isinstance(formula, ltl.Ltl)
+    return formula
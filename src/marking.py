@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import sys
 import typing
+from array import array
 
 from src.logic import mtl as m
 
@@ -18,20 +20,37 @@ class UniversalState:
 State = dict[str, bool | int | str] | UniversalState
 
 
+def _pack(bs: list[bool | int]) -> bytearray | array[int] | list[bool | int]:
+    """Store markings as one byte each if all are boolean, as 64-bit
+    integers if all are integers, and as a plain list otherwise."""
+    kinds = set(map(type, bs))
+    if kinds <= {bool}:
+        return bytearray(bs)
+    if kinds == {int}:
+        try:
+            return array("q", bs)
+        except OverflowError:
+            pass
+    return bs
+
+
 class VarMarkings:
     """
-    A list of boolean markings for a formula over a trace.
+    A sequence of markings for a formula over a trace, stored compactly.
     Indexes beyond the length of the trace return True.
     """
 
     def __init__(self, bs: list[bool | int]) -> None:
         """Create a marking wrapper over precomputed proposition values."""
-        self.bs = bs
+        self.bs = _pack(bs)
+        self.is_bool = isinstance(self.bs, bytearray)
 
     def __getitem__(self, i: int) -> bool | int:
         """Return the marking at index i, defaulting to True out of range."""
         if i >= len(self.bs):
             return True
+        if self.is_bool:
+            return self.bs[i] == 1
         return self.bs[i]
 
     def __len__(self) -> int:
@@ -40,113 +59,365 @@ class VarMarkings:
 
     def __iter__(self) -> typing.Iterator[bool | int]:
         """Iterate over stored marking values in order."""
+        if self.is_bool:
+            return map(bool, self.bs)
         return iter(self.bs)
 
     def append(self, value: bool | int) -> None:
-        """Append one marking value at the end of the sequence."""
-        self.bs.append(value)
+        """Append one marking value at the end of the sequence, repacking
+        the storage if the value does not fit it."""
+        if isinstance(self.bs, list) or self.is_bool == isinstance(value, bool):
+            try:
+                self.bs.append(value)
+            except OverflowError:
+                pass
+            else:
+                return
+        self.bs = _pack([*self, value])
+        self.is_bool = isinstance(self.bs, bytearray)
+
+    def memory_usage(self) -> int:
+        """Return the number of bytes held by the stored markings."""
+        return sys.getsizeof(self.bs)
+
+
+class Distances:
+    """
+    A sequence of distances over a trace, each a natural number or None,
+    stored as 64-bit integers with -1 standing for None.
+    """
 
+    def __init__(self, ds: typing.Iterable[int | None]) -> None:
+        """Pack a sequence of optional distances."""
+        self.ds = array("q", (-1 if d is None else d for d in ds))
 
-def expand_trace_states(
-    trace: list[dict[str, bool | int | str]],
-) -> list[dict[str, bool | int | str]]:
-    """
-    NuXmv gives traces in a compact form, where if a variable does not change
-    then its value is not included in the state. We expand the trace to
-    include all variable assignments at each step.
+    def __getitem__(self, i: int) -> int | None:
+        """Return the distance at index i, or None if there is none."""
+        d = self.ds[i]
+        return None if d < 0 else d
+
+    def __len__(self) -> int:
+        """Return the number of stored distances."""
+        return len(self.ds)
+
+    def __iter__(self) -> typing.Iterator[int | None]:
+        """Iterate over the stored distances in order."""
+        return (None if d < 0 else d for d in self.ds)
+
+    def memory_usage(self) -> int:
+        """Return the number of bytes held by the stored distances."""
+        return sys.getsizeof(self.ds)
+
+
+Value = bool | int | str
+
+
+def forward_fill(
+    changes: list[tuple[int, Value]],
+    length: int,
+) -> list[Value]:
+    """Expand the values a variable is given at increasing positions into a
+    column of `length` values, each carried forward until the next.
+
+    NuXmv gives traces in a compact form, where a variable that does not
+    change is left out of the state. The column is filled one run at a time
+    rather than one state at a time, and positions before the variable is
+    first given take its first value.
     """
-    variables = trace[0].keys()
-    for i, state in enumerate(trace):
-        for var in variables:
-            if var not in state:
-                state[var] = trace[i - 1][var]
-    return trace
+    column: list[Value] = []
+    for k, (i, value) in enumerate(changes):
+        stop = changes[k + 1][0] if k + 1 < len(changes) else length
+        column.extend([value] * (stop - (0 if k == 0 else i)))
+    return column
 
 
 class Trace:
-    """Finite or lasso-shaped execution trace with index mapping helpers."""
+    """Finite or lasso-shaped execution trace, stored as one column of
+    values per variable, with index mapping helpers."""
 
     def __init__(
         self,
-        trace: list[dict[str, bool | int | str]],
+        trace: list[dict[str, Value]],
         loop_start: int | None,
+        variables: typing.Collection[str] | None = None,
     ) -> None:
-        """Create a trace with optional lasso loop metadata."""
-        self.trace = expand_trace_states(trace)
+        """Create a trace from a list of states with optional lasso loop
+        metadata, where a variable left out of a state keeps its value.
+
+        With `variables`, only those variables are kept.
+        """
+        changes: dict[str, list[tuple[int, Value]]] = {}
+        for i, state in enumerate(trace):
+            for k, v in state.items():
+                if variables is None or k in variables:
+                    changes.setdefault(k, []).append((i, v))
+        self.length = len(trace)
+        self.columns = {
+            k: forward_fill(vs, self.length) for k, vs in changes.items()
+        }
         self.loop_start = loop_start
+        self.index_table = array("q", range(self.length))
+
+    @classmethod
+    def from_columns(
+        cls,
+        columns: dict[str, list[Value]],
+        length: int,
+        loop_start: int | None,
+    ) -> Trace:
+        """Create a trace of `length` states from the full column of values
+        of each variable."""
+        trace = cls.__new__(cls)
+        trace.length = length
+        trace.columns = columns
+        trace.loop_start = loop_start
+        trace.index_table = array("q", range(length))
+        return trace
+
+    @classmethod
+    def from_changes(
+        cls,
+        changes: dict[str, list[tuple[int, Value]]],
+        length: int,
+        loop_start: int | None,
+        variables: typing.Collection[str] | None = None,
+    ) -> Trace:
+        """Create a trace of `length` states from the positions at which
+        each variable is given a value, as in :func:`forward_fill`, only
+        filling the columns of `variables` if given."""
+        if variables is not None:
+            changes = {k: vs for k, vs in changes.items() if k in variables}
+        return cls.from_columns(
+            {k: forward_fill(vs, length) for k, vs in changes.items()},
+            length,
+            loop_start,
+        )
+
+    def project(self, variables: typing.Collection[str]) -> Trace:
+        """Return the trace restricted to the given variables, sharing
+        their columns with this trace."""
+        return Trace.from_columns(
+            {k: vs for k, vs in self.columns.items() if k in variables},
+            self.length,
+            self.loop_start,
+        )
 
     def to_markings(self) -> dict[m.Mtl, list[bool | int]]:
         """Convert trace states into proposition-to-values markings."""
-        markings: dict[m.Mtl, list[bool | int]] = {}
-        for state in self.trace:
-            for k, v in state.items():
-                if not isinstance(v, (bool, int)):
-                    continue
-                f = m.Prop(k)
-                if f not in markings:
-                    markings[f] = []
-                markings[f].append(v)
-        return markings
+        return {
+            m.Prop(k): typing.cast("list[bool | int]", column)
+            for k, column in self.columns.items()
+            if is_markable(column)
+        }
 
     def to_var_markings(self) -> dict[m.Mtl, VarMarkings]:
         """Convert trace states into lazy-safe proposition markings."""
-        markings: dict[m.Mtl, VarMarkings] = {}
-        for state in self.trace:
-            for k, v in state.items():
-                if not isinstance(v, (bool, int)):
-                    continue
-                f = m.Prop(k)
-                if f not in markings:
-                    markings[f] = VarMarkings([])
-                markings[f].append(v)
-        return markings
+        return {
+            m.Prop(k): VarMarkings(typing.cast("list[bool | int]", column))
+            for k, column in self.columns.items()
+            if is_markable(column)
+        }
 
     def idx(self, i: int) -> int:
         """Map a logical time index into the concrete lasso trace index."""
+        if 0 <= i < len(self.index_table):
+            return self.index_table[i]
         if self.loop_start is None:
             return i
-        if i >= len(self.trace):
-            j = (i - self.loop_start) % (len(self.trace) - self.loop_start)
+        if i >= self.length:
+            j = (i - self.loop_start) % (self.length - self.loop_start)
             return j + self.loop_start
         return i
 
+    def indices(self, start: int, stop: int) -> array[int]:
+        """Concrete trace index of each logical position in [start, stop).
+
+        Lasso positions are read from `index_table`, which holds the
+        unrolled index of every logical position and is grown one whole
+        loop at a time, so it stays sized to the widest window requested.
+        A start past the end of the trace is first folded back into the
+        loop. Positions past the end of a finite trace all map to
+        `len(self)`, the slot of the all-true padding state.
+        """
+        n = self.length
+        if self.loop_start is None:
+            if start >= n:
+                return array("q", [n]) * (stop - start)
+            padding = array("q", [n]) * max(stop - n, 0)
+            return self.index_table[start:stop] + padding
+        if start >= n:
+            shift = self.idx(start) - start
+            start, stop = start + shift, stop + shift
+        table = self.index_table
+        if stop > len(table):
+            loop = table[self.loop_start : n]
+            table.extend(loop * -((len(table) - stop) // len(loop)))
+        return table[start:stop]
+
     def right_idx(self, a: int) -> int:
         """Get the index of the right side of the trace."""
         if self.loop_start is None:
-            return len(self.trace)
+            return self.length
         if a < self.loop_start:
-            return len(self.trace) - 1
-        suf_len = len(self.trace) - self.loop_start
+            return self.length - 1
+        suf_len = self.length - self.loop_start
         return a + suf_len - 1
 
     def __len__(self) -> int:
         """Return the number of explicit states in the trace."""
-        return len(self.trace)
+        return self.length
 
     def __getitem__(self, i: int) -> State:
         """Return state i using lasso semantics when applicable."""
-        if self.loop_start is None and i >= len(self.trace):
+        if self.loop_start is None and i >= self.length:
             return UniversalState()
-        return self.trace[self.idx(i)]
+        j = self.idx(i)
+        return {k: column[j] for k, column in self.columns.items()}
 
-    def __iter__(self) -> typing.Iterator[dict[str, bool | int | str]]:
+    def __iter__(self) -> typing.Iterator[dict[str, Value]]:
         """Iterate over concrete trace states."""
-        return iter(self.trace)
+        return (
+            {k: column[i] for k, column in self.columns.items()}
+            for i in range(self.length)
+        )
+
+
+def is_markable(column: typing.Iterable[Value]) -> bool:
+    """Check whether a column only holds boolean or integer values."""
+    return str not in set(map(type, column))
 
 
 class Marking:
     """Cached evaluator of MTL truth markings over a trace."""
 
-    def __init__(self, trace: Trace, formula: m.Mtl) -> None:
-        """Initialize cached markings for one formula over a trace."""
+    def __init__(
+        self,
+        trace: Trace,
+        formula: m.Mtl | None = None,
+        *,
+        pinned: typing.Collection[m.Mtl] | None = None,
+    ) -> None:
+        """Initialize cached markings for one formula over a trace, or only
+        for its propositions if no formula is given, leaving every other
+        formula to be computed when first read.
+
+        With `pinned`, the markings of an intermediate subformula are freed
+        as soon as every formula that reads it has been computed, unless it
+        is pinned, so only the pinned and top-level markings are kept.
+        """
         self.trace = trace
-        self.markings = trace.to_var_markings()
-        self[formula]  # pylint: disable=pointless-statement
+        self.pinned = None if pinned is None else frozenset(pinned)
+        self.markings = self._proposition_markings()
+        self.distance_index: dict[tuple[m.Mtl, bool], Distances] = {}
+        self.witness_index: dict[m.Mtl, Distances] = {}
+        if formula is not None:
+            compile_plan(formula).run(self)
+
+    def _proposition_markings(self) -> dict[m.Mtl, VarMarkings]:
+        """Build the initial markings of the trace's propositions."""
+        return self.trace.to_var_markings()
 
     def get(self, f: m.Mtl, i: int) -> bool | int:
         """Get the value of formula f at logical position i."""
         return self[f][self.trace.idx(i)]
 
+    def distances(self, f: m.Mtl, value: bool) -> Distances:
+        """Return cached distances from each concrete position to the next
+        position at which f is marked `value`."""
+        key = (f, value)
+        if key not in self.distance_index:
+            self.distance_index[key] = Distances(
+                self._next_distances(self[f], value),
+            )
+        return self.distance_index[key]
+
+    def distance(self, f: m.Mtl, i: int, value: bool) -> int | None:
+        """Get the number of steps from logical position i to the next
+        position at which f is marked `value`, or None if there is none."""
+        j = self.trace.idx(i)
+        if j >= len(self.trace):
+            return 0 if value else None
+        return self.distances(f, value)[j]
+
+    def _witness_distance(self, f: m.Temporal, k: int) -> int | None:
+        """Get the number of steps from concrete position k to the first
+        witness of f, the state that makes F, U and R hold and G fail."""
+        if isinstance(f, m.Eventually):
+            return self.distance(f.operand, k, value=True)
+        if isinstance(f, m.Always):
+            return self.distance(f.operand, k, value=False)
+        if isinstance(f, m.Until):
+            d = self.distance(f.right, k, value=True)
+            blocker = self.distance(f.left, k, value=False)
+            if d is None or (blocker is not None and blocker < d):
+                return None
+            return d
+        d = self.distance(f.left, k, value=True)
+        blocker = self.distance(f.right, k, value=False)
+        if d is None or (blocker is not None and blocker <= d):
+            return None
+        return d
+
+    def witness_profile(self, f: m.Temporal) -> Distances:
+        """Return, for each concrete position, the least upper bound with
+        which the interval of f reaches its first witness, or None if there
+        is none.
+
+        The profile only depends on the lower bound of the interval, so it
+        is cached per lower bound and shared by every upper bound.
+        """
+        a = f.interval[0]
+        key = m.substitute_interval(f, (a, None))
+        if key not in self.witness_index:
+            n = len(self.trace)
+            self.witness_index[key] = Distances(
+                None if d is None else a + d
+                for d in (
+                    self._witness_distance(f, k)
+                    for k in self.trace.indices(a, a + n)
+                )
+            )
+        return self.witness_index[key]
+
+    def with_interval(
+        self,
+        f: m.Temporal,
+        interval: m.Interval,
+    ) -> VarMarkings:
+        """Return the markings of f with its interval replaced, derived from
+        the witness profile of f rather than by re-walking the trace."""
+        g = m.substitute_interval(f, interval)
+        if g not in self.markings:
+            b = interval[1]
+            profile = self.witness_profile(g)
+            bs: list[bool | int]
+            if isinstance(g, m.Always):
+                bs = [p is None or (b is not None and p > b) for p in profile]
+            else:
+                bs = [p is not None and (b is None or p <= b) for p in profile]
+            self.markings[g] = VarMarkings(bs)
+        return self.markings[g]
+
+    def evict(self, f: m.Mtl) -> None:
+        """Free the cached markings of f and the distances built from them."""
+        self.markings.pop(f, None)
+        self.distance_index.pop((f, True), None)
+        self.distance_index.pop((f, False), None)
+
+    def memory_usage(self) -> dict[m.Mtl, int]:
+        """Return the number of bytes held for each cached formula, by its
+        markings and by the distance and witness indexes built from them."""
+        usage = {f: vs.memory_usage() for f, vs in self.markings.items()}
+        for (f, _), ds in self.distance_index.items():
+            usage[f] = usage.get(f, 0) + ds.memory_usage()
+        for f, ps in self.witness_index.items():
+            usage[f] = usage.get(f, 0) + ps.memory_usage()
+        return usage
+
+    def _get_not(self, operand: m.Mtl) -> VarMarkings:
+        """Compute pointwise negation markings for a subformula."""
+        return VarMarkings([not v for v in self[operand]])
+
     def _get_and(self, left: m.Mtl, right: m.Mtl) -> VarMarkings:
         """Compute pointwise conjunction markings for two subformulae."""
         return VarMarkings(
@@ -168,6 +439,304 @@ class Marking:
             ],
         )
 
+    def _window_bounds(
+        self,
+        interval: m.Interval,
+    ) -> typing.Iterator[tuple[int, int] | None]:
+        """Yield the concrete unrolled window of each position, or None when
+        the whole window lies beyond the end of a finite trace.
+
+        Windows wider than the trace are clamped, as every state reachable
+        from the window start is visited within `len(self.trace)` steps.
+        """
+        n = len(self.trace)
+        a, b = interval
+        width = n if b is None else min(b - a, n)
+        for start in self.trace.indices(a, a + n):
+            if start >= n:
+                yield None
+            else:
+                yield start, start + width
+
+    def _unrolled_counts(self, vs: VarMarkings) -> list[int]:
+        """Prefix counts of true markings over two unrollings of the trace."""
+        counts = [0]
+        for k in self.trace.indices(0, 2 * len(self.trace)):
+            counts.append(counts[-1] + bool(vs[k]))
+        return counts
+
+    def _get_eventually(
+        self,
+        operand: m.Mtl,
+        interval: m.Interval,
+    ) -> VarMarkings:
+        """Compute bounded eventuality markings over the given interval."""
+        counts = self._unrolled_counts(self[operand])
+        bs: list[bool | int] = [
+            window is None or counts[window[1] + 1] > counts[window[0]]
+            for window in self._window_bounds(interval)
+        ]
+        return VarMarkings(bs)
+
+    def _get_always(self, operand: m.Mtl, interval: m.Interval) -> VarMarkings:
+        """Compute bounded invariance markings over the given interval."""
+        counts = self._unrolled_counts(self[operand])
+        bs: list[bool | int] = [
+            window is None
+            or counts[window[1] + 1] - counts[window[0]]
+            == window[1] - window[0] + 1
+            for window in self._window_bounds(interval)
+        ]
+        return VarMarkings(bs)
+
+    def _next_distances(
+        self,
+        vs: VarMarkings,
+        value: bool,
+    ) -> list[int | None]:
+        """Distance from each position to the next one marked `value`, or None
+        if it never recurs.
+
+        A backward sweep, seeded at the end of the trace by one forward pass
+        over the lasso loop (the fixed point of the wrap-around), or by the
+        all-true padding past the end of a finite trace.
+        """
+        n = len(self.trace)
+        loop_start = self.trace.loop_start
+        after: int | None = None
+        if loop_start is None:
+            after = 0 if value else None
+        else:
+            for j in range(loop_start, n):
+                if bool(vs[j]) == value:
+                    after = j - loop_start
+                    break
+        ds: list[int | None] = [None] * n
+        for k in range(n - 1, -1, -1):
+            if bool(vs[k]) == value:
+                after = 0
+            elif after is not None:
+                after += 1
+            ds[k] = after
+        return ds
+
+    def _window_starts(self, interval: m.Interval) -> list[int | None]:
+        """Concrete start of each position's window, None past a finite end."""
+        n = len(self.trace)
+        a = interval[0]
+        return [
+            start if start < n else None
+            for start in self.trace.indices(a, a + n)
+        ]
+
+    def _get_until(
+        self,
+        left: m.Mtl,
+        right: m.Mtl,
+        interval: m.Interval,
+    ) -> VarMarkings:
+        """Compute bounded-until markings for left and right operands.
+
+        The until holds when the right operand recurs within the window, no
+        later than the left operand first fails.
+        """
+        rights = self.distances(right, value=True).ds
+        lefts = self.distances(left, value=False).ds
+        a, b = interval
+        bs: list[bool | int] = []
+        for start in self._window_starts(interval):
+            if start is None:
+                bs.append(True)
+                continue
+            d_right, d_left = rights[start], lefts[start]
+            bs.append(
+                d_right >= 0
+                and (b is None or d_right <= b - a)
+                and (d_left < 0 or d_right <= d_left),
+            )
+        return VarMarkings(bs)
+
+    def _get_release(
+        self,
+        left: m.Mtl,
+        right: m.Mtl,
+        interval: m.Interval,
+    ) -> VarMarkings:
+        """Compute bounded-release markings for left and right operands.
+
+        The release holds when the left operand recurs within the window,
+        strictly before the right operand first fails.
+        """
+        lefts = self.distances(left, value=True).ds
+        rights = self.distances(right, value=False).ds
+        a, b = interval
+        bs: list[bool | int] = []
+        for start in self._window_starts(interval):
+            if start is None:
+                bs.append(True)
+                continue
+            d_left, d_right = lefts[start], rights[start]
+            bs.append(
+                d_left >= 0
+                and (b is None or d_left <= b - a)
+                and (d_right < 0 or d_left < d_right),
+            )
+        return VarMarkings(bs)
+
+    def _get_next(self, operand: m.Mtl, steps: int = 1) -> VarMarkings:
+        """Shift operand markings forward by `steps` logical steps."""
+        operands = self[operand]
+        ks = self.trace.indices(steps, len(operands) + steps)
+        return VarMarkings([operands[k] for k in ks])
+
+    def __getitem__(self, f: m.Mtl) -> VarMarkings:
+        """Return cached or computed markings for formula f."""
+        if f in self.markings:
+            return self.markings[f]
+        if isinstance(f, m.TrueBool):
+            return VarMarkings([True] * len(self.trace))
+        if isinstance(f, m.FalseBool):
+            return VarMarkings([False] * len(self.trace))
+        if isinstance(f, m.Prop):
+            msg = f"Proposition '{f}' not found in markings. "
+            raise TypeError(msg)
+        return compile_plan(f).run(self)
+
+    def __str__(self) -> str:
+        """Render cached markings as a human-readable table."""
+        list_markings = {f: list(self.markings[f]) for f in self.markings}
+        return markings_to_str(list_markings, self.trace.loop_start)
+
+
+Kernel = typing.Callable[..., VarMarkings]
+
+_KERNELS: dict[type[m.Mtl], tuple[str, tuple[str, ...]]] = {
+    m.Not: ("_get_not", ("operand",)),
+    m.And: ("_get_and", ("left", "right")),
+    m.Or: ("_get_or", ("left", "right")),
+    m.Implies: ("_get_implies", ("left", "right")),
+    m.Eventually: ("_get_eventually", ("operand", "interval")),
+    m.Always: ("_get_always", ("operand", "interval")),
+    m.Until: ("_get_until", ("left", "right", "interval")),
+    m.Release: ("_get_release", ("left", "right", "interval")),
+    m.Next: ("_get_next", ("operand",)),
+}
+
+_ATOMS = (m.Prop, m.TrueBool, m.FalseBool)
+
+
+class Plan:
+    """A formula compiled for evaluation over any number of traces.
+
+    The plan lists the distinct compound subformulae of the formula with
+    children before parents, each with the name of the marking method that
+    computes it and the arguments to call it with. Running the plan calls
+    these in order, so every operand is already cached when it is read and
+    no subformula is dispatched on its type again.
+
+    A chain of k nested Next operators is compiled into a single step that
+    shifts the formula under the chain by k positions at once, so the
+    intermediate shifts are neither computed nor stored.
+
+    The plan also counts how many steps read each subformula, so that a
+    marking with pinned formulae can free the others after their last read.
+    """
+
+    def __init__(self, formula: m.Mtl) -> None:
+        """Compile formula into an ordered list of evaluation steps."""
+        self.formula = formula
+        self.steps: list[tuple[m.Mtl, str, tuple[object, ...]]] = []
+        self.reads: dict[m.Mtl, tuple[m.Mtl, ...]] = {}
+        self.uses: dict[m.Mtl, int] = {}
+        self.kernels: dict[
+            type[Marking],
+            list[tuple[m.Mtl, Kernel, tuple[object, ...]]],
+        ] = {}
+        seen: set[m.Mtl] = set()
+        stack: list[tuple[m.Mtl, bool]] = [(formula, False)]
+        while stack:
+            f, expanded = stack.pop()
+            if f in seen or isinstance(f, _ATOMS):
+                continue
+            if type(f) not in _KERNELS:
+                msg = f"Unsupported MTL construct: {f}"
+                raise TypeError(msg)
+            name, fields = _KERNELS[type(f)]
+            args = tuple(getattr(f, field) for field in fields)
+            if isinstance(f, m.Next):
+                args = m.next_chain(f)
+            if expanded:
+                seen.add(f)
+                self.steps.append((f, name, args))
+                self.reads[f] = tuple(
+                    dict.fromkeys(
+                        arg
+                        for arg in args
+                        if isinstance(arg, m.Mtl)
+                        and not isinstance(arg, _ATOMS)
+                    ),
+                )
+                for arg in self.reads[f]:
+                    self.uses[arg] = self.uses.get(arg, 0) + 1
+                continue
+            stack.append((f, True))
+            stack.extend(
+                (arg, False) for arg in reversed(args) if isinstance(arg, m.Mtl)
+            )
+
+    def resolve(
+        self,
+        cls: type[Marking],
+    ) -> list[tuple[m.Mtl, Kernel, tuple[object, ...]]]:
+        """Return the steps with each method looked up on a marking class,
+        cached so that each backend resolves its kernels once."""
+        if cls not in self.kernels:
+            self.kernels[cls] = [
+                (f, getattr(cls, name), args) for f, name, args in self.steps
+            ]
+        return self.kernels[cls]
+
+    def run(self, markings: Marking) -> VarMarkings:
+        """Evaluate the formula into the cache of `markings`, skipping the
+        subformulae it already holds, and return its markings."""
+        cache = markings.markings
+        pinned = markings.pinned
+        uses = {} if pinned is None else dict(self.uses)
+        for f, kernel, args in self.resolve(type(markings)):
+            if f not in cache:
+                cache[f] = kernel(markings, *args)
+            if pinned is None:
+                continue
+            for g in self.reads[f]:
+                uses[g] -= 1
+                if uses[g] == 0 and g not in pinned:
+                    markings.evict(g)
+        return markings[self.formula]
+
+
+def compile_plan(formula: m.Mtl) -> Plan:
+    """Return the evaluation plan of formula, compiled once and shared by
+    every trace it is evaluated over.
+
+    The plan is kept on the interned formula node rather than in a global
+    cache, so it is freed along with the formula.
+    """
+    plan = getattr(formula, "plan", None)
+    if plan is None:
+        plan = Plan(formula)
+        object.__setattr__(formula, "plan", plan)
+    assert isinstance(plan, Plan)
+    return plan
+
+
+class ScanMarking(Marking):
+    """Reference evaluator that rescans the whole interval window at every
+    position, kept for cross-checking the linear-time evaluator.
+
+    Unbounded until and release only scan up to the end of the explicit
+    trace rather than around the lasso loop.
+    """
+
     def _get_eventually(
         self,
         operand: m.Mtl,
@@ -242,53 +811,6 @@ class Marking:
                     break
         return VarMarkings(bs)
 
-    def _get_next(self, operand: m.Mtl) -> VarMarkings:
-        """Shift operand markings forward by one logical step."""
-        operands = self[operand]
-        return VarMarkings(
-            [operands[self.trace.idx(i + 1)] for i in range(len(operands))],
-        )
-
-    def __getitem__(self, f: m.Mtl) -> VarMarkings:
-        """Return cached or computed markings for formula f."""
-        if f in self.markings:
-            return self.markings[f]
-        if isinstance(f, m.TrueBool):
-            return VarMarkings([True] * len(self.trace))
-        if isinstance(f, m.FalseBool):
-            return VarMarkings([False] * len(self.trace))
-        if isinstance(f, m.Prop):
-            msg = f"Proposition '{f}' not found in markings. "
-            raise TypeError(msg)
-        if isinstance(f, m.Not):
-            bs = VarMarkings([not v for v in self[f.operand]])
-        elif isinstance(f, m.And):
-            bs = self._get_and(f.left, f.right)
-        elif isinstance(f, m.Or):
-            bs = self._get_or(f.left, f.right)
-        elif isinstance(f, m.Implies):
-            bs = self._get_implies(f.left, f.right)
-        elif isinstance(f, m.Eventually):
-            bs = self._get_eventually(f.operand, f.interval)
-        elif isinstance(f, m.Always):
-            bs = self._get_always(f.operand, f.interval)
-        elif isinstance(f, m.Until):
-            bs = self._get_until(f.left, f.right, f.interval)
-        elif isinstance(f, m.Release):
-            bs = self._get_release(f.left, f.right, f.interval)
-        elif isinstance(f, m.Next):
-            bs = self._get_next(f.operand)
-        else:
-            msg = f"Unsupported MTL construct: {f}"
-            raise TypeError(msg)
-        self.markings[f] = bs
-        return bs
-
-    def __str__(self) -> str:
-        """Render cached markings as a human-readable table."""
-        list_markings = {f: self.markings[f].bs for f in self.markings}
-        return markings_to_str(list_markings, self.trace.loop_start)
-
 
 def _get_trace_indices_str(trace_len: int, max_len: int) -> str:
     """Build the two-line numeric header shown above marking columns."""
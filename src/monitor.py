@@ -0,0 +1,211 @@
+"""Online monitoring of bounded-future MTL formulas over streams of states.
+
+The monitor consumes states one at a time and reports the verdict at each
+position as soon as every state within the formula's horizon of it has
+been seen. It only keeps the markings that later verdicts can still read,
+so memory is bounded by the horizon rather than the length of the stream.
+A stream that ends is treated as a finite trace, so the verdicts agree
+with :class:`src.marking.Marking` over the same states, and as there, a
+proposition missing from a state is an error rather than false.
+"""
+
+from __future__ import annotations
+
+import collections
+import dataclasses
+import typing
+
+from src.logic import mtl as m
+
+State = typing.Mapping[str, bool | int | str]
+Verdict = tuple[int, bool | int]
+
+
+def _reach(f: m.Mtl) -> tuple[int, int]:
+    """Return the offsets of the first and last positions of its
+    subformulae that f reads from each of its own positions."""
+    if isinstance(f, m.Next):
+        return 1, 1
+    if isinstance(f, (m.Eventually, m.Always, m.Until, m.Release)):
+        a, b = f.interval
+        if b is None:
+            msg = f"Cannot monitor unbounded formula: {f}"
+            raise ValueError(msg)
+        return a, b
+    return 0, 0
+
+
+@dataclasses.dataclass
+class _Buffer:
+    """The markings of one subformula still needed by its parents."""
+
+    values: collections.deque[bool | int] = dataclasses.field(
+        default_factory=collections.deque,
+    )
+    start: int = 0
+    resolved: int = 0
+    count: int | None = None
+
+
+class Monitor:
+    """Online evaluator of a bounded-future MTL formula."""
+
+    def __init__(self, formula: m.Mtl) -> None:
+        """Create a monitor for formula, before any state is seen."""
+        horizon = m.horizon(formula)
+        if horizon is None:
+            msg = f"Cannot monitor unbounded formula: {formula}"
+            raise ValueError(msg)
+        self.formula = formula
+        self.horizon = horizon
+        self.order = m.post_order(formula)
+        self.parents: dict[m.Mtl, list[m.Mtl]] = {f: [] for f in self.order}
+        for f in self.order:
+            for c in set(m.operands(f)):
+                self.parents[c].append(f)
+        self.buffers = {f: _Buffer() for f in self.order}
+        self.length = 0
+        self.ended = False
+
+    def push(self, state: State) -> list[Verdict]:
+        """Consume the next state and return the verdicts it settles."""
+        for f in self.order:
+            if isinstance(f, m.Prop):
+                if f.name not in state:
+                    msg = f"Proposition '{f}' not found in state {self.length}"
+                    raise TypeError(msg)
+                value = state[f.name]
+                if not isinstance(value, (bool, int)):
+                    msg = f"Proposition '{f}' is not boolean or integer"
+                    raise TypeError(msg)
+            elif isinstance(f, (m.TrueBool, m.FalseBool)):
+                value = isinstance(f, m.TrueBool)
+            else:
+                continue
+            self.buffers[f].values.append(value)
+            self.buffers[f].resolved += 1
+        self.length += 1
+        return self._advance()
+
+    def finish(self) -> list[Verdict]:
+        """End the stream and return the verdicts of the remaining
+        positions, reading every state past the end as all-true."""
+        self.ended = True
+        return self._advance()
+
+    def _value(self, f: m.Mtl, j: int) -> bool | int:
+        """Return the marking of f at position j."""
+        if j >= self.length:
+            return True
+        buffer = self.buffers[f]
+        return buffer.values[j - buffer.start]
+
+    def _ready(self, f: m.Mtl) -> bool:
+        """Check whether the next position of f can be settled."""
+        i = self.buffers[f].resolved
+        if i >= self.length:
+            return False
+        if self.ended:
+            return True
+        last = i + _reach(f)[1]
+        return all(self.buffers[c].resolved > last for c in m.operands(f))
+
+    def _window(self, f: m.Eventually | m.Always, i: int) -> int:
+        """Count true operand markings in the window of position i, sliding
+        the previous position's count along by one step."""
+        a, b = _reach(f)
+        buffer = self.buffers[f]
+        if buffer.count is None:
+            buffer.count = sum(
+                bool(self._value(f.operand, j)) for j in range(i + a, i + b + 1)
+            )
+        else:
+            buffer.count += bool(self._value(f.operand, i + b)) - bool(
+                self._value(f.operand, i + a - 1),
+            )
+        return buffer.count
+
+    def _scan(self, f: m.Until | m.Release, i: int) -> bool:
+        """Scan the window of position i for the first witness of f."""
+        a, b = _reach(f)
+        for j in range(i + a, i + b + 1):
+            left = self._value(f.left, j)
+            right = self._value(f.right, j)
+            if isinstance(f, m.Until):
+                if right:
+                    return True
+                if not left:
+                    return False
+            else:
+                if not right:
+                    return False
+                if left:
+                    return True
+        return False
+
+    def _compute(self, f: m.Mtl, i: int) -> bool | int:
+        """Evaluate f at position i from its subformulae's markings."""
+        if isinstance(f, m.Not):
+            return not self._value(f.operand, i)
+        if isinstance(f, m.And):
+            return self._value(f.left, i) and self._value(f.right, i)
+        if isinstance(f, m.Or):
+            return self._value(f.left, i) or self._value(f.right, i)
+        if isinstance(f, m.Implies):
+            return (not self._value(f.left, i)) or self._value(f.right, i)
+        if isinstance(f, m.Next):
+            return self._value(f.operand, i + 1)
+        if isinstance(f, m.Eventually):
+            return self._window(f, i) > 0
+        if isinstance(f, m.Always):
+            a, b = f.interval
+            assert b is not None
+            return self._window(f, i) == b - a + 1
+        if isinstance(f, (m.Until, m.Release)):
+            return self._scan(f, i)
+        msg = f"Unsupported MTL construct: {f}"
+        raise TypeError(msg)
+
+    def _discard(self, f: m.Mtl) -> None:
+        """Drop the markings of f that no parent will read again."""
+        keep = min(
+            self.buffers[p].resolved
+            + _reach(p)[0]
+            - isinstance(p, (m.Eventually, m.Always))
+            for p in self.parents[f]
+        )
+        buffer = self.buffers[f]
+        while buffer.values and buffer.start < keep:
+            buffer.values.popleft()
+            buffer.start += 1
+
+    def _advance(self) -> list[Verdict]:
+        """Settle every position that the states seen so far allow, and
+        return the newly settled verdicts of the formula."""
+        for f in self.order:
+            if isinstance(f, (m.Prop, m.TrueBool, m.FalseBool)):
+                continue
+            buffer = self.buffers[f]
+            while self._ready(f):
+                buffer.values.append(self._compute(f, buffer.resolved))
+                buffer.resolved += 1
+        for f in self.order:
+            if f is not self.formula:
+                self._discard(f)
+        root = self.buffers[self.formula]
+        settled = [(root.start + k, v) for k, v in enumerate(root.values)]
+        root.values.clear()
+        root.start = root.resolved
+        return settled
+
+
+def monitor(
+    formula: m.Mtl,
+    states: typing.Iterable[State],
+) -> typing.Iterator[Verdict]:
+    """Yield the verdict of formula at each position of a stream of states,
+    in order, as soon as it is settled."""
+    online = Monitor(formula)
+    for state in states:
+        yield from online.push(state)
+    yield from online.finish()
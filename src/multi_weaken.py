@@ -0,0 +1,155 @@
+"""Simultaneous weakening of several temporal subformulae of one formula.
+
+Each subformula to weaken is selected by its own De Bruijn path, and the
+paths must not overlap. Every subformula is split out of the formula in
+partial negation normal form and weakened by its own
+:class:`src.weaken.Weaken`, in a separate pass over its own context. What
+the holes share is a single marking of the formula per trace, so the
+markings of subformulae common to their contexts are evaluated once.
+
+Any one weakening makes the formula hold on its trace, and as each hole is
+in a positive position, weakening other holes too keeps it holding. A
+round over several traces can then weaken a different hole for each trace,
+chosen by a trade-off ordering, and weaken each hole to cover every trace
+that chose it.
+"""
+
+from __future__ import annotations
+
+import typing
+
+from src import analyse_cex, custom_args, marking, weaken
+from src.logic import ctx, mtl
+
+if typing.TYPE_CHECKING:
+    from pathlib import Path
+
+
+def check_paths(paths: list[list[int]]) -> None:
+    """Check that no De Bruijn path selects a subformula of another."""
+    for i, p in enumerate(paths):
+        for q in paths[i + 1 :]:
+            if p[: len(q)] == q or q[: len(p)] == p:
+                msg = f"De Bruijn paths {p} and {q} overlap"
+                raise ValueError(msg)
+
+
+def substitute_intervals(
+    formula: mtl.Mtl,
+    paths: list[list[int]],
+    intervals: dict[int, mtl.Interval],
+) -> mtl.Mtl:
+    """Replace the interval of the subformula at each indexed path."""
+    for i, interval in intervals.items():
+        context, subformula = ctx.split_formula(formula, paths[i])
+        assert isinstance(subformula, mtl.Temporal)
+        formula = ctx.substitute(
+            context,
+            mtl.substitute_interval(subformula, interval),
+        )
+    return formula
+
+
+def _change(w: weaken.Weaken, interval: mtl.Interval) -> tuple[bool, int]:
+    """Order weakenings by how much they change the original interval:
+    first whether they bound or unbound it, then how far its ends move."""
+    low, high = w.original_interval
+    if high is None or interval[1] is None:
+        return high != interval[1], abs(interval[0] - low)
+    return False, abs(interval[0] - low) + abs(interval[1] - high)
+
+
+class MultiWeaken:
+    """Compute trace-guided interval weakenings for several temporal
+    subformulae of one formula over one trace, one weakening per
+    subformula over a shared marking."""
+
+    def __init__(
+        self,
+        formula: mtl.Mtl,
+        paths: list[list[int]],
+        trace: marking.Trace,
+        markings: marking.Marking | None = None,
+    ) -> None:
+        """Split out the subformula at each path, sharing the markings of
+        formula over the trace between them."""
+        check_paths(paths)
+        self.formula = formula
+        self.paths = paths
+        self.markings = (
+            marking.Marking(trace, formula) if markings is None else markings
+        )
+        self.weakens = [
+            weaken.Weaken(
+                *analyse_cex.split_weakened_subformula(formula, path),
+                trace,
+                self.markings,
+            )
+            for path in paths
+        ]
+
+    def candidates(self) -> list[mtl.Interval | None]:
+        """Return the best weakening of each subformula on its own, or None
+        where there is none."""
+        return [w.weaken() for w in self.weakens]
+
+    def choose(
+        self,
+        tradeoff: custom_args.Tradeoff,
+    ) -> tuple[int, mtl.Interval] | None:
+        """Return the index of the subformula to weaken, and its weakening,
+        preferred by the trade-off, or None if none can be weakened."""
+        found = [
+            (i, interval)
+            for i, interval in enumerate(self.candidates())
+            if interval is not None
+        ]
+        if not found:
+            return None
+        if tradeoff == custom_args.Tradeoff.CLOSEST:
+            return min(found, key=lambda c: _change(self.weakens[c[0]], c[1]))
+        return found[0]
+
+
+def weaken_round(
+    analyses: list[MultiWeaken],
+    tradeoff: custom_args.Tradeoff,
+) -> dict[int, mtl.Interval] | None:
+    """Choose a subformula to weaken for each trace, then the weakest
+    interval of each chosen subformula over the traces that chose it, or
+    return None if some trace admits no weakening."""
+    chosen: dict[int, list[mtl.Interval]] = {}
+    for analysis in analyses:
+        choice = analysis.choose(tradeoff)
+        if choice is None:
+            return None
+        chosen.setdefault(choice[0], []).append(choice[1])
+    return {
+        i: analyse_cex.AnalyseCex.from_weaken(
+            analyses[0].weakens[i],
+        ).choose_weakest_interval(intervals)
+        for i, intervals in sorted(chosen.items())
+    }
+
+
+def analyse_batch(
+    formula: mtl.Mtl,
+    paths: list[list[int]],
+    trace_files: list[Path],
+    model_checker: custom_args.ModelChecker,
+) -> list[MultiWeaken]:
+    """Analyse several counterexample traces for the subformulae of one
+    formula, evaluating its markings over all traces together."""
+    traces = [
+        analyse_cex.get_cex_trace(
+            model_checker,
+            analyse_cex.read_trace_input(trace_file),
+            mtl.props(formula),
+        )
+        for trace_file in trace_files
+    ]
+    markings = analyse_cex.batch_markings(traces, formula)
+    return [
+        MultiWeaken(formula, paths, trace, trace_markings)
+        for trace, trace_markings in zip(traces, markings, strict=True)
+    ]
@@ -0,0 +1,261 @@
+"""NumPy-backed trace markings with vectorised operators.
+
+NumPy is an optional dependency: it is only needed when this backend is
+selected in place of the pure-Python :class:`src.marking.Marking`.
+"""
+
+from __future__ import annotations
+
+import typing
+
+import numpy as np
+
+from src import marking
+
+if typing.TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from src.logic import mtl as m
+
+    Array = npt.NDArray[typing.Any]
+
+# Sentinel distance for a value that never recurs along the trace.
+NEVER = np.iinfo(np.int64).max
+
+
+class ArrayMarkings(marking.VarMarkings):
+    """
+    A NumPy array of markings for a formula over a trace.
+    Indexes beyond the length of the trace return True.
+    """
+
+    def __init__(  # pylint: disable=super-init-not-called
+        self,
+        array: Array,
+    ) -> None:
+        """Create a marking wrapper over a one-dimensional array."""
+        self.array = array
+
+    @classmethod
+    def from_values(cls, values: typing.Iterable[bool | int]) -> ArrayMarkings:
+        """Pack values into a bool array, or int64 if any is an integer."""
+        vs = list(values)
+        if all(isinstance(v, bool) for v in vs):
+            return cls(np.array(vs, dtype=np.bool_))
+        return cls(np.array(vs, dtype=np.int64))
+
+    def __getitem__(self, i: int) -> bool | int:
+        """Return the marking at index i, defaulting to True out of range."""
+        if i >= len(self.array):
+            return True
+        return typing.cast("bool | int", self.array[i].item())
+
+    def __len__(self) -> int:
+        """Return the finite number of stored markings."""
+        return len(self.array)
+
+    def __iter__(self) -> typing.Iterator[bool | int]:
+        """Iterate over stored marking values as Python scalars."""
+        return iter(typing.cast("list[bool | int]", self.array.tolist()))
+
+    def append(self, value: bool | int) -> None:
+        """Append one marking value at the end of the sequence."""
+        self.array = np.append(self.array, value)
+
+    def memory_usage(self) -> int:
+        """Return the number of bytes held by the array."""
+        return int(self.array.nbytes)
+
+
+def unrolled_indices(trace: marking.Trace, length: int) -> Array:
+    """Concrete index of each of the first `length` logical positions.
+
+    Positions past the end of a finite trace map to `len(trace)`, the slot
+    of the all-true padding state.
+    """
+    return np.frombuffer(trace.indices(0, length), dtype=np.int64)
+
+
+def window_starts(trace: marking.Trace, offset: int) -> Array:
+    """Concrete index of logical position `i + offset` for every i, with
+    positions past the end of a finite trace mapped to `len(trace)`."""
+    return np.frombuffer(
+        trace.indices(offset, offset + len(trace)),
+        dtype=np.int64,
+    )
+
+
+def next_distances(trace: marking.Trace, truth: Array, value: bool) -> Array:
+    """Distance from each position to the next one marked `value`,
+    or :data:`NEVER` if it never recurs."""
+    n = len(trace)
+    hits = truth if value else ~truth
+    positions = np.where(hits, np.arange(n, dtype=np.int64), NEVER)
+    following = np.minimum.accumulate(positions[::-1])[::-1]
+    if trace.loop_start is None:
+        after = n if value else NEVER
+    else:
+        in_loop = np.flatnonzero(hits[trace.loop_start :])
+        after = n + int(in_loop[0]) if len(in_loop) else NEVER
+    following = np.where(following == NEVER, after, following)
+    distances = following - np.arange(n, dtype=np.int64)
+    return np.where(following == NEVER, NEVER, distances)
+
+
+class NumpyMarking(marking.Marking):
+    """Cached evaluator of MTL truth markings backed by NumPy arrays."""
+
+    def _proposition_markings(self) -> dict[m.Mtl, marking.VarMarkings]:
+        """Pack each proposition column into a bool or int64 array."""
+        return {
+            f: ArrayMarkings.from_values(vs)
+            for f, vs in self.trace.to_var_markings().items()
+        }
+
+    def _array(self, f: m.Mtl) -> Array:
+        """Return the markings of f as an array."""
+        vs = self[f]
+        if isinstance(vs, ArrayMarkings):
+            return vs.array
+        return ArrayMarkings.from_values(vs).array
+
+    def _truth(self, f: m.Mtl) -> Array:
+        """Return the markings of f as a bool array."""
+        return self._array(f).astype(np.bool_, copy=False)
+
+    def _truth_padded(self, f: m.Mtl) -> Array:
+        """Return bool markings of f followed by the all-true padding state."""
+        return np.append(self._truth(f), True)
+
+    def _get_not(self, operand: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise negation markings for a subformula."""
+        return ArrayMarkings(np.logical_not(self._array(operand)))
+
+    def _get_and(self, left: m.Mtl, right: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise conjunction markings for two subformulae."""
+        return ArrayMarkings(
+            np.logical_and(self._array(left), self._array(right)),
+        )
+
+    def _get_or(self, left: m.Mtl, right: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise disjunction markings for two subformulae."""
+        return ArrayMarkings(
+            np.logical_or(self._array(left), self._array(right)),
+        )
+
+    def _get_implies(self, left: m.Mtl, right: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise implication markings for two subformulae."""
+        return ArrayMarkings(
+            np.logical_or(
+                np.logical_not(self._array(left)),
+                self._array(right),
+            ),
+        )
+
+    def _get_next(
+        self,
+        operand: m.Mtl,
+        steps: int = 1,
+    ) -> marking.VarMarkings:
+        """Shift operand markings forward by `steps` logical steps."""
+        vs = self._array(operand)
+        padded = np.append(vs, np.ones(1, dtype=vs.dtype))
+        return ArrayMarkings(padded[window_starts(self.trace, steps)])
+
+    def _window_counts(
+        self,
+        operand: m.Mtl,
+        interval: m.Interval,
+    ) -> tuple[Array, Array, Array]:
+        """Count true markings in each position's window.
+
+        Returns the counts, the window sizes, and a mask of the positions
+        whose window lies entirely beyond the end of a finite trace.
+        """
+        n = len(self.trace)
+        a, b = interval
+        width = n if b is None else min(b - a, n)
+        unrolled = self._truth_padded(operand)[
+            unrolled_indices(self.trace, 2 * n)
+        ]
+        prefix = np.concatenate(([0], np.cumsum(unrolled, dtype=np.int64)))
+        starts = window_starts(self.trace, a)
+        beyond = starts >= n
+        starts = np.where(beyond, 0, starts)
+        counts = prefix[starts + width + 1] - prefix[starts]
+        return counts, np.full(n, width + 1), beyond
+
+    def _get_eventually(
+        self,
+        operand: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded eventuality markings over the given interval."""
+        counts, _, beyond = self._window_counts(operand, interval)
+        return ArrayMarkings(beyond | (counts > 0))
+
+    def _get_always(
+        self,
+        operand: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded invariance markings over the given interval."""
+        counts, sizes, beyond = self._window_counts(operand, interval)
+        return ArrayMarkings(beyond | (counts == sizes))
+
+    def _next_distances(
+        self,
+        vs: marking.VarMarkings,
+        value: bool,
+    ) -> list[int | None]:
+        """Distance from each position to the next one marked `value`, or None
+        if it never recurs."""
+        truth = ArrayMarkings.from_values(vs).array.astype(np.bool_, copy=False)
+        return [
+            None if d == NEVER else d
+            for d in next_distances(self.trace, truth, value).tolist()
+        ]
+
+    def _first_witness(
+        self,
+        witness: Array,
+        blocker: Array,
+        interval: m.Interval,
+        strict: bool,
+    ) -> marking.VarMarkings:
+        """Mark positions whose window sees `witness` in time and before
+        `blocker` (or at the same step, unless `strict`)."""
+        n = len(self.trace)
+        a, b = interval
+        starts = window_starts(self.trace, a)
+        beyond = starts >= n
+        starts = np.where(beyond, 0, starts)
+        d_witness = witness[starts]
+        d_blocker = blocker[starts]
+        in_time = d_witness != NEVER
+        if b is not None:
+            in_time &= d_witness <= b - a
+        in_order = d_witness < d_blocker if strict else d_witness <= d_blocker
+        return ArrayMarkings(beyond | (in_time & in_order))
+
+    def _get_until(
+        self,
+        left: m.Mtl,
+        right: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded-until markings for left and right operands."""
+        rights = next_distances(self.trace, self._truth(right), value=True)
+        lefts = next_distances(self.trace, self._truth(left), value=False)
+        return self._first_witness(rights, lefts, interval, strict=False)
+
+    def _get_release(
+        self,
+        left: m.Mtl,
+        right: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded-release markings for left and right operands."""
+        lefts = next_distances(self.trace, self._truth(left), value=True)
+        rights = next_distances(self.trace, self._truth(right), value=False)
+        return self._first_witness(lefts, rights, interval, strict=True)
@@ -0,0 +1,133 @@
+"""Markings of one long trace evaluated in parallel over trace segments.
+
+A subformula with a bounded horizon h only reads the h positions after
+each position, so its markings over a segment of the trace only need the
+states of that segment and the h states after it. Such subformulae are
+evaluated over overlapping segments in a process pool and stitched back
+together. Subformulae with unbounded operators, which can read around the
+whole lasso, are then evaluated sequentially over the stitched markings.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import typing
+
+from src import marking
+from src.logic import mtl as m
+
+
+def bounded_roots(formula: m.Mtl) -> list[m.Mtl]:
+    """Return the largest compound subformulae of formula with a bounded
+    horizon, in evaluation order."""
+    plan = marking.compile_plan(formula)
+    horizons = m.horizons(formula)
+    bounded = {f for f, _, _ in plan.steps if horizons[f] is not None}
+    read_by_unbounded = {
+        g for f, reads in plan.reads.items() if f not in bounded for g in reads
+    }
+    return [
+        f
+        for f, _, _ in plan.steps
+        if f in bounded and (f == formula or f in read_by_unbounded)
+    ]
+
+
+class _SegmentMarking(marking.Marking):
+    """The markings of a finite run of states, seeded with the markings of
+    its propositions rather than read from the states themselves."""
+
+    def __init__(
+        self,
+        columns: dict[m.Mtl, marking.VarMarkings],
+        length: int,
+    ) -> None:
+        """Create the markings of `length` states with the given columns."""
+        self.columns = columns
+        super().__init__(marking.Trace.from_columns({}, length, None))
+
+    def _proposition_markings(self) -> dict[m.Mtl, marking.VarMarkings]:
+        """Return the given proposition columns."""
+        return self.columns
+
+
+def _evaluate_segment(
+    columns: dict[m.Mtl, marking.VarMarkings],
+    length: int,
+    formulas: tuple[m.Mtl, ...],
+    keep: int,
+) -> list[marking.VarMarkings]:
+    """Evaluate formulas over a finite run of `length` states, given by
+    their proposition columns, and return their first `keep` markings."""
+    markings = _SegmentMarking(columns, length)
+    return [marking.VarMarkings(list(markings[f])[:keep]) for f in formulas]
+
+
+class ParallelMarking(marking.Marking):
+    """Cached evaluator of MTL truth markings that splits the trace into
+    segments evaluated in separate processes."""
+
+    def __init__(
+        self,
+        trace: marking.Trace,
+        formula: m.Mtl,
+        *,
+        workers: int | None = None,
+        segment_length: int | None = None,
+        pinned: typing.Collection[m.Mtl] | None = None,
+    ) -> None:
+        """Initialize cached markings for one formula over a trace, using
+        `workers` processes (all cores by default) over segments of
+        `segment_length` positions (one per worker by default)."""
+        self.formula = formula
+        self.workers = workers or os.cpu_count() or 1
+        self.segment_length = segment_length or -(-len(trace) // self.workers)
+        super().__init__(trace, formula, pinned=pinned)
+
+    def _segments(
+        self,
+        columns: dict[m.Mtl, marking.VarMarkings],
+        lookahead: int,
+    ) -> typing.Iterator[tuple[dict[m.Mtl, marking.VarMarkings], int]]:
+        """Slice the proposition columns into segments that each extend
+        `lookahead` positions past their end, unrolling the lasso."""
+        n = len(self.trace)
+        for start in range(0, n, self.segment_length):
+            stop = start + self.segment_length + lookahead
+            if self.trace.loop_start is None:
+                stop = min(stop, n)
+            ks = self.trace.indices(start, stop)
+            yield {
+                p: marking.VarMarkings([vs[k] for k in ks])
+                for p, vs in columns.items()
+            }, len(ks)
+
+    def _proposition_markings(self) -> dict[m.Mtl, marking.VarMarkings]:
+        """Seed the proposition markings with those of every maximal
+        bounded subformula, evaluated segment by segment."""
+        markings = self.trace.to_var_markings()
+        roots = tuple(bounded_roots(self.formula))
+        n = len(self.trace)
+        if not roots or self.workers == 1 or n <= self.segment_length:
+            return markings
+        horizons = m.horizons(self.formula)
+        lookahead = max(horizons[f] or 0 for f in roots)
+        columns, lengths = zip(
+            *self._segments(markings, lookahead),
+            strict=True,
+        )
+        values: list[list[bool | int]] = [[] for _ in roots]
+        with concurrent.futures.ProcessPoolExecutor(self.workers) as pool:
+            for segment in pool.map(
+                _evaluate_segment,
+                columns,
+                lengths,
+                [roots] * len(lengths),
+                [self.segment_length] * len(lengths),
+            ):
+                for vs, part in zip(values, segment, strict=True):
+                    vs.extend(part)
+        for f, vs in zip(roots, values, strict=True):
+            markings[f] = marking.VarMarkings(vs[:n])
+        return markings
@@ -0,0 +1,396 @@
+"""Trace markings stored as runs of equal values.
+
+Counterexamples often keep the same valuation for long stretches, so each
+marking is stored as the end and value of each maximal run of equal
+values. Boolean operators merge the runs of their operands, and temporal
+operators split each run of the distance to the next witness at the few
+positions where their verdict can change, so evaluating a formula costs
+time in the number of runs rather than the number of states.
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import sys
+import typing
+from array import array
+
+from src import marking
+from src.logic import mtl as m
+
+Value = bool | int
+Targets = list[tuple[int, int | None]]
+
+
+def _same(v: Value, w: Value) -> bool:
+    """Check whether two markings are equal and render the same."""
+    return v == w and type(v) is type(w)
+
+
+class RunMarkings(marking.VarMarkings):
+    """
+    Markings for a formula over a trace, stored as runs of equal values.
+    Indexes beyond the length of the trace return True.
+    """
+
+    def __init__(  # pylint: disable=super-init-not-called
+        self,
+        ends: array[int],
+        values: list[Value],
+    ) -> None:
+        """Create markings from the exclusive end and value of each run."""
+        self.ends = ends
+        self.values = values
+
+    @classmethod
+    def from_values(cls, values: typing.Iterable[Value]) -> RunMarkings:
+        """Collapse a sequence of markings into runs."""
+        runs = cls(array("q"), [])
+        stop = 0
+        for (_, v), group in itertools.groupby(
+            zip(map(type, values), values, strict=False),
+        ):
+            stop += len(list(group))
+            runs.add_run(stop, v)
+        return runs
+
+    @classmethod
+    def constant(cls, value: Value, length: int) -> RunMarkings:
+        """Return `length` markings that all equal value."""
+        runs = cls(array("q"), [])
+        runs.add_run(length, value)
+        return runs
+
+    def runs(self) -> typing.Iterator[tuple[int, int, Value]]:
+        """Iterate over the start, end and value of each run."""
+        start = 0
+        for stop, v in zip(self.ends, self.values, strict=True):
+            yield start, stop, v
+            start = stop
+
+    def add_run(self, stop: int, value: Value) -> None:
+        """Extend the markings with value up to position `stop`, merging
+        it into the last run if equal."""
+        if stop <= len(self):
+            return
+        if self.values and _same(self.values[-1], value):
+            self.ends[-1] = stop
+        else:
+            self.ends.append(stop)
+            self.values.append(value)
+
+    def __getitem__(self, i: int) -> Value:
+        """Return the marking at index i, defaulting to True out of range."""
+        if i >= len(self):
+            return True
+        return self.values[bisect.bisect_right(self.ends, i)]
+
+    def __len__(self) -> int:
+        """Return the finite number of stored markings."""
+        return self.ends[-1] if self.ends else 0
+
+    def __iter__(self) -> typing.Iterator[Value]:
+        """Iterate over stored marking values in order."""
+        for start, stop, v in self.runs():
+            yield from itertools.repeat(v, stop - start)
+
+    def append(self, value: Value) -> None:
+        """Append one marking value at the end of the sequence."""
+        self.add_run(len(self) + 1, value)
+
+    def memory_usage(self) -> int:
+        """Return the number of bytes held by the runs."""
+        return sys.getsizeof(self.ends) + sys.getsizeof(self.values)
+
+
+def _slice(
+    runs: RunMarkings,
+    start: int,
+    stop: int,
+) -> typing.Iterator[tuple[int, Value]]:
+    """Yield the runs within positions [start, stop), each as its end
+    relative to start and its value."""
+    k = bisect.bisect_right(runs.ends, start)
+    while k < len(runs.ends) and start < stop:
+        end = min(runs.ends[k], stop)
+        yield end - start, runs.values[k]
+        k += 1
+        if end == stop:
+            return
+
+
+def _combine(
+    left: RunMarkings,
+    right: RunMarkings,
+    op: typing.Callable[[Value, Value], Value],
+) -> RunMarkings:
+    """Apply a pointwise operator to two markings, run by run."""
+    out = RunMarkings(array("q"), [])
+    i = j = 0
+    while i < len(left.ends) and j < len(right.ends):
+        stop = min(left.ends[i], right.ends[j])
+        out.add_run(stop, op(left.values[i], right.values[j]))
+        i += left.ends[i] == stop
+        j += right.ends[j] == stop
+    return out
+
+
+def _segments(
+    targets: list[Targets],
+) -> typing.Iterator[tuple[int, int, list[int | None]]]:
+    """Merge target lists over the same positions, yielding the start and
+    end of each segment on which none of them changes, with their
+    targets there."""
+    cursors = [0] * len(targets)
+    start = 0
+    while all(k < len(ts) for ts, k in zip(targets, cursors, strict=True)):
+        segment = [ts[k] for ts, k in zip(targets, cursors, strict=True)]
+        stop = min(end for end, _ in segment)
+        yield start, stop, [target for _, target in segment]
+        for t, (end, _) in enumerate(segment):
+            cursors[t] += end == stop
+        start = stop
+
+
+def _verdicts(
+    targets: list[Targets],
+    width: int | None,
+    holds: typing.Callable[[list[int | None], int | None], bool],
+) -> RunMarkings:
+    """Mark each concrete position by whether `holds` accepts the distances
+    from it to the targets, given the window width.
+
+    Within a segment, each distance is either zero or falls by one per
+    step, so the verdict can only change where one reaches zero or the
+    width.
+    """
+    out = RunMarkings(array("q"), [])
+    for start, stop, ts in _segments(targets):
+        cuts = {start, stop}
+        for t in ts:
+            if t is not None:
+                cuts.update((t, t - (width or 0)))
+        points = sorted(c for c in cuts if start <= c <= stop)
+        for x, y in itertools.pairwise(points):
+            ds = [None if t is None else max(t - x, 0) for t in ts]
+            out.add_run(y, holds(ds, width))
+    return out
+
+
+class RleMarking(marking.Marking):
+    """Cached evaluator of MTL truth markings over run-length encoded
+    markings."""
+
+    def _proposition_markings(self) -> dict[m.Mtl, marking.VarMarkings]:
+        """Build the runs of each proposition by collapsing its column of
+        the trace, in one pass over it."""
+        return {
+            f: RunMarkings.from_values(vs)
+            for f, vs in self.trace.to_markings().items()
+        }
+
+    def __getitem__(self, f: m.Mtl) -> marking.VarMarkings:
+        """Return cached or computed markings for formula f."""
+        if isinstance(f, (m.TrueBool, m.FalseBool)):
+            return RunMarkings.constant(
+                isinstance(f, m.TrueBool),
+                len(self.trace),
+            )
+        return super().__getitem__(f)
+
+    def _runs(self, f: m.Mtl) -> RunMarkings:
+        """Return the markings of f as runs."""
+        vs = self[f]
+        if isinstance(vs, RunMarkings):
+            return vs
+        return RunMarkings.from_values(vs)
+
+    def _logical(self, runs: RunMarkings, start: int, stop: int) -> RunMarkings:
+        """Read runs at logical positions start, ..., stop - 1, following
+        the lasso loop or padding a finite trace with true states."""
+        n = len(self.trace)
+        loop_start = self.trace.loop_start
+        length = stop - start
+        if loop_start is not None and start >= n:
+            start = loop_start + (start - loop_start) % (n - loop_start)
+        out = RunMarkings(array("q"), [])
+        for end, v in _slice(runs, start, min(n, start + length)):
+            out.add_run(end, v)
+        if len(out) >= length:
+            return out
+        if loop_start is None:
+            out.add_run(length, value=True)
+            return out
+        loop = list(_slice(runs, loop_start, n))
+        while len(out) < length:
+            base = len(out)
+            for end, v in loop:
+                out.add_run(min(base + end, length), v)
+        return out
+
+    def _targets(self, runs: RunMarkings, value: bool) -> Targets:
+        """Split the concrete positions into segments, each with the end of
+        the segment and the logical position T of the next marking equal
+        to value, so that its distance from s is max(T - s, 0).
+
+        T is None if no such marking recurs. As in
+        :meth:`src.marking.Marking._next_distances`, the segment at the end
+        of the trace looks ahead into the lasso loop or the padding.
+        """
+        n = len(self.trace)
+        loop_start = self.trace.loop_start
+        after: int | None = n if value else None
+        if loop_start is not None:
+            after = next(
+                (
+                    n + max(start, loop_start) - loop_start
+                    for start, stop, v in runs.runs()
+                    if stop > loop_start and bool(v) == value
+                ),
+                None,
+            )
+        targets: Targets = []
+        for start, stop, v in reversed(list(runs.runs())):
+            if bool(v) == value:
+                after = start
+            targets.append((stop, after))
+        targets.reverse()
+        return targets
+
+    def _next_distances(
+        self,
+        vs: marking.VarMarkings,
+        value: bool,
+    ) -> list[int | None]:
+        """Distance from each position to the next one marked `value`, or None
+        if it never recurs, expanded from its segments."""
+        runs = (
+            vs if isinstance(vs, RunMarkings) else RunMarkings.from_values(vs)
+        )
+        ds: list[int | None] = []
+        start = 0
+        for stop, target in self._targets(runs, value):
+            if target is None:
+                ds.extend([None] * (stop - start))
+            elif target <= start:
+                ds.extend([0] * (stop - start))
+            else:
+                ds.extend(range(target - start, target - stop, -1))
+            start = stop
+        return ds
+
+    def _temporal(
+        self,
+        targets: list[Targets],
+        interval: m.Interval,
+        holds: typing.Callable[[list[int | None], int | None], bool],
+    ) -> RunMarkings:
+        """Mark each position by whether `holds` accepts the distances to the
+        next witnesses from its window start, given the window width."""
+        a, b = interval
+        verdicts = _verdicts(targets, None if b is None else b - a, holds)
+        return self._logical(verdicts, a, a + len(self.trace))
+
+    def _get_not(self, operand: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise negation markings for a subformula."""
+        out = RunMarkings(array("q"), [])
+        for _, stop, v in self._runs(operand).runs():
+            out.add_run(stop, not v)
+        return out
+
+    def _get_and(self, left: m.Mtl, right: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise conjunction markings for two subformulae."""
+        return _combine(
+            self._runs(left),
+            self._runs(right),
+            lambda l, r: l and r,
+        )
+
+    def _get_or(self, left: m.Mtl, right: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise disjunction markings for two subformulae."""
+        return _combine(
+            self._runs(left),
+            self._runs(right),
+            lambda l, r: l or r,
+        )
+
+    def _get_implies(self, left: m.Mtl, right: m.Mtl) -> marking.VarMarkings:
+        """Compute pointwise implication markings for two subformulae."""
+        return _combine(
+            self._runs(left),
+            self._runs(right),
+            lambda l, r: (not l) or r,
+        )
+
+    def _get_next(
+        self,
+        operand: m.Mtl,
+        steps: int = 1,
+    ) -> marking.VarMarkings:
+        """Shift operand markings forward by `steps` logical steps."""
+        n = len(self.trace)
+        return self._logical(self._runs(operand), steps, n + steps)
+
+    def _get_eventually(
+        self,
+        operand: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded eventuality markings over the given interval."""
+        return self._temporal(
+            [self._targets(self._runs(operand), value=True)],
+            interval,
+            lambda ds, w: ds[0] is not None and (w is None or ds[0] <= w),
+        )
+
+    def _get_always(
+        self,
+        operand: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded invariance markings over the given interval."""
+        return self._temporal(
+            [self._targets(self._runs(operand), value=False)],
+            interval,
+            lambda ds, w: ds[0] is None or (w is not None and ds[0] > w),
+        )
+
+    def _get_until(
+        self,
+        left: m.Mtl,
+        right: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded-until markings for left and right operands: the
+        right operand recurs in time, no later than the left first fails."""
+        return self._temporal(
+            [
+                self._targets(self._runs(right), value=True),
+                self._targets(self._runs(left), value=False),
+            ],
+            interval,
+            lambda ds, w: ds[0] is not None
+            and (w is None or ds[0] <= w)
+            and (ds[1] is None or ds[0] <= ds[1]),
+        )
+
+    def _get_release(
+        self,
+        left: m.Mtl,
+        right: m.Mtl,
+        interval: m.Interval,
+    ) -> marking.VarMarkings:
+        """Compute bounded-release markings for left and right operands: the
+        left operand recurs in time, strictly before the right first
+        fails."""
+        return self._temporal(
+            [
+                self._targets(self._runs(left), value=True),
+                self._targets(self._runs(right), value=False),
+            ],
+            interval,
+            lambda ds, w: ds[0] is not None
+            and (w is None or ds[0] <= w)
+            and (ds[1] is None or ds[0] < ds[1]),
+        )
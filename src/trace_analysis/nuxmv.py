@@ -7,7 +7,7 @@ import subprocess
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from src import analyse_cex, custom_args, mtl2ltlspec, util
+from src import analyse_cex, custom_args, mtl2ltlspec, multi_weaken, util
 from src.trace_analysis import exceptions
 
 if TYPE_CHECKING:
@@ -118,25 +118,32 @@ def model_check(tmpdir: Path) -> None:
         raise
 
 
-def analyse_file(
-    trace_file: Path,
-    formula: mtl.Mtl,
-    de_bruijn: list[int],
+def weaken_analysis(
+    analysis: analyse_cex.AnalyseCex,
     show_markings: bool,
-) -> tuple[mtl.Interval, analyse_cex.AnalyseCex]:
-    """Analyze one produced counterexample trace and return a weakening."""
-    analysis = analyse_cex.AnalyseCex(
-        formula,
-        de_bruijn,
-        trace_file,
-        custom_args.ModelChecker.NUXMV,
-    )
+) -> mtl.Interval:
+    """Compute the weakening of one analysed counterexample trace."""
     if show_markings:
         print(f"\n{analysis.get_markings()}")
     result = analysis.get_weakened_interval()
     if result is None:
         raise exceptions.NoWeakeningError
-    return result, analysis
+    return result
+
+
+def counterexample_files(
+    tmpdir: Path,
+    model_file: Path,
+    formula: mtl.Mtl,
+    bound: int,
+) -> list[Path]:
+    """Run NuXmv bounded checking at every loopback and return the files of
+    the counterexample traces it finds."""
+    for loopback in range(bound):
+        write_commands_file(tmpdir, bound, loopback)
+        generate_model_file(tmpdir, model_file, formula)
+        model_check(tmpdir)
+    return list(tmpdir.glob(TRACE_FILE_GLOB))
 
 
 def analyse(
@@ -148,19 +155,44 @@ def analyse(
     show_markings: bool,
 ) -> tuple[int, int | None]:
     """Run NuXmv bounded checking and aggregate weakenings across traces."""
-    results: list[mtl.Interval] = []
-    for loopback in range(bound):
-        write_commands_file(tmpdir, bound, loopback)
-        generate_model_file(tmpdir, model_file, formula)
-        model_check(tmpdir)
-    for trace_file in tmpdir.glob(TRACE_FILE_GLOB):
-        result, analysis = analyse_file(
-            trace_file,
-            formula,
-            de_bruijn,
-            show_markings,
-        )
-        results.append(result)
-    if not results:
+    analyses = analyse_cex.analyse_batch(
+        formula,
+        de_bruijn,
+        counterexample_files(tmpdir, model_file, formula, bound),
+        custom_args.ModelChecker.NUXMV,
+    )
+    if not analyses:
         raise exceptions.PropertyValidError
-    return analysis.choose_weakest_interval(results)
+    results = [
+        weaken_analysis(analysis, show_markings) for analysis in analyses
+    ]
+    return analyses[-1].choose_weakest_interval(results)
+
+
+def analyse_holes(
+    tmpdir: Path,
+    model_file: Path,
+    formula: mtl.Mtl,
+    de_bruijns: list[list[int]],
+    bound: int,
+    show_markings: bool,
+    tradeoff: custom_args.Tradeoff,
+) -> dict[int, mtl.Interval]:
+    """Run NuXmv bounded checking and weaken several subformulae at once,
+    returning the new interval of each subformula weakened."""
+    trace_files = counterexample_files(tmpdir, model_file, formula, bound)
+    if not trace_files:
+        raise exceptions.PropertyValidError
+    analyses = multi_weaken.analyse_batch(
+        formula,
+        de_bruijns,
+        trace_files,
+        custom_args.ModelChecker.NUXMV,
+    )
+    if show_markings:
+        for analysis in analyses:
+            print(f"\n{analysis.markings}")
+    intervals = multi_weaken.weaken_round(analyses, tradeoff)
+    if intervals is None:
+        raise exceptions.NoWeakeningError
+    return intervals
@@ -9,22 +9,58 @@ from defusedxml import ElementTree
 from src import marking, util
 
 if typing.TYPE_CHECKING:
+    import os
+    from collections.abc import Collection, Iterator
     from xml.etree.ElementTree import Element  # nosec B405
 
 
-def parse(s: str) -> marking.Trace:
-    """Parse NuXmv XML trace text into the internal trace model."""
-    return xml_to_trace(ElementTree.fromstring(s))
+def parse(
+    s: str,
+    variables: Collection[str] | None = None,
+) -> marking.Trace:
+    """Parse NuXmv XML trace text into the internal trace model, keeping
+    only the given variables if any."""
+    return xml_to_trace(ElementTree.fromstring(s), variables)
 
 
-def _parse_state(state: Element) -> dict[str, util.Value]:
-    """Parse one XML state node into a variable-to-value mapping."""
+def iter_states(
+    source: str | os.PathLike[str] | typing.IO[bytes],
+    variables: Collection[str] | None = None,
+) -> Iterator[dict[str, util.Value]]:
+    """Lazily parse the states of a NuXmv XML trace file one at a time,
+    discarding each state's elements from the tree once it has been read.
+
+    As in :func:`src.marking.forward_fill`, variables left out of a state
+    keep their value from the previous state.
+    """
+    previous: dict[str, util.Value] = {}
+    root: Element | None = None
+    for event, element in ElementTree.iterparse(
+        source,
+        events=("start", "end"),
+    ):
+        if root is None:
+            root = element
+        elif event == "end" and element.tag == "node":
+            state = previous | _parse_state(element[0], variables)
+            root.clear()
+            yield state
+            previous = state
+
+
+def _parse_state(
+    state: Element,
+    variables: Collection[str] | None = None,
+) -> dict[str, util.Value]:
+    """Parse one XML state node into a variable-to-value mapping, skipping
+    variables not among `variables` if given."""
     state_dict = {}
     for item in state:
+        var = item.attrib["variable"]
+        if variables is not None and var not in variables:
+            continue
         assert item.text is not None
-        state_dict[item.attrib["variable"]] = util.str_to_value(
-            item.text,
-        )
+        state_dict[var] = util.str_to_value(item.text)
     return state_dict
 
 
@@ -35,16 +71,24 @@ def _parse_loops(loops: Element) -> int | None:
     return None if stripped == "" else int(stripped)
 
 
-def xml_to_trace(xml_element: Element) -> marking.Trace:
-    """Convert a parsed NuXmv XML element tree into a trace."""
-    states: list[dict[str, util.Value]] = []
+def xml_to_trace(
+    xml_element: Element,
+    variables: Collection[str] | None = None,
+) -> marking.Trace:
+    """Convert a parsed NuXmv XML element tree into a trace, recording each
+    variable only at the states that give it a value, and only the given
+    variables if any."""
+    changes: dict[str, list[tuple[int, util.Value]]] = {}
+    length = 0
     loop: int | None = None
     for node in xml_element:
         if node.tag == "node":
-            states.append(_parse_state(node[0]))
+            for var, value in _parse_state(node[0], variables).items():
+                changes.setdefault(var, []).append((length, value))
+            length += 1
         elif node.tag == "loops":
             loop = _parse_loops(node)
         else:
             util.eprint(f"Unexpected tag {node.tag} in XML trace")
-    assert loop is None or 0 <= loop < len(states)
-    return marking.Trace(states, loop)
+    assert loop is None or 0 <= loop < length
+    return marking.Trace.from_changes(changes, length, loop)
@@ -7,7 +7,7 @@ import subprocess
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from src import analyse_cex, custom_args, mtl2ltlspec, util
+from src import analyse_cex, custom_args, mtl2ltlspec, multi_weaken, util
 from src.trace_analysis import exceptions
 
 if TYPE_CHECKING:
@@ -152,19 +152,12 @@ def expand_trail_files(tmpdir: Path, trail_files: list[Path]) -> list[Path]:
     return output_files
 
 
-def analyse_file(
-    expanded_trail_file: Path,
+def weaken_analysis(
+    analysis: analyse_cex.AnalyseCex,
     formula: mtl.Mtl,
-    de_bruijn: list[int],
     show_markings: bool = False,
-) -> tuple[mtl.Interval, analyse_cex.AnalyseCex]:
-    """Analyze one expanded SPIN trace and return a weakening result."""
-    analysis = analyse_cex.AnalyseCex(
-        formula,
-        de_bruijn,
-        expanded_trail_file,
-        custom_args.ModelChecker.SPIN,
-    )
+) -> mtl.Interval:
+    """Compute the weakening of one analysed counterexample trace."""
     if show_markings:
         print(f"\n{analysis.get_markings()}")
     if analysis.does_formula_hold(formula):
@@ -174,17 +167,16 @@ def analyse_file(
     result = analysis.get_weakened_interval()
     if result is None:
         raise exceptions.NoWeakeningError
-    return result, analysis
+    return result
 
 
-def analyse(
+def counterexample_files(
     tmpdir: Path,
     model_file: Path,
     formula: mtl.Mtl,
-    de_bruijn: list[int],
-    show_markings: bool = False,
-) -> tuple[int, int | None]:
-    """Run SPIN end to end and choose a weakening from produced traces."""
+) -> list[Path]:
+    """Run SPIN end to end and return the files of the expanded
+    counterexample traces it finds."""
     generate_model_file(tmpdir, model_file, formula)
     spin_generate_c(tmpdir)
     compile_pan(tmpdir)
@@ -193,16 +185,54 @@ def analyse(
     trail_files = list(tmpdir.glob(f"{MODEL_FILE}*.trail"))
     if not trail_files:
         raise exceptions.PropertyValidError
-    output_files = expand_trail_files(tmpdir, trail_files)
-    results: list[mtl.Interval] = []
-    for file in output_files:
-        result, analysis = analyse_file(
-            file,
-            formula,
-            de_bruijn,
-            show_markings,
-        )
-        results.append(result)
-    if not results:
+    return expand_trail_files(tmpdir, trail_files)
+
+
+def analyse(
+    tmpdir: Path,
+    model_file: Path,
+    formula: mtl.Mtl,
+    de_bruijn: list[int],
+    show_markings: bool = False,
+) -> tuple[int, int | None]:
+    """Run SPIN end to end and choose a weakening from produced traces."""
+    analyses = analyse_cex.analyse_batch(
+        formula,
+        de_bruijn,
+        counterexample_files(tmpdir, model_file, formula),
+        custom_args.ModelChecker.SPIN,
+    )
+    if not analyses:
         raise exceptions.PropertyValidError
-    return analysis.choose_weakest_interval(results)
+    results = [
+        weaken_analysis(analysis, formula, show_markings)
+        for analysis in analyses
+    ]
+    return analyses[-1].choose_weakest_interval(results)
+
+
+def analyse_holes(
+    tmpdir: Path,
+    model_file: Path,
+    formula: mtl.Mtl,
+    de_bruijns: list[list[int]],
+    show_markings: bool,
+    tradeoff: custom_args.Tradeoff,
+) -> dict[int, mtl.Interval]:
+    """Run SPIN end to end and weaken several subformulae at once,
+    returning the new interval of each subformula weakened."""
+    analyses = multi_weaken.analyse_batch(
+        formula,
+        de_bruijns,
+        counterexample_files(tmpdir, model_file, formula),
+        custom_args.ModelChecker.SPIN,
+    )
+    if not analyses:
+        raise exceptions.PropertyValidError
+    if show_markings:
+        for analysis in analyses:
+            print(f"\n{analysis.markings}")
+    intervals = multi_weaken.weaken_round(analyses, tradeoff)
+    if intervals is None:
+        raise exceptions.NoWeakeningError
+    return intervals
@@ -6,7 +6,10 @@ import json
 import typing
 from collections import OrderedDict
 
-from src import marking
+from src import marking, util
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Collection, Iterable, Iterator
 
 
 def parse_variables(s: str) -> dict[str, int | str]:
@@ -17,15 +20,20 @@ def parse_variables(s: str) -> dict[str, int | str]:
 def expand_state(
     state: dict[str, int | str],
     state_values: OrderedDict[str, None],
+    variables: Collection[str] | None = None,
 ) -> dict[str, int]:
-    """Expand symbolic state labels into boolean proposition variables."""
+    """Expand symbolic state labels into boolean proposition variables,
+    keeping only the given variables if any."""
     expanded: dict[str, int] = {}
     for k, v in state.items():
         if isinstance(v, int):
-            expanded[k] = v
+            if variables is None or k in variables:
+                expanded[k] = v
         elif isinstance(v, str):
             for val in state_values:
-                expanded[f"{val}_p"] = v == val
+                var = f"{val}_p"
+                if variables is None or var in variables:
+                    expanded[var] = v == val
         else:
             msg = f"Unexpected variable type: {type(v)}"
             raise TypeError(msg)
@@ -33,16 +41,14 @@ def expand_state(
 
 
 def clear_nonappearing_states(
-    states: list[dict[str, int]],
+    changes: dict[str, list[tuple[int, util.Value]]],
     state_values: OrderedDict[str, None],
 ) -> None:
     """Remove generated state propositions that never hold in the trace."""
-    state_variables = {f"{val}_p" for val in state_values}
-    for var in state_variables:
-        appears = any(state.get(var, 0) == 1 for state in states)
-        if not appears:
-            for state in states:
-                state.pop(var)
+    for val in state_values:
+        var = f"{val}_p"
+        if not any(v == 1 for _, v in changes.get(var, [])):
+            changes.pop(var, None)
 
 
 def get_state_values(
@@ -57,8 +63,12 @@ def get_state_values(
     return state_values
 
 
-def parse(s: str) -> marking.Trace:
-    """Parse expanded SPIN trail text into the internal trace model."""
+def parse(
+    s: str,
+    variables: Collection[str] | None = None,
+) -> marking.Trace:
+    """Parse expanded SPIN trail text into the internal trace model, keeping
+    only the given variables if any."""
     lines = s.strip().split("\n")
     states: list[dict[str, int | str]] = []
     state_i = 0
@@ -71,9 +81,36 @@ def parse(s: str) -> marking.Trace:
             states.append(parse_variables(line))
             state_i += 1
     state_values = get_state_values(states)
-    expanded_states = [expand_state(state, state_values) for state in states]
-    clear_nonappearing_states(expanded_states, state_values)
-    return marking.Trace(
-        typing.cast("list[dict[str, bool | int | str]]", expanded_states),
-        loop_i,
+    changes: dict[str, list[tuple[int, util.Value]]] = {}
+    for i, state in enumerate(states):
+        for k, v in expand_state(state, state_values, variables).items():
+            changes.setdefault(k, []).append((i, v))
+    clear_nonappearing_states(changes, state_values)
+    return marking.Trace.from_changes(changes, len(states), loop_i)
+
+
+def iter_states(
+    lines: Iterable[str],
+    variables: Collection[str] | None = None,
+) -> Iterator[dict[str, int]]:
+    """Lazily parse SPIN trail lines into expanded states one at a time.
+
+    Cycle markers are skipped, as a stream has no loop, and state labels
+    are expanded against those seen so far. Only the given variables are
+    kept, if any, and the state propositions among them are false in the
+    states before their label first appears, as in :func:`parse`.
+    Without `variables`, a label that has not yet appeared is missing from
+    the state.
+    """
+    absent: dict[str, int] = (
+        {}
+        if variables is None
+        else {var: False for var in variables if var.endswith("_p")}
     )
+    state_values: OrderedDict[str, None] = OrderedDict()
+    for line in lines:
+        if not line.strip() or line.startswith("START OF CYCLE"):
+            continue
+        state = parse_variables(line)
+        state_values.update(get_state_values([state]))
+        yield absent | expand_state(state, state_values, variables)
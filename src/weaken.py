@@ -2,11 +2,18 @@
 
 from __future__ import annotations
 
+from collections.abc import Generator
 from typing import cast
 
 from src import marking
 from src.logic import ctx, mtl
 
+Steps = Generator[
+    tuple[ctx.Ctx, int],
+    mtl.Interval | None,
+    mtl.Interval | None,
+]
+
 
 def min_option(a: int, b: int | None) -> int:
     """Return min(a, b), treating None as an unbounded upper value."""
@@ -15,8 +22,30 @@ def min_option(a: int, b: int | None) -> int:
     return min(a, b)
 
 
+def queried_formulas(
+    context: ctx.Ctx,
+    subformula: mtl.Mtl,
+) -> frozenset[mtl.Mtl]:
+    """Return the formulae whose markings weakening reads: the formulae
+    beside the context's path to the hole, and the operands of the
+    subformula in the hole."""
+    formulas = set(ctx.side_formulas(context))
+    if isinstance(subformula, (mtl.Until, mtl.Release)):
+        formulas.update((subformula.left, subformula.right))
+    elif isinstance(subformula, (mtl.Eventually, mtl.Always)):
+        formulas.add(subformula.operand)
+    return frozenset(formulas)
+
+
 class Weaken:
-    """Compute trace-guided interval weakenings for temporal subformulas."""
+    """Compute trace-guided interval weakenings for temporal subformulas.
+
+    The weakening of each context node at each position is memoised, keyed
+    on the concrete trace position, as positions that share a concrete
+    state in the lasso loop, or lie past the end of a finite trace, have
+    the same weakening. Nested temporal contexts then visit each pair once
+    rather than once per enclosing window.
+    """
 
     def __init__(
         self,
@@ -43,6 +72,7 @@ class Weaken:
             msg = f"Cannot weaken MTL subformula: {self.subformula}"
             raise TypeError(msg)
         self.original_interval = self.subformula.interval
+        self.memo: dict[tuple[ctx.Ctx, int], mtl.Interval | None] = {}
 
     def _interval_abs_diff(
         self,
@@ -68,46 +98,47 @@ class Weaken:
         c: ctx.Ctx,
         f: mtl.Mtl,
         trace_idx: int,
-    ) -> mtl.Interval | None:
+    ) -> Steps:
         """Weaken an interval within the Conjunction operator"""
         if not self.markings.get(f, trace_idx):
             return None
-        return self._aux(c, trace_idx)
+        return (yield c, trace_idx)
 
     def _aux_or(
         self,
         c: ctx.Ctx,
         f: mtl.Mtl,
         trace_idx: int,
-    ) -> mtl.Interval | None:
+    ) -> Steps:
         """Weaken an interval within the Disjunction operator"""
         if self.markings.get(f, trace_idx):
             return self.original_interval
-        return self._aux(c, trace_idx)
+        return (yield c, trace_idx)
 
     def _aux_eventually(
         self,
         c: ctx.Eventually,
         trace_idx: int,
-    ) -> mtl.Interval | None:
+    ) -> Steps:
         """Weaken an interval within the Always operator"""
         a, b = c.interval
         right_idx = min_option(self.trace.right_idx(a), b)
-        all_intervals = [
-            self._aux(c.operand, trace_idx + i) for i in range(a, right_idx + 1)
-        ]
-        intervals = [i for i in all_intervals if i is not None]
-        if intervals == []:
+        intervals = []
+        for i in range(a, right_idx + 1):
+            interval = yield c.operand, trace_idx + i
+            if interval is not None:
+                intervals.append(interval)
+        if not intervals:
             return None
         return min(intervals, key=self._interval_abs_diff)
 
-    def _aux_always(self, c: ctx.Always, trace_idx: int) -> mtl.Interval | None:
+    def _aux_always(self, c: ctx.Always, trace_idx: int) -> Steps:
         """Weaken an interval within the Always operator"""
         a, b = c.interval
         right_idx = min_option(self.trace.right_idx(a), b)
         intervals = []
         for i in range(a, right_idx + 1):
-            interval = self._aux(c.operand, trace_idx + i)
+            interval = yield c.operand, trace_idx + i
             if interval is None:
                 return None
             intervals.append(interval)
@@ -117,17 +148,19 @@ class Weaken:
         self,
         c: ctx.UntilLeft,
         trace_idx: int,
-    ) -> mtl.Interval | None:
+    ) -> Steps:
         """Weaken an interval within the Until operator on the left"""
         a, b = c.interval
         right_idx = min_option(self.trace.right_idx(a), b)
+        rights = self.markings[c.right]
+        positions = self.trace.indices(trace_idx + a, trace_idx + right_idx + 1)
         intervals: list[mtl.Interval] = []
-        for i in range(a, right_idx + 1):
-            if self.markings.get(c.right, trace_idx + i):
+        for i, k in enumerate(positions, start=a):
+            if rights[k]:
                 if i == a:
                     return self.original_interval
                 return max(intervals, key=self._interval_abs_diff)
-            interval = self._aux(c.left, trace_idx + i)
+            interval = yield c.left, trace_idx + i
             if interval is None:
                 return None
             intervals.append(interval)
@@ -137,16 +170,18 @@ class Weaken:
         self,
         c: ctx.UntilRight,
         trace_idx: int,
-    ) -> mtl.Interval | None:
+    ) -> Steps:
         """Weaken an interval within the Until operator on the right"""
         a, b = c.interval
         right_idx = min_option(self.trace.right_idx(a), b)
+        lefts = self.markings[c.left]
+        positions = self.trace.indices(trace_idx + a, trace_idx + right_idx + 1)
         intervals: list[mtl.Interval] = []
-        for i in range(a, right_idx + 1):
-            interval = self._aux(c.right, trace_idx + i)
+        for i, k in enumerate(positions, start=a):
+            interval = yield c.right, trace_idx + i
             if interval is not None:
                 intervals.append(interval)
-            if not self.markings.get(c.left, trace_idx + i):
+            if not lefts[k]:
                 break
         if not intervals:
             return None
@@ -156,15 +191,17 @@ class Weaken:
         self,
         c: ctx.ReleaseLeft,
         trace_idx: int,
-    ) -> mtl.Interval | None:
+    ) -> Steps:
         """Weaken an interval within the Release operator on the left"""
         a, b = c.interval
         right_idx = min_option(self.trace.right_idx(a), b)
+        rights = self.markings[c.right]
+        positions = self.trace.indices(trace_idx + a, trace_idx + right_idx + 1)
         intervals: list[mtl.Interval] = []
-        for i in range(a, right_idx + 1):
-            if not self.markings.get(c.right, trace_idx + i):
+        for i, k in enumerate(positions, start=a):
+            if not rights[k]:
                 break
-            interval = self._aux(c.left, trace_idx + i)
+            interval = yield c.left, trace_idx + i
             if interval is not None:
                 intervals.append(interval)
         if not intervals:
@@ -175,17 +212,22 @@ class Weaken:
         self,
         c: ctx.ReleaseRight,
         trace_idx: int,
-    ) -> mtl.Interval | None:
+    ) -> Steps:
         """Weaken an interval within the Release operator on the right"""
         a, b = c.interval
         right_idx = min_option(self.trace.right_idx(a), b)
+        lefts = self.markings[c.left]
+        positions = self.trace.indices(
+            trace_idx + 2 * a,
+            trace_idx + a + right_idx + 1,
+        )
         intervals: list[mtl.Interval] = []
-        for i in range(a, right_idx + 1):
-            interval = self._aux(c.right, trace_idx + i)
+        for i, k in enumerate(positions, start=a):
+            interval = yield c.right, trace_idx + i
             if interval is None:
                 return None
             intervals.append(interval)
-            if self.markings.get(c.left, trace_idx + i + a):
+            if lefts[k]:
                 break
         assert intervals
         return max(intervals, key=self._interval_abs_diff)
@@ -200,11 +242,11 @@ class Weaken:
         if b is None:
             msg = f"Cannot weaken interval of F[{a}, ∞)"
             raise ValueError(msg)
-        # Expand the interval until we find a state when the operand is true
-        for i in range(a, self.trace.right_idx(a) + 1):
-            if self.markings.get(f.operand, trace_idx + i):
-                return a, max(b, i)
-        return None
+        # Expand the interval up to the next state when the operand is true
+        d = self.markings.distance(f.operand, trace_idx + a, value=True)
+        if d is None or a + d > self.trace.right_idx(a):
+            return None
+        return a, max(b, a + d)
 
     def _weaken_direct_always(
         self,
@@ -213,15 +255,15 @@ class Weaken:
     ) -> mtl.Interval | None:
         """Directly weaken interval of Always operator."""
         a, b = f.interval
-        # Expand the interval until we find a state when the operand is false,
+        # Find the next state when the operand is false,
         # then reduce the interval to just before that
         right_idx = min_option(self.trace.right_idx(a), b)
-        for i in range(a, right_idx + 1):
-            if not self.markings.get(f.operand, trace_idx + i):
-                if i == a:
-                    return None
-                return a, i - 1
-        return a, b
+        d = self.markings.distance(f.operand, trace_idx + a, value=False)
+        if d is None or a + d > right_idx:
+            return a, b
+        if d == 0:
+            return None
+        return a, a + d - 1
 
     def _weaken_direct_until(
         self,
@@ -233,12 +275,13 @@ class Weaken:
         if b is None:
             msg = f"Cannot weaken interval of U[{a}, ∞)"
             raise ValueError(msg)
-        for i in range(a, self.trace.right_idx(a) + 1):
-            if self.markings.get(f.right, trace_idx + i):
-                return a, max(b, i)
-            if not self.markings.get(f.left, trace_idx + i):
-                break
-        return None
+        d_right = self.markings.distance(f.right, trace_idx + a, value=True)
+        d_left = self.markings.distance(f.left, trace_idx + a, value=False)
+        if d_right is None or a + d_right > self.trace.right_idx(a):
+            return None
+        if d_left is not None and d_left < d_right:
+            return None
+        return a, max(b, a + d_right)
 
     def _weaken_direct_release(
         self,
@@ -248,14 +291,15 @@ class Weaken:
         """Directly weaken interval of Release operator."""
         a, b = f.interval
         right_idx = min_option(self.trace.right_idx(a), b)
-        for i in range(a, right_idx + 1):
-            if not self.markings.get(f.right, trace_idx + i):
-                if i == a:
-                    return None
-                return a, i - 1
-            if self.markings.get(f.left, trace_idx + i):
-                return a, b
-        return a, b
+        d_right = self.markings.distance(f.right, trace_idx + a, value=False)
+        d_left = self.markings.distance(f.left, trace_idx + a, value=True)
+        if d_right is None or a + d_right > right_idx:
+            return a, b
+        if d_left is not None and d_left < d_right:
+            return a, b
+        if d_right == 0:
+            return None
+        return a, a + d_right - 1
 
     def _weaken_direct(self, trace_idx: int) -> mtl.Interval | None:
         """Dispatch direct interval weakening based on temporal operator type."""
@@ -271,9 +315,43 @@ class Weaken:
         raise ValueError(msg)
 
     def _aux(self, c: ctx.Ctx, trace_idx: int) -> mtl.Interval | None:
-        """Recursively weakens subformulas"""
-        if isinstance(c, ctx.Hole):
-            return self._weaken_direct(trace_idx)
+        """Weaken the subformula within a context node at a position,
+        memoised per context node and concrete trace position.
+
+        Each node is weakened by a generator that yields the child node
+        and position whose weakening it needs next and is sent it back.
+        The generators of the nodes being weakened are kept on an explicit
+        stack, so the depth of the context is not bounded by the recursion
+        limit, and each node still only asks for the positions it reads.
+        """
+        memo = self.memo
+        idx = self.trace.idx
+        stack: list[tuple[tuple[ctx.Ctx, int], Steps]] = []
+        request: tuple[ctx.Ctx, int] | None = (c, trace_idx)
+        value = None
+        while True:
+            if request is not None:
+                key = request[0], min(idx(request[1]), self.trace_len)
+                if key in memo:
+                    value = memo[key]
+                elif isinstance(key[0], ctx.Hole):
+                    value = memo[key] = self._weaken_direct(key[1])
+                else:
+                    stack.append((key, self._aux_uncached(*key)))
+                    value = None
+            if not stack:
+                return value
+            key, steps = stack[-1]
+            try:
+                request = steps.send(value)
+            except StopIteration as stop:
+                stack.pop()
+                value = memo[key] = stop.value
+                request = None
+
+    def _aux_uncached(self, c: ctx.Ctx, trace_idx: int) -> Steps:
+        """Return the steps weakening the subformula within one context
+        node, other than the hole, at one position"""
         if isinstance(c, ctx.AndLeft):
             return self._aux_and(c.left, c.right, trace_idx)
         if isinstance(c, ctx.AndRight):
@@ -300,3 +378,13 @@ class Weaken:
     def weaken(self) -> mtl.Interval | None:
         """Return the best weakening for the configured context and trace."""
         return self._aux(self.context, 0)
+
+    def holds_with(self, interval: mtl.Interval) -> bool:
+        """Check whether the formula holds on the trace when the subformula
+        takes the given interval, reusing the subformula's witness profile
+        and the markings of the rest of the context."""
+        assert isinstance(self.subformula, mtl.Temporal)
+        self.markings.with_interval(self.subformula, interval)
+        subformula = mtl.substitute_interval(self.subformula, interval)
+        formula = ctx.substitute(self.context, subformula)
+        return bool(self.markings.get(formula, 0))
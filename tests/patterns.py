@@ -0,0 +1,29 @@
+"""Traces and formulae shared by the tests of the marking backends."""
+
+BOUNDED_FORMULAS = [
+    "(!(a) -> X (b))",
+    "X (X ((a | !(b))))",
+    "G[0, 4] (F[1, 3] (b))",
+    "F[2, 50] (G[0, 2] (!(a)))",
+    "(a U[1, 3] b)",
+    "(b R[0, 5] !(a))",
+]
+
+FORMULAS = [
+    *BOUNDED_FORMULAS,
+    "G (F (a))",
+    "((a | b) U (a & b))",
+    "(a R (a | b))",
+]
+
+
+def pattern_states(
+    length: int,
+    shift: int = 0,
+) -> list[dict[str, bool | int | str]]:
+    """Build states whose propositions follow short coprime periods, with
+    an integer timer alongside, starting `shift` steps into the periods."""
+    return [
+        {"a": i % 3 == 0, "b": i % 5 == 1, "timer": i % 4}
+        for i in range(shift, shift + length)
+    ]
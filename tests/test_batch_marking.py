@@ -0,0 +1,80 @@
+"""Unit tests for the batched multi-trace marking engine."""
+
+import sys
+import unittest
+from pathlib import Path
+
+from src import analyse_cex, batch_marking, custom_args, marking
+from src.logic import parser
+
+from tests import patterns
+
+
+def _traces() -> list[marking.Trace]:
+    """Build a batch of finite and lasso traces of different lengths."""
+    return [
+        marking.Trace(patterns.pattern_states(11, 0), None),
+        marking.Trace(patterns.pattern_states(7, 1), 0),
+        marking.Trace(patterns.pattern_states(13, 2), 4),
+        marking.Trace(patterns.pattern_states(1, 3), None),
+        marking.Trace(patterns.pattern_states(9, 4), 8),
+    ]
+
+
+class TestBatchMarking(unittest.TestCase):
+
+    def test_matches_single_trace_markings(self) -> None:
+        for s in patterns.FORMULAS:
+            formula = parser.parse_mtl(s)
+            batch = batch_marking.BatchMarking(_traces(), formula)
+            for t, trace in enumerate(_traces()):
+                expected = list(marking.Marking(trace, formula)[formula])
+                self.assertEqual(
+                    list(batch.marking(t)[formula]),
+                    expected,
+                    f"{s} @ trace {t}",
+                )
+
+    def test_deeper_than_recursion_limit(self) -> None:
+        depth = 2 * sys.getrecursionlimit()
+        formula = parser.parse_mtl("!(" * depth + "F[0, 2] (a)" + ")" * depth)
+        batch = batch_marking.BatchMarking(_traces(), formula)
+        for t, trace in enumerate(_traces()):
+            self.assertEqual(
+                list(batch.marking(t)[formula]),
+                list(marking.Marking(trace, formula)[formula]),
+            )
+
+    def test_rows_are_padded(self) -> None:
+        formula = parser.parse_mtl("X (a)")
+        batch = batch_marking.BatchMarking(_traces(), formula)
+        self.assertEqual(batch[formula].shape, (5, 13))
+        self.assertEqual(len(batch.marking(3)[formula]), 1)
+
+    def test_analyse_batch(self) -> None:
+        formula = parser.parse_mtl("G (F[0, 1] (timer))")
+        files = [
+            Path("tests/test_data/trace_valid.xml"),
+            Path("tests/test_data/trace_no_loop.xml"),
+        ]
+        analyses = analyse_cex.analyse_batch(
+            formula,
+            [0],
+            files,
+            custom_args.ModelChecker.NUXMV,
+        )
+        for analysis, file in zip(analyses, files, strict=True):
+            single = analyse_cex.AnalyseCex(
+                formula,
+                [0],
+                file,
+                custom_args.ModelChecker.NUXMV,
+            )
+            self.assertEqual(
+                analysis.get_weakened_interval(),
+                single.get_weakened_interval(),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
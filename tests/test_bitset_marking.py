@@ -0,0 +1,55 @@
+"""Unit tests for the integer bitset marking backend."""
+
+import unittest
+
+from src import bitset_marking, marking, util
+from src.logic import parser
+
+from tests import patterns
+
+FORMULAS = [*patterns.FORMULAS, "G[13, 15] ((a | b))"]
+
+
+class TestBitsetMarking(unittest.TestCase):
+
+    def test_matches_list_backend(self) -> None:
+        for loop_start in [None, 0, 4, 10]:
+            trace = marking.Trace(patterns.pattern_states(11), loop_start)
+            for s in FORMULAS:
+                formula = parser.parse_mtl(s)
+                expected = list(marking.Marking(trace, formula)[formula])
+                markings = bitset_marking.BitsetMarking(trace, formula)
+                self.assertEqual(
+                    list(markings[formula]),
+                    expected,
+                    f"{s} @ {loop_start}",
+                )
+
+    def test_packed_bits(self) -> None:
+        formula = parser.parse_mtl("(a | X (b))")
+        trace = marking.Trace(patterns.pattern_states(6), 3)
+        markings = bitset_marking.BitsetMarking(trace, formula)
+        result = markings[formula]
+        assert isinstance(result, bitset_marking.BitsetMarkings)
+        self.assertEqual(result.bits, 0b001001)
+        self.assertTrue(result[6])
+
+    def test_fmt_markings_integer_column(self) -> None:
+        formula = parser.parse_mtl("G[0, 1] (timer)")
+        trace = marking.Trace(patterns.pattern_states(5), 2)
+        expected = util.format_expect(
+            """
+                             0 1 2 3 4
+            G[0, 1] (timer) │ │●│●│ │ │
+            timer           │0│1│2│3│0│
+            b               │ │●│ │ │ │
+            a               │●│ │ │●│ │
+            =Lasso=              └───┘
+        """,
+        )
+        markings = bitset_marking.BitsetMarking(trace, formula)
+        self.assertEqual(util.format_expect(str(markings)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Unit tests for bottom-up interval weakening."""
+
+import unittest
+
+from src import bottom_up_weaken, marking, weaken
+from src.logic import ctx, parser
+
+from tests import patterns
+
+CASES = [
+    ("F G[0, 2] (a)", [0]),
+    ("G F[0, 4] (a)", [0]),
+    ("G[0, 3] (F[1, 5] (a) | b)", [0, 0]),
+    ("F[0, 6] (G[1, 2] (a) | b)", [0, 0]),
+    ("(a U[0, 6] F[0, 2] (b))", [1]),
+    ("(G[0, 2] (a) U[1, 5] b)", [0]),
+    ("(F[0, 3] (b) R[0, 6] a)", [0]),
+    ("(b R[2, 7] G[0, 1] (a))", [1]),
+]
+
+
+def _traces() -> list[marking.Trace]:
+    """Build finite and lasso traces of different shapes."""
+    return [
+        marking.Trace(patterns.pattern_states(9), None),
+        marking.Trace(patterns.pattern_states(2), None),
+        marking.Trace(patterns.pattern_states(7), 0),
+        marking.Trace(patterns.pattern_states(11), 5),
+    ]
+
+
+class TestBottomUpWeaken(unittest.TestCase):
+
+    def test_matches_top_down(self) -> None:
+        for s, path in CASES:
+            context, subformula = ctx.split_formula(parser.parse_mtl(s), path)
+            for t, trace in enumerate(_traces()):
+                self.assertEqual(
+                    bottom_up_weaken.BottomUpWeaken(
+                        context,
+                        subformula,
+                        trace,
+                    ).weaken(),
+                    weaken.Weaken(context, subformula, trace).weaken(),
+                    f"{s} @ trace {t}",
+                )
+
+    def test_intervals(self) -> None:
+        formula = parser.parse_mtl("F[0, 6] (G[1, 2] (a) | b)")
+        context, subformula = ctx.split_formula(formula, [0, 0])
+        trace = marking.Trace(patterns.pattern_states(9), None)
+        intervals = bottom_up_weaken.BottomUpWeaken(
+            context,
+            subformula,
+            trace,
+        ).intervals()
+        self.assertEqual(len(intervals), len(trace) + 1)
+        for k in range(len(trace)):
+            suffix = marking.Trace(patterns.pattern_states(9)[k:], None)
+            self.assertEqual(
+                intervals[k],
+                weaken.Weaken(context, subformula, suffix).weaken(),
+                f"position {k}",
+            )
+
+    def test_undefined_layer_is_lazy(self) -> None:
+        formula = parser.parse_mtl("(G[3, 5] (F[0, 1] (a)) & b)")
+        context, subformula = ctx.split_formula(formula, [0, 0])
+        trace = marking.Trace(patterns.pattern_states(2), None)
+        result = bottom_up_weaken.BottomUpWeaken(
+            context,
+            subformula,
+            trace,
+        ).weaken()
+        self.assertIsNone(result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 """Unit tests for formula context operations."""
 
+import sys
 import unittest
 
 from src.logic import ctx, mtl, parser
@@ -127,5 +128,40 @@ class TestPartialNNF(unittest.TestCase):
         self.assertEqual(result_context, ctx.Hole())
 
 
+class TestHorizon(unittest.TestCase):
+
+    def test_hole_horizon(self) -> None:
+        formula = parser.parse_mtl("G[0, 5] (a -> (b U[2, 3] F[0, 9] (c)))")
+        context, _ = ctx.split_formula(formula, [0, 1, 1])
+        self.assertEqual(ctx.horizon(context), 8)
+        context, _ = ctx.split_formula(formula, [0, 1, 0])
+        self.assertEqual(ctx.horizon(context), 8)
+        context = ctx.Next(ctx.Eventually(ctx.Hole(), (1, 4)))
+        self.assertEqual(ctx.horizon(context), 5)
+        context, _ = ctx.split_formula(parser.parse_mtl("G (F[0, 1] a)"), [0])
+        self.assertIsNone(ctx.horizon(context))
+
+
+class TestDeepContext(unittest.TestCase):
+
+    def test_deeper_than_recursion_limit(self) -> None:
+        depth = 2 * sys.getrecursionlimit()
+        formula = parser.parse_mtl(
+            "!(" * depth + "G[0, 2] (F[1, 3] (a) -> b)" + ")" * depth,
+        )
+        context, subformula = ctx.split_formula(formula, [0] * (depth + 1))
+        self.assertEqual(subformula, parser.parse_mtl("(F[1, 3] (a) -> b)"))
+        self.assertEqual(ctx.substitute(context, subformula), formula)
+        self.assertEqual(ctx.get_de_bruijn(context), [0] * (depth + 1))
+        self.assertEqual(ctx.horizon(context), 2)
+        self.assertEqual(
+            str(context),
+            "!(" * depth + "G[0, 2] ([-])" + ")" * depth,
+        )
+        nnf, polarity = ctx.partial_nnf_ctx(context)
+        self.assertEqual(nnf, ctx.Always(ctx.Hole(), (0, 2)))
+        self.assertTrue(polarity)
+
+
 if __name__ == "__main__":
     unittest.main()
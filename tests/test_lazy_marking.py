@@ -0,0 +1,88 @@
+"""Unit tests for the demand-driven lazy marking evaluator."""
+
+import sys
+import unittest
+
+import timeout_decorator
+from src import lazy_marking, marking, weaken
+from src.logic import ctx, mtl, parser
+
+from tests import patterns
+
+FORMULAS = [*patterns.FORMULAS, "(a U b)"]
+
+
+class TestLazyMarking(unittest.TestCase):
+
+    def test_matches_eager_marking(self) -> None:
+        for loop_start in [None, 0, 4, 10]:
+            trace = marking.Trace(patterns.pattern_states(11), loop_start)
+            for s in FORMULAS:
+                formula = parser.parse_mtl(s)
+                expected = list(marking.Marking(trace, formula)[formula])
+                markings = lazy_marking.LazyMarking(trace, formula)
+                self.assertEqual(
+                    list(markings[formula]),
+                    expected,
+                    f"{s} @ {loop_start}",
+                )
+
+    def test_only_reads_window(self) -> None:
+        formula = parser.parse_mtl("F[0, 3] (b)")
+        trace = marking.Trace(patterns.pattern_states(1000), None)
+        markings = lazy_marking.LazyMarking(trace, formula)
+        self.assertTrue(markings.get(formula, 0))
+        self.assertEqual(
+            sorted(k for f, k in markings.cells if f == mtl.Prop("b")),
+            [0, 1],
+        )
+
+    def test_deeper_than_recursion_limit(self) -> None:
+        depth = 2 * sys.getrecursionlimit()
+        formula = parser.parse_mtl("!(" * depth + "F[0, 2] (a)" + ")" * depth)
+        trace = marking.Trace(patterns.pattern_states(11), 4)
+        self.assertEqual(
+            list(lazy_marking.LazyMarking(trace, formula)[formula]),
+            list(marking.Marking(trace, formula)[formula]),
+        )
+
+    def test_distance(self) -> None:
+        formula = mtl.Prop("b")
+        trace = marking.Trace(patterns.pattern_states(8), 4)
+        markings = lazy_marking.LazyMarking(trace, formula)
+        eager = marking.Marking(trace, formula)
+        for i in range(12):
+            for value in [True, False]:
+                self.assertEqual(
+                    markings.distance(formula, i, value=value),
+                    eager.distance(formula, i, value=value),
+                )
+
+    def test_holds_with_stays_lazy(self) -> None:
+        formula = parser.parse_mtl("(a -> F[0, 1] (b))")
+        context, subformula = ctx.split_formula(formula, [1])
+        assert isinstance(subformula, mtl.Eventually)
+        trace = marking.Trace(patterns.pattern_states(1000), None)
+        markings = lazy_marking.LazyMarking(trace, formula)
+        w = weaken.Weaken(context, subformula, trace, markings)
+        self.assertFalse(w.holds_with((0, 0)))
+        self.assertTrue(w.holds_with((0, 1)))
+        self.assertEqual({k for _, k in markings.cells}, {0, 1})
+
+    @timeout_decorator.timeout(2)  # type: ignore[misc]
+    def test_weaken_long_trace_timeout(self) -> None:
+        formula = parser.parse_mtl("G[0, 20] (a -> F[0, 1] (b))")
+        context, subformula = ctx.split_formula(formula, [0, 1])
+        assert isinstance(subformula, mtl.Eventually)
+        context, subformula = ctx.partial_nnf(context, subformula)
+        trace = marking.Trace(patterns.pattern_states(200_000), 0)
+        markings = lazy_marking.LazyMarking(
+            trace,
+            ctx.substitute(context, subformula),
+        )
+        result = weaken.Weaken(context, subformula, trace, markings).weaken()
+        self.assertEqual(result, (0, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
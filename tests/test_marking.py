@@ -1,10 +1,16 @@
 """Unit tests for trace marking and state evaluation."""
 
+import gc
 import unittest
+import weakref
+from array import array
 
+import timeout_decorator
 from src import marking, util
 from src.logic import mtl, parser
 
+from tests import patterns
+
 
 class TestTrace(unittest.TestCase):
     def test_trace_idx(self) -> None:
@@ -25,6 +31,21 @@ class TestTrace(unittest.TestCase):
         self.assertEqual(trace.idx(5), 3)
         self.assertEqual(trace.idx(6), 2)
 
+    def test_trace_indices(self) -> None:
+        trace = marking.Trace([{"a": True}] * 4, 2)
+        self.assertEqual(list(trace.indices(0, 9)), [0, 1, 2, 3, 2, 3, 2, 3, 2])
+        self.assertEqual(list(trace.indices(1, 4)), [1, 2, 3])
+        self.assertEqual(list(trace.indices(101, 104)), [3, 2, 3])
+        self.assertEqual(
+            list(trace.indices(0, 9)),
+            [trace.idx(i) for i in range(9)],
+        )
+
+    def test_trace_indices_finite(self) -> None:
+        trace = marking.Trace([{"a": True}] * 3, None)
+        self.assertEqual(list(trace.indices(1, 6)), [1, 2, 3, 3, 3])
+        self.assertEqual(list(trace.indices(10**30, 10**30 + 2)), [3, 3])
+
     def test_trace_right_idx(self) -> None:
         trace = marking.Trace(
             [
@@ -465,5 +486,290 @@ class TestMarkingLasso(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+class TestLinearEvaluator(unittest.TestCase):
+
+    def test_matches_scan(self) -> None:
+        formulas = [
+            "F[0, 4] (a)",
+            "G[2, 5] (!(a))",
+            "F[3, 9] ((a & b))",
+            "G[0, 30] ((a | b))",
+            "G (F[1, 2] (b))",
+            "F[6, 6] (G[0, 2] (!(b)))",
+            "(a U[0, 4] b)",
+            "((a | b) U[2, 9] (a & b))",
+            "(b R[1, 5] !(a))",
+            "(a R[0, 40] (a | b))",
+        ]
+        for loop_start in [None, 0, 5, 18]:
+            trace = marking.Trace(patterns.pattern_states(19), loop_start)
+            for s in formulas:
+                formula = parser.parse_mtl(s)
+                expected = list(marking.ScanMarking(trace, formula)[formula])
+                result = list(marking.Marking(trace, formula)[formula])
+                self.assertEqual(result, expected, f"{s} @ {loop_start}")
+
+    @timeout_decorator.timeout(2)  # type: ignore[misc]
+    def test_wide_interval_timeout(self) -> None:
+        """Marking cost should not grow with the width of the interval."""
+        trace = marking.Trace(patterns.pattern_states(20000), 100)
+        formula = parser.parse_mtl("G[0, 5000] (F[0, 5000] (b))")
+        markings = marking.Marking(trace, formula)
+        self.assertTrue(markings.get(formula, 0))
+
+    def test_unbounded_until_wraps_loop(self) -> None:
+        formula = parser.parse_mtl("(p U q)")
+        trace = marking.Trace(
+            [
+                {"p": True, "q": False},
+                {"p": True, "q": True},
+                {"p": True, "q": False},
+            ],
+            1,
+        )
+        expected = util.format_expect(
+            """
+                     0 1 2
+            (p U q) │●│●│●│
+            q       │ │●│ │
+            p       │●│●│●│
+            =Lasso=    └─┘
+        """,
+        )
+        result = util.format_expect(str(marking.Marking(trace, formula)))
+        self.assertEqual(result, expected)
+
+    def test_unbounded_release_never_discharged(self) -> None:
+        formula = parser.parse_mtl("(p R q)")
+        trace = marking.Trace(
+            [
+                {"p": True, "q": True},
+                {"p": False, "q": True},
+                {"p": False, "q": True},
+            ],
+            1,
+        )
+        markings = marking.Marking(trace, formula)
+        self.assertEqual(list(markings[formula]), [True, False, False])
+
+    @timeout_decorator.timeout(2)  # type: ignore[misc]
+    def test_long_unbounded_until_timeout(self) -> None:
+        """Unbounded until should be linear rather than quadratic in length."""
+        trace = marking.Trace(patterns.pattern_states(50000), 0)
+        formula = parser.parse_mtl("((a | b) U (a & b))")
+        markings = marking.Marking(trace, formula)
+        self.assertFalse(markings.get(formula, 0))
+
+
+class TestDistanceIndex(unittest.TestCase):
+
+    def test_lasso_distances(self) -> None:
+        formula = parser.parse_mtl("a")
+        trace = marking.Trace(
+            [
+                {"a": False},
+                {"a": True},
+                {"a": False},
+                {"a": True},
+                {"a": False},
+            ],
+            2,
+        )
+        markings = marking.Marking(trace, formula)
+        self.assertEqual(
+            list(markings.distances(formula, value=True)),
+            [1, 0, 1, 0, 2],
+        )
+        self.assertEqual(
+            list(markings.distances(formula, value=False)),
+            [0, 1, 0, 1, 0],
+        )
+        self.assertEqual(markings.distance(formula, 7, value=True), 2)
+        self.assertEqual(markings.distance(formula, 9, value=True), 0)
+
+    def test_never_recurs(self) -> None:
+        formula = parser.parse_mtl("a")
+        trace = marking.Trace(
+            [{"a": False}, {"a": True}, {"a": False}, {"a": False}],
+            2,
+        )
+        markings = marking.Marking(trace, formula)
+        self.assertEqual(
+            list(markings.distances(formula, value=True)),
+            [1, 0, None, None],
+        )
+        self.assertEqual(
+            list(markings.distances(formula, value=False)),
+            [0, 1, 0, 0],
+        )
+
+    def test_finite_padding(self) -> None:
+        formula = parser.parse_mtl("a")
+        trace = marking.Trace([{"a": False}, {"a": False}], None)
+        markings = marking.Marking(trace, formula)
+        self.assertEqual(list(markings.distances(formula, value=True)), [2, 1])
+        self.assertEqual(list(markings.distances(formula, value=False)), [0, 0])
+        self.assertEqual(markings.distance(formula, 5, value=True), 0)
+        self.assertIsNone(markings.distance(formula, 5, value=False))
+
+
+class TestWitnessProfile(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.trace = marking.Trace(
+            [
+                {"a": False},
+                {"a": True},
+                {"a": False},
+                {"a": False},
+                {"a": True},
+            ],
+            2,
+        )
+
+    def test_eventually_profile(self) -> None:
+        formula = parser.parse_mtl("F[1, 2] (a)")
+        assert isinstance(formula, mtl.Eventually)
+        markings = marking.Marking(self.trace, formula)
+        self.assertEqual(
+            list(markings.witness_profile(formula)),
+            [1, 3, 2, 1, 3],
+        )
+        self.assertEqual(
+            list(markings.with_interval(formula, (1, 1))),
+            [True, False, False, True, False],
+        )
+        self.assertEqual(
+            list(markings.with_interval(formula, (1, 3))),
+            [True] * 5,
+        )
+
+    def test_always_profile(self) -> None:
+        formula = parser.parse_mtl("G[1, 2] (a)")
+        assert isinstance(formula, mtl.Always)
+        markings = marking.Marking(self.trace, formula)
+        self.assertEqual(
+            list(markings.witness_profile(formula)),
+            [2, 1, 1, 2, 1],
+        )
+        self.assertEqual(
+            list(markings.with_interval(formula, (1, 1))),
+            [True, False, False, True, False],
+        )
+
+    def test_matches_fresh_marking(self) -> None:
+        for s in [
+            "F[1, 3] (a)",
+            "G[0, 2] (!(a))",
+            "(!(a) U[1, 4] a)",
+            "(a R a)",
+        ]:
+            formula = parser.parse_mtl(s)
+            assert isinstance(formula, mtl.Temporal)
+            markings = marking.Marking(self.trace, formula)
+            a = formula.interval[0]
+            for b in [a, a + 1, a + 3, None]:
+                weakened = mtl.substitute_interval(formula, (a, b))
+                self.assertEqual(
+                    list(markings.with_interval(formula, (a, b))),
+                    list(marking.Marking(self.trace, weakened)[weakened]),
+                    f"{s} with {(a, b)}",
+                )
+
+
+class TestCompactStorage(unittest.TestCase):
+
+    def test_storage_kinds(self) -> None:
+        self.assertIsInstance(marking.VarMarkings([True, False]).bs, bytearray)
+        self.assertIsInstance(marking.VarMarkings([3, 0]).bs, array)
+        self.assertIsInstance(marking.VarMarkings([True, 3]).bs, list)
+        for v in marking.VarMarkings([True, False]):
+            self.assertIsInstance(v, bool)
+        self.assertIsInstance(marking.VarMarkings([False, True])[1], bool)
+
+    def test_append_repacks(self) -> None:
+        vs = marking.VarMarkings([])
+        vs.append(True)
+        self.assertIsInstance(vs.bs, bytearray)
+        vs.append(7)
+        self.assertIsInstance(vs.bs, list)
+        vs.append(2**70)
+        self.assertEqual(list(vs), [True, 7, 2**70])
+        ints = marking.VarMarkings([])
+        ints.append(5)
+        ints.append(2**70)
+        self.assertEqual(list(ints), [5, 2**70])
+
+    def test_memory_usage(self) -> None:
+        formula = parser.parse_mtl("(a U[0, 3] X (b))")
+        trace = marking.Trace(patterns.pattern_states(1000), None)
+        markings = marking.Marking(trace, formula)
+        usage = markings.memory_usage()
+        self.assertEqual(set(usage), set(markings.markings))
+        self.assertLess(usage[formula], 2000)
+        self.assertGreater(usage[mtl.Prop("a")], 1000)
+
+
+class TestPlan(unittest.TestCase):
+
+    def test_children_before_parents(self) -> None:
+        formula = parser.parse_mtl("(F[0, 2] (!(a)) & X (!(a)))")
+        plan = marking.compile_plan(formula)
+        self.assertEqual(
+            [f for f, _, _ in plan.steps],
+            [
+                parser.parse_mtl("!(a)"),
+                parser.parse_mtl("F[0, 2] (!(a))"),
+                parser.parse_mtl("X (!(a))"),
+                formula,
+            ],
+        )
+        self.assertIs(marking.compile_plan(formula), plan)
+
+    def test_plan_freed_with_formula(self) -> None:
+        formula = mtl.Eventually(mtl.Not(mtl.Prop("unique_plan")), (0, 7))
+        plan = weakref.ref(marking.compile_plan(formula))
+        node = weakref.ref(formula)
+        del formula
+        gc.collect()
+        self.assertIsNone(node())
+        self.assertIsNone(plan())
+
+    def test_run_over_traces(self) -> None:
+        formula = parser.parse_mtl("(a U[0, 2] (b & X (a)))")
+        plan = marking.Plan(formula)
+        for loop_start in [None, 0, 2]:
+            trace = marking.Trace(
+                [{"a": i % 2 == 0, "b": i % 3 == 0} for i in range(5)],
+                loop_start,
+            )
+            markings = marking.Marking(trace)
+            self.assertEqual(
+                list(plan.run(markings)),
+                list(marking.ScanMarking(trace, formula)[formula]),
+            )
+
+    def test_next_chain_fused(self) -> None:
+        formula = parser.parse_mtl("X (X (X ((a | X (b)))))")
+        plan = marking.compile_plan(formula)
+        operand = parser.parse_mtl("(a | X (b))")
+        self.assertEqual(
+            [(f, args) for f, _, args in plan.steps],
+            [
+                (parser.parse_mtl("X (b)"), (mtl.Prop("b"), 1)),
+                (operand, (mtl.Prop("a"), parser.parse_mtl("X (b)"))),
+                (formula, (operand, 3)),
+            ],
+        )
+        trace = marking.Trace(
+            [{"a": a, "b": False} for a in [False] * 4 + [True, False]],
+            2,
+        )
+        self.assertEqual(
+            list(marking.Marking(trace, formula)[formula]),
+            [False, True, False, False, False, True],
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,97 @@
+"""Unit tests for the online bounded-future MTL monitor."""
+
+import unittest
+from pathlib import Path
+
+from src import marking, monitor
+from src.logic import mtl, parser
+from src.trace_analysis import nuxmv_xml_trace, spin_trace
+
+from tests import patterns
+
+FORMULAS = [
+    *patterns.BOUNDED_FORMULAS,
+    "((a | b) U[0, 6] (a & b))",
+    "(G[2, 2] (a) & F[0, 3] (G[0, 2] (a)))",
+]
+
+
+class TestMonitor(unittest.TestCase):
+
+    def test_unbounded_formula(self) -> None:
+        with self.assertRaises(ValueError):
+            monitor.Monitor(parser.parse_mtl("G[0, 4] (F (b))"))
+
+    def test_matches_finite_marking(self) -> None:
+        for length in [1, 4, 17]:
+            trace = marking.Trace(patterns.pattern_states(length), None)
+            for s in FORMULAS:
+                formula = parser.parse_mtl(s)
+                expected = list(marking.Marking(trace, formula)[formula])
+                verdicts = list(
+                    monitor.monitor(formula, patterns.pattern_states(length)),
+                )
+                self.assertEqual(
+                    verdicts,
+                    list(enumerate(expected)),
+                    f"{s} @ {length}",
+                )
+
+    def test_verdicts_after_horizon(self) -> None:
+        formula = parser.parse_mtl("F[1, 3] (b)")
+        online = monitor.Monitor(formula)
+        settled = [online.push(s) for s in patterns.pattern_states(6)]
+        self.assertEqual(settled[:3], [[], [], []])
+        self.assertEqual(settled[3], [(0, True)])
+        self.assertEqual(online.finish(), [(3, True), (4, True), (5, True)])
+
+    def test_buffer_is_bounded(self) -> None:
+        formula = parser.parse_mtl("G[0, 4] (F[1, 3] (b) | X (a))")
+        online = monitor.Monitor(formula)
+        for state in patterns.pattern_states(1000):
+            online.push(state)
+            self.assertLessEqual(
+                max(len(b.values) for b in online.buffers.values()),
+                online.horizon + 2,
+            )
+
+    def test_missing_proposition(self) -> None:
+        formula = parser.parse_mtl("F[0, 1] (q)")
+        states: list[dict[str, bool | int | str]] = [{"p": True}] * 2
+        with self.assertRaises(TypeError):
+            list(monitor.monitor(formula, states))
+        with self.assertRaises(TypeError):
+            marking.Marking(marking.Trace(states, None), formula)
+
+    def test_xml_stream(self) -> None:
+        path = "tests/test_data/trace_no_loop.xml"
+        formula = parser.parse_mtl("F[0, 1] (timer)")
+        verdicts = list(
+            monitor.monitor(formula, nuxmv_xml_trace.iter_states(path)),
+        )
+        self.assertEqual(verdicts, [(0, True), (1, True), (2, True)])
+
+    def test_spin_stream(self) -> None:
+        path = Path("tests/test_data/trace_valid.spin")
+        text = path.read_text(encoding="utf-8")
+        parsed = spin_trace.parse(text)
+        trace = marking.Trace.from_columns(parsed.columns, len(parsed), None)
+        for s in [
+            "F[0, 2] (leavingHome_p)",
+            "G[0, 3] ((resting_p | X (randomWalk_p)))",
+            "(resting_p U[0, 5] leavingHome_p)",
+        ]:
+            formula = parser.parse_mtl(s)
+            expected = list(marking.Marking(trace, formula)[formula])
+            with path.open(encoding="utf-8") as lines:
+                verdicts = list(
+                    monitor.monitor(
+                        formula,
+                        spin_trace.iter_states(lines, mtl.props(formula)),
+                    ),
+                )
+            self.assertEqual(verdicts, list(enumerate(expected)), s)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,11 @@
 """Unit tests for MTL formula definitions and transformations."""
 
+import copy
+import pickle
+import sys
 import unittest
 
-from src.logic import ltl, mtl, parser
+from src.logic import ctx, ltl, mtl, parser
 
 
 class TestMtlToLtl(unittest.TestCase):
@@ -87,5 +90,108 @@ class TestMtlToString(unittest.TestCase):
         )
 
 
+class TestHashConsing(unittest.TestCase):
+    def test_equal_formulas_are_shared(self) -> None:
+        formula = parser.parse_mtl("G (a -> F[0, 3] (b))")
+        self.assertIs(formula, parser.parse_mtl("G (a -> F[0, 3] (b))"))
+        self.assertIs(
+            mtl.Eventually(mtl.Prop("b")),
+            mtl.Eventually(mtl.Prop("b"), (0, None)),
+        )
+        self.assertIsNot(
+            mtl.Eventually(mtl.Prop("b")),
+            mtl.Always(mtl.Prop("b")),
+        )
+        self.assertNotEqual(
+            mtl.Eventually(mtl.Prop("b")),
+            mtl.Always(mtl.Prop("b")),
+        )
+
+    def test_substitute_shares_nodes(self) -> None:
+        formula = parser.parse_mtl("(a U[1, 3] (b | X (c)))")
+        context, subformula = ctx.split_formula(formula, [])
+        self.assertIs(ctx.substitute(context, subformula), formula)
+
+    def test_size(self) -> None:
+        formula = parser.parse_mtl("((a & b) | X (a & b))")
+        self.assertEqual(formula.size, 8)
+        self.assertEqual(mtl.mtl_to_ltl(parser.parse_mtl("F[0, 1] p")).size, 4)
+
+    def test_copies_are_interned(self) -> None:
+        formula = parser.parse_mtl("(a R[2, 5] !(b))")
+        literal = ltl.Next(ltl.Prop("p"))
+        for node in [formula, literal]:
+            pickled = pickle.dumps(node)
+            self.assertIs(pickle.loads(pickled), node)  # noqa: S301
+            self.assertIs(copy.deepcopy(node), node)
+
+    def test_no_instance_dict(self) -> None:
+        self.assertFalse(hasattr(mtl.Prop("a"), "__dict__"))
+        self.assertFalse(hasattr(ctx.Hole(), "__dict__"))
+        self.assertFalse(hasattr(ltl.Prop("a"), "__dict__"))
+
+
+class TestHorizon(unittest.TestCase):
+
+    def test_bounded(self) -> None:
+        formula = parser.parse_mtl("(X (a) U[1, 3] G[0, 4] (X (b)))")
+        self.assertEqual(mtl.horizon(formula), 8)
+        self.assertEqual(mtl.horizon(parser.parse_mtl("(a & !(b))")), 0)
+
+    def test_unbounded(self) -> None:
+        formula = parser.parse_mtl("(F[0, 2] (a) | G (b))")
+        horizons = mtl.horizons(formula)
+        self.assertIsNone(horizons[formula])
+        self.assertEqual(horizons[parser.parse_mtl("F[0, 2] (a)")], 2)
+        self.assertEqual(horizons[mtl.Prop("b")], 0)
+
+
+class TestNextChain(unittest.TestCase):
+
+    def test_next_chain(self) -> None:
+        formula = parser.parse_mtl("X (X (X (F[0, 1] (X (a)))))")
+        assert isinstance(formula, mtl.Next)
+        self.assertEqual(
+            mtl.next_chain(formula),
+            (parser.parse_mtl("F[0, 1] (X (a))"), 3),
+        )
+
+
+class TestProps(unittest.TestCase):
+
+    def test_props(self) -> None:
+        formula = parser.parse_mtl(
+            "G ((resting_p -> F[1, 3] (resting_p)) | !(a))",
+        )
+        self.assertEqual(mtl.props(formula), {"resting_p", "a"})
+        self.assertEqual(mtl.props(parser.parse_mtl("F (TRUE)")), set())
+
+
+class TestDeepFormula(unittest.TestCase):
+
+    def test_deeper_than_recursion_limit(self) -> None:
+        depth = 2 * sys.getrecursionlimit()
+        text = "X (" * depth + "(a U[0, 2] b)" + ")" * depth
+        formula = parser.parse_mtl(text)
+        self.assertEqual(str(formula), text)
+        self.assertEqual(mtl.horizon(formula), depth + 2)
+        self.assertEqual(len(mtl.post_order(formula)), depth + 3)
+        ltl_formula = mtl.mtl_to_ltl(formula)
+        self.assertEqual(
+            parser.parse_nuxmv_ltl(ltl.to_nuxmv(ltl_formula)),
+            ltl_formula,
+        )
+
+    def test_large_bound(self) -> None:
+        bound = 2 * sys.getrecursionlimit()
+        formula = parser.parse_mtl(f"G[0, {bound}] (a)")
+        ltl_formula = mtl.mtl_to_ltl(formula)
+        self.assertEqual(ltl_formula.size, 3 * bound + 1)
+        self.assertEqual(
+            parser.parse_spin_ltl(ltl.to_spin(ltl_formula)),
+            ltl_formula,
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,109 @@
+"""Unit tests for simultaneous weakening of several subformulae."""
+
+import unittest
+
+from src import analyse_cex, custom_args, marking, multi_weaken, weaken
+from src.logic import parser
+
+FORMULA = "(G (((a & X (!(a))) -> G[1, 15] (!(a)))) & F[0, 3] (b))"
+PATHS = [[0, 0, 1], [1]]
+
+
+def _trace(a: set[int], b: set[int]) -> marking.Trace:
+    """Build a lasso trace with a and b true at the given positions, then
+    looping on a state with only b true."""
+    states: list[dict[str, bool | int | str]] = [
+        {"a": i in a, "b": i in b} for i in range(12)
+    ]
+    return marking.Trace([*states, {"a": False, "b": True}], 12)
+
+
+class TestMultiWeaken(unittest.TestCase):
+
+    def test_candidates_match_single_weakenings(self) -> None:
+        formula = parser.parse_mtl(FORMULA)
+        for trace in (_trace({0, 5}, {2}), _trace(set(), {6})):
+            analysis = multi_weaken.MultiWeaken(formula, PATHS, trace)
+            expected = []
+            for path in PATHS:
+                context, subformula = analyse_cex.split_weakened_subformula(
+                    formula,
+                    path,
+                )
+                expected.append(
+                    weaken.Weaken(context, subformula, trace).weaken(),
+                )
+            self.assertEqual(analysis.candidates(), expected)
+            for w in analysis.weakens:
+                self.assertIs(w.markings, analysis.markings)
+
+    def test_weaken_round(self) -> None:
+        formula = parser.parse_mtl(FORMULA)
+        traces = [_trace({0, 5}, {2}), _trace(set(), {6})]
+        analyses = [
+            multi_weaken.MultiWeaken(formula, PATHS, trace) for trace in traces
+        ]
+        self.assertEqual(
+            [analysis.candidates() for analysis in analyses],
+            [[(1, 4), None], [None, (0, 6)]],
+        )
+        intervals = multi_weaken.weaken_round(
+            analyses,
+            custom_args.Tradeoff.PRIORITY,
+        )
+        self.assertEqual(intervals, {0: (1, 4), 1: (0, 6)})
+        assert intervals is not None
+        weakened = multi_weaken.substitute_intervals(formula, PATHS, intervals)
+        self.assertEqual(
+            weakened,
+            parser.parse_mtl(
+                "(G (((a & X (!(a))) -> G[1, 4] (!(a)))) & F[0, 6] (b))",
+            ),
+        )
+        for trace in traces:
+            self.assertTrue(marking.Marking(trace, weakened).get(weakened, 0))
+
+    def test_no_weakening(self) -> None:
+        formula = parser.parse_mtl(FORMULA)
+        analysis = multi_weaken.MultiWeaken(
+            formula,
+            PATHS,
+            _trace({0, 5}, {6}),
+        )
+        self.assertEqual(analysis.candidates(), [None, None])
+        self.assertIsNone(
+            multi_weaken.weaken_round(
+                [analysis],
+                custom_args.Tradeoff.CLOSEST,
+            ),
+        )
+
+    def test_tradeoff(self) -> None:
+        formula = parser.parse_mtl("(G[0, 4] (a) | F[0, 2] (b))")
+        trace = marking.Trace(
+            [{"a": i not in {3}, "b": i in {5}} for i in range(8)],
+            None,
+        )
+        analysis = multi_weaken.MultiWeaken(formula, [[1], [0]], trace)
+        self.assertEqual(analysis.candidates(), [(0, 5), (0, 2)])
+        self.assertEqual(
+            analysis.choose(custom_args.Tradeoff.PRIORITY),
+            (0, (0, 5)),
+        )
+        self.assertEqual(
+            analysis.choose(custom_args.Tradeoff.CLOSEST),
+            (1, (0, 2)),
+        )
+
+    def test_overlapping_paths(self) -> None:
+        formula = parser.parse_mtl("F[0, 4] (G[0, 2] (a))")
+        with self.assertRaises(ValueError):
+            multi_weaken.MultiWeaken(
+                formula,
+                [[], [0]],
+                marking.Trace([{"a": True}], None),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Unit tests for the NumPy marking backend."""
+
+import unittest
+
+from src import marking, numpy_marking, util, weaken
+from src.logic import ctx, mtl, parser
+
+from tests import patterns
+
+
+class TestNumpyMarking(unittest.TestCase):
+
+    def test_matches_list_backend(self) -> None:
+        for loop_start in [None, 0, 4, 10]:
+            trace = marking.Trace(patterns.pattern_states(11), loop_start)
+            for s in patterns.FORMULAS:
+                formula = parser.parse_mtl(s)
+                expected = list(marking.Marking(trace, formula)[formula])
+                markings = numpy_marking.NumpyMarking(trace, formula)
+                self.assertEqual(
+                    list(markings[formula]),
+                    expected,
+                    f"{s} @ {loop_start}",
+                )
+
+    def test_out_of_range_is_true(self) -> None:
+        formula = parser.parse_mtl("!(a)")
+        trace = marking.Trace([{"a": True}, {"a": True}], None)
+        markings = numpy_marking.NumpyMarking(trace, formula)
+        self.assertIsInstance(markings.get(formula, 0), bool)
+        self.assertFalse(markings.get(formula, 1))
+        self.assertTrue(markings.get(formula, 2))
+
+    def test_fmt_markings_integer_column(self) -> None:
+        formula = parser.parse_mtl("(timer & X (a))")
+        trace = marking.Trace(patterns.pattern_states(5), 2)
+        expected = util.format_expect(
+            """
+                             0 1 2 3 4
+            (timer & X (a)) │ │ │●│ │ │
+            X (a)           │ │ │●│ │ │
+            timer           │0│1│2│3│0│
+            b               │ │●│ │ │ │
+            a               │●│ │ │●│ │
+            =Lasso=              └───┘
+        """,
+        )
+        markings = numpy_marking.NumpyMarking(trace, formula)
+        self.assertEqual(util.format_expect(str(markings)), expected)
+
+    def test_weaken_with_numpy_markings(self) -> None:
+        formula = parser.parse_mtl("G (a -> F[0, 1] (b))")
+        context, subformula = ctx.split_formula(formula, [0, 1])
+        assert isinstance(subformula, mtl.Eventually)
+        context, subformula = ctx.partial_nnf(context, subformula)
+        trace = marking.Trace(patterns.pattern_states(15), 0)
+        markings = numpy_marking.NumpyMarking(trace, formula)
+        result = weaken.Weaken(context, subformula, trace, markings).weaken()
+        expected = weaken.Weaken(context, subformula, trace).weaken()
+        self.assertEqual(result, expected)
+        self.assertEqual(result, (0, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
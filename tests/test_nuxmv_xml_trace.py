@@ -47,3 +47,18 @@ class TestXMLTrace(unittest.TestCase):
         """,
         )
         self.assertEqual(result, expected)
+
+    def test_iter_states(self) -> None:
+        path = "tests/test_data/trace_no_loop.xml"
+        trace = nuxmv_xml_trace.parse(read_test_data(path))
+        self.assertEqual(list(nuxmv_xml_trace.iter_states(path)), list(trace))
+
+    def test_projection(self) -> None:
+        path = "tests/test_data/trace_valid.xml"
+        trace = nuxmv_xml_trace.parse(read_test_data(path), set())
+        self.assertEqual(trace.columns, {})
+        self.assertEqual(len(trace), 3)
+        self.assertEqual(
+            list(nuxmv_xml_trace.iter_states(path, {"timer"})),
+            list(nuxmv_xml_trace.parse(read_test_data(path), {"timer"})),
+        )
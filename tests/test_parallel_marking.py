@@ -0,0 +1,49 @@
+"""Unit tests for the segment-parallel marking evaluator."""
+
+import unittest
+
+from src import marking, parallel_marking
+from src.logic import parser
+
+from tests import patterns
+
+FORMULAS = [
+    *patterns.FORMULAS,
+    "G (F[0, 2] (a))",
+    "((a | b) U (a & X (b)))",
+    "F (G[0, 2] (!(a)) & (a R b))",
+]
+
+
+class TestParallelMarking(unittest.TestCase):
+
+    def test_bounded_roots(self) -> None:
+        formula = parser.parse_mtl("G ((a -> F[0, 2] (b)) & (a U b))")
+        self.assertEqual(
+            parallel_marking.bounded_roots(formula),
+            [parser.parse_mtl("(a -> F[0, 2] (b))")],
+        )
+        formula = parser.parse_mtl("X (G[0, 2] (b))")
+        self.assertEqual(parallel_marking.bounded_roots(formula), [formula])
+
+    def test_matches_sequential_marking(self) -> None:
+        for loop_start in [None, 0, 9, 22]:
+            trace = marking.Trace(patterns.pattern_states(23), loop_start)
+            for s in FORMULAS:
+                formula = parser.parse_mtl(s)
+                expected = list(marking.Marking(trace, formula)[formula])
+                markings = parallel_marking.ParallelMarking(
+                    trace,
+                    formula,
+                    workers=2,
+                    segment_length=4,
+                )
+                self.assertEqual(
+                    list(markings[formula]),
+                    expected,
+                    f"{s} @ {loop_start}",
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
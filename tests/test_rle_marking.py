@@ -0,0 +1,69 @@
+"""Unit tests for the run-length encoded marking backend."""
+
+import unittest
+
+from src import marking, rle_marking
+from src.logic import parser
+
+from tests import patterns
+
+FORMULAS = [
+    *patterns.FORMULAS,
+    "G[13, 15] ((a | b))",
+    "((a | timer) U (a & b))",
+    "(b R (a | b))",
+]
+
+
+def _stuttering_states(length: int) -> list[dict[str, bool | int | str]]:
+    """Build states whose propositions hold for stretches of steps."""
+    return [
+        {"a": i // 3 % 2 == 0, "b": i // 4 % 3 == 1, "timer": i // 2 % 3}
+        for i in range(length)
+    ]
+
+
+class TestRleMarking(unittest.TestCase):
+
+    def test_matches_list_backend(self) -> None:
+        for loop_start in [None, 0, 4, 10]:
+            trace = marking.Trace(_stuttering_states(13), loop_start)
+            for s in FORMULAS:
+                formula = parser.parse_mtl(s)
+                expected = marking.Marking(trace, formula)
+                markings = rle_marking.RleMarking(trace, formula)
+                self.assertEqual(
+                    list(markings[formula]),
+                    list(expected[formula]),
+                    f"{s} @ {loop_start}",
+                )
+                self.assertEqual(
+                    list(markings.distances(formula, value=False)),
+                    list(expected.distances(formula, value=False)),
+                    f"{s} @ {loop_start}",
+                )
+
+    def test_long_runs(self) -> None:
+        trace = marking.Trace.from_changes(
+            {"a": [(0, False), (1000, True), (5000, False)]},
+            10**6,
+            2000,
+        )
+        formula = parser.parse_mtl("F[0, 10] (X (a))")
+        result = rle_marking.RleMarking(trace, formula)[formula]
+        assert isinstance(result, rle_marking.RunMarkings)
+        self.assertEqual(list(result.ends), [989, 4999, 10**6 - 11, 10**6])
+        self.assertEqual(result.values, [False, True, False, True])
+        self.assertTrue(result[10**6])
+
+    def test_append(self) -> None:
+        runs = rle_marking.RunMarkings.from_values([True, True, 2, 2, False])
+        self.assertEqual(list(runs.ends), [2, 4, 5])
+        runs.append(False)
+        runs.append(1)
+        self.assertEqual(list(runs), [True, True, 2, 2, False, False, 1])
+        self.assertEqual(list(runs.ends), [2, 4, 6, 7])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -49,3 +49,21 @@ resting_p     │●│●│●│●│ │ │ │ │ │ │ │ │ │ 
         """,
         )
         self.assertEqual(result, expected)
+
+    def test_iter_states(self) -> None:
+        trail_input = read_test_data("tests/test_data/trace_valid.spin")
+        states = list(spin_trace.iter_states(trail_input.splitlines()))
+        trace = spin_trace.parse(trail_input)
+        self.assertEqual(len(states), len(trace))
+        for state, expected in zip(states, trace, strict=True):
+            for var, value in state.items():
+                self.assertEqual(value, expected.get(var, False), var)
+
+    def test_projection(self) -> None:
+        trail_input = read_test_data("tests/test_data/trace_valid.spin")
+        full = spin_trace.parse(trail_input)
+        trace = spin_trace.parse(trail_input, {"resting_p", "missing"})
+        self.assertEqual(list(trace.columns), ["resting_p"])
+        self.assertEqual(trace.columns["resting_p"], full.columns["resting_p"])
+        self.assertEqual(trace.loop_start, full.loop_start)
+        self.assertEqual(len(trace), len(full))
@@ -18,6 +18,29 @@ class TestTrace(unittest.TestCase):
         self.assertEqual(trace[401]["a"], 10)
         self.assertEqual(trace[402]["a"], 2)
 
+    def test_forward_fill(self) -> None:
+        self.assertEqual(
+            m.forward_fill([(1, 3), (2, 3), (4, True)], 6),
+            [3, 3, 3, 3, True, True],
+        )
+
+    def test_from_changes(self) -> None:
+        trace = m.Trace.from_changes(
+            {"a": [(0, True), (2, False)], "b": [(1, 4)], "s": [(0, "x")]},
+            4,
+            1,
+        )
+        self.assertEqual(len(trace), 4)
+        self.assertEqual(trace[2], {"a": False, "b": 4, "s": "x"})
+        self.assertEqual(
+            {str(p): list(vs) for p, vs in trace.to_var_markings().items()},
+            {"a": [True, True, False, False], "b": [4, 4, 4, 4]},
+        )
+        self.assertEqual(
+            m.Trace(list(trace), 1).to_markings(),
+            trace.to_markings(),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,79 @@
+"""Unit tests for analyses sharing the markings of one trace."""
+
+import unittest
+from pathlib import Path
+
+from src import analyse_cex, bottom_up_weaken, custom_args
+from src.logic import parser
+
+TRACE = Path("tests/test_data/trace_valid.xml")
+
+
+class TestTraceSession(unittest.TestCase):
+
+    def test_matches_single_analysis(self) -> None:
+        session = analyse_cex.TraceSession.from_file(
+            TRACE,
+            custom_args.ModelChecker.NUXMV,
+        )
+        for text, de_bruijn in [
+            ("G (F[0, 1] (timer))", [0]),
+            ("G[0, 3] ((timer -> F[1, 2] (!(timer))))", [0, 1]),
+            ("G[0, 3] ((timer -> F[1, 2] (!(timer))))", []),
+        ]:
+            formula = parser.parse_mtl(text)
+            analysis = analyse_cex.AnalyseCex.from_session(
+                session,
+                formula,
+                de_bruijn,
+            )
+            single = analyse_cex.AnalyseCex(
+                formula,
+                de_bruijn,
+                TRACE,
+                custom_args.ModelChecker.NUXMV,
+            )
+            self.assertIs(analysis.get_markings(), session.markings)
+            self.assertEqual(
+                analysis.get_weakened_interval(),
+                single.get_weakened_interval(),
+            )
+
+    def test_markings_are_reused(self) -> None:
+        session = analyse_cex.TraceSession.from_file(
+            TRACE,
+            custom_args.ModelChecker.NUXMV,
+        )
+        self.assertEqual(
+            set(session.markings.markings),
+            {parser.parse_mtl("timer"), parser.parse_mtl("MAX_TIMER")},
+        )
+        first = parser.parse_mtl("(G[0, 2] (timer) | F[0, 1] (timer))")
+        analyse_cex.AnalyseCex.from_session(
+            session,
+            first,
+            [1],
+        ).get_weakened_interval()
+        always = parser.parse_mtl("G[0, 2] (timer)")
+        cached = session.markings.markings[always]
+        known = set(session.markings.markings)
+        second = parser.parse_mtl(
+            "((G[0, 2] (timer) | F[0, 1] (timer)) & F[0, 3] (!(timer)))",
+        )
+        session.weaken(
+            *analyse_cex.split_weakened_subformula(second, [1]),
+            engine=bottom_up_weaken.BottomUpWeaken,
+        ).weaken()
+        self.assertIs(session.markings.markings[always], cached)
+        self.assertEqual(
+            set(session.markings.markings) - known,
+            {
+                parser.parse_mtl("F[0, 1] (timer)"),
+                parser.parse_mtl("(G[0, 2] (timer) | F[0, 1] (timer))"),
+                parser.parse_mtl("!(timer)"),
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 """Unit tests for interval weakening computations."""
 
+import sys
 import unittest
 
 import timeout_decorator
@@ -486,5 +487,103 @@ class TestWeakenFinite(unittest.TestCase):
         self.assertTupleEqual(result, (0, 2))
 
 
+class TestHoldsWith(unittest.TestCase):
+
+    def test_holds_with_weakened_interval(self) -> None:
+        formula = parser.parse_mtl("G (a -> F[0, 1] b)")
+        context, subformula = ctx.split_formula(formula, [0, 1])
+        assert isinstance(subformula, mtl.Eventually)
+        context, subformula = ctx.partial_nnf(context, subformula)
+        trace = marking.Trace(
+            [
+                {"a": True, "b": False},
+                {"a": False, "b": False},
+                {"a": False, "b": False},
+                {"a": False, "b": True},
+            ],
+            0,
+        )
+        w = weaken.Weaken(context, subformula, trace)
+        self.assertFalse(w.holds_with((0, 1)))
+        self.assertFalse(w.holds_with((0, 2)))
+        self.assertTrue(w.holds_with((0, 3)))
+        self.assertEqual(w.weaken(), (0, 3))
+
+
+class TestEviction(unittest.TestCase):
+
+    def test_queried_formulas(self) -> None:
+        formula = parser.parse_mtl("G (c & (b U[0, 3] (a | b)))")
+        context, subformula = ctx.split_formula(formula, [0, 1])
+        self.assertEqual(
+            weaken.queried_formulas(context, subformula),
+            {
+                mtl.Prop("c"),
+                mtl.Prop("b"),
+                parser.parse_mtl("(a | b)"),
+            },
+        )
+
+    def test_weaken_with_evicted_markings(self) -> None:
+        formula = parser.parse_mtl(
+            "G[0, 6] ((!(a) | X (c)) -> F[0, 1] (b & X (X (a))))",
+        )
+        context, subformula = ctx.split_formula(formula, [0, 1])
+        assert isinstance(subformula, mtl.Eventually)
+        context, subformula = ctx.partial_nnf(context, subformula)
+        full = ctx.substitute(context, subformula)
+        pinned = weaken.queried_formulas(context, subformula)
+        for loop_start in [None, 0, 5]:
+            trace = marking.Trace(
+                [
+                    {"a": i % 3 == 0, "b": i % 4 == 1, "c": i % 2 == 0}
+                    for i in range(9)
+                ],
+                loop_start,
+            )
+            evicted = marking.Marking(trace, full, pinned=pinned)
+            self.assertEqual(
+                set(evicted.markings) - set(trace.to_var_markings()),
+                pinned | {full},
+            )
+            self.assertEqual(
+                weaken.Weaken(context, subformula, trace, evicted).weaken(),
+                weaken.Weaken(context, subformula, trace).weaken(),
+            )
+
+
+class TestMemo(unittest.TestCase):
+
+    @timeout_decorator.timeout(1)  # type: ignore[misc]
+    def test_nested_contexts_share_positions(self) -> None:
+        formula = parser.parse_mtl(
+            "G[0, 60] (F[0, 60] (G[0, 60] (F[0, 60] (G[0, 60] (F[0, 2] (a))))))",
+        )
+        context, subformula = ctx.split_formula(formula, [0, 0, 0, 0, 0])
+        trace = marking.Trace(
+            [{"a": i % 7 != 0} for i in range(20)],
+            5,
+        )
+        w = weaken.Weaken(context, subformula, trace)
+        self.assertEqual(w.weaken(), (0, 2))
+        self.assertLessEqual(len(w.memo), 6 * len(trace))
+
+
+class TestDeepContext(unittest.TestCase):
+
+    def test_context_deeper_than_recursion_limit(self) -> None:
+        depth = sys.getrecursionlimit()
+        formula = parser.parse_mtl(
+            "G[0, 1] (" * depth + "F[0, 2] (a)" + ")" * depth,
+        )
+        context, subformula = ctx.split_formula(formula, [0] * depth)
+        trace = marking.Trace(
+            [{"a": i % 7 != 0} for i in range(20)],
+            5,
+        )
+        w = weaken.Weaken(context, subformula, trace)
+        self.assertEqual(w.weaken(), (0, 2))
+
+
 if __name__ == "__main__":
     unittest.main()